@@ -0,0 +1 @@
+# This file is required to run the benchmarks with "python -m benchmarks.<name>"
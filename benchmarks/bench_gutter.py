@@ -0,0 +1,70 @@
+"""
+Keystroke-to-paint latency of the line-number gutter.
+
+    python -m benchmarks.bench_gutter
+
+Needs a display (use Xvfb on a headless machine).
+"""
+import time
+import tkinter as tk
+
+from editor.document import Document
+from editor.viewport import TextViewport
+from editor.gutter import LineGutter
+
+SIZES = [10_000, 100_000, 1_000_000]
+KEYSTROKES = 200
+
+
+def make_editor(root, lines: int):
+    frame = tk.Frame(root)
+    frame.pack(expand=1, fill="both")
+    canvas = tk.Canvas(frame, width=45, highlightthickness=0)
+    canvas.pack(side="left", fill="y")
+    text = tk.Text(frame, undo=True, wrap="word")
+    text.pack(side="left", expand=1, fill="both")
+    scroll = tk.Scrollbar(frame)
+    scroll.pack(side="right", fill="y")
+
+    doc = Document([f"line {i} of the benchmark document" for i in range(lines)])
+    gutter = LineGutter(canvas, text)
+    TextViewport(text, doc, scroll, on_view_change=gutter.schedule)
+    text.bind("<KeyRelease>", lambda e: gutter.schedule())
+    return frame, text, gutter
+
+
+def bench(root, lines: int) -> float:
+    frame, text, gutter = make_editor(root, lines)
+    root.update()
+    text.mark_set("insert", "20.0")
+
+    samples = []
+    for i in range(KEYSTROKES):
+        t0 = time.perf_counter()
+        text.insert("insert", "\n" if i % 10 == 0 else "x")
+        gutter.schedule()
+        root.update()
+        samples.append(time.perf_counter() - t0)
+
+    frame.destroy()
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}); run under Xvfb.")
+        return
+    root.geometry("900x700")
+
+    print(f"{'lines':>10}  {'p50 ms':>8}  {'p95 ms':>8}")
+    for lines in SIZES:
+        p50, p95 = bench(root, lines)
+        print(f"{lines:>10}  {p50:>8.2f}  {p95:>8.2f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Open and scroll latency for documents with very long lines.
+
+    python -m benchmarks.bench_long_lines
+
+Compares long-line mode (wrap="none", lines held in SEGMENT_CHARS-wide
+horizontal segments) with the normal wrapped view. The wrapped view is
+only measured on the small fixtures; on the big ones it takes minutes.
+
+Needs a display (use Xvfb on a headless machine).
+"""
+import time
+import tkinter as tk
+
+from editor.document import Document
+from editor.viewport import SEGMENT_CHARS, TextViewport
+from editor.gutter import LineGutter
+
+# (name, number of lines, chars per line)
+FIXTURES = [
+    ("one 200 KB line", 1, 200_000),
+    ("one 5 MB line", 1, 5_000_000),
+    ("one 50 MB line", 1, 50_000_000),
+    ("200 x 50k lines", 200, 50_000),
+    ("2000 x 50k lines", 2000, 50_000),
+]
+WRAPPED_MAX_CHARS = 1_000_000  # the wrapped view is only timed up to this document size
+SCROLLS = 50
+
+
+def make_doc(lines: int, width: int) -> Document:
+    chunk = "0123456789abcdef{}[],:\" "
+    line = (chunk * (width // len(chunk) + 1))[:width]
+    return Document([line] * lines)
+
+
+def make_editor(root, doc, long_lines: bool):
+    frame = tk.Frame(root)
+    frame.pack(expand=1, fill="both")
+    xscroll = None
+    if long_lines:
+        xscroll = tk.Scrollbar(frame, orient="horizontal")
+        xscroll.pack(side="bottom", fill="x")
+    canvas = tk.Canvas(frame, width=45, highlightthickness=0)
+    canvas.pack(side="left", fill="y")
+    text = tk.Text(frame, undo=True, wrap="none" if long_lines else "word")
+    text.pack(side="left", expand=1, fill="both")
+    scroll = tk.Scrollbar(frame)
+    scroll.pack(side="right", fill="y")
+
+    gutter = LineGutter(canvas, text)
+    if long_lines:
+        view = TextViewport(text, doc, scroll, on_view_change=gutter.schedule, window_lines=400,
+                            segment=SEGMENT_CHARS, xscrollbar=xscroll)
+    else:
+        view = TextViewport(text, doc, scroll, on_view_change=gutter.schedule)
+    return frame, text, view
+
+
+def timed(root, action) -> float:
+    t0 = time.perf_counter()
+    action()
+    root.update()
+    return (time.perf_counter() - t0) * 1000
+
+
+def bench(root, doc, long_lines: bool):
+    """(open ms, p95 vertical scroll ms, p95 horizontal scroll ms)"""
+    holder = {}
+    open_ms = timed(root, lambda: holder.update(zip(("frame", "text", "view"), make_editor(root, doc, long_lines))))
+    text, view = holder["text"], holder["view"]
+
+    vertical = []
+    for i in range(SCROLLS):
+        line = (i * 37) % doc.line_count
+        vertical.append(timed(root, lambda: view.scroll_to(line)))
+
+    xview = view.xview if long_lines else text.xview  # the scrollbar's command
+    horizontal = []
+    for i in range(SCROLLS):
+        frac = (i % 10) / 10
+        horizontal.append(timed(root, lambda: xview("moveto", frac)))
+
+    holder["frame"].destroy()
+    vertical.sort()
+    horizontal.sort()
+    return open_ms, vertical[int(SCROLLS * 0.95)], horizontal[int(SCROLLS * 0.95)]
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}); run under Xvfb.")
+        return
+    root.geometry("900x700")
+
+    print(f"{'fixture':<18}  {'mode':<8}  {'open ms':>9}  {'vscroll p95':>11}  {'hscroll p95':>11}")
+    for name, lines, width in FIXTURES:
+        doc = make_doc(lines, width)
+        modes = [True] + ([False] if lines * width <= WRAPPED_MAX_CHARS else [])
+        for long_lines in modes:
+            open_ms, v95, h95 = bench(root, doc, long_lines)
+            mode = "long" if long_lines else "wrapped"
+            print(f"{name:<18}  {mode:<8}  {open_ms:>9.1f}  {v95:>11.2f}  {h95:>11.2f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
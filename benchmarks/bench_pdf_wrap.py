@@ -0,0 +1,65 @@
+"""
+PDF layout throughput in pages per second, with and without the glyph-width cache.
+
+    python -m benchmarks.bench_pdf_wrap
+
+Needs reportlab. Put a Unicode TTF in data/fonts/ (or have Nirmala UI /
+Noto Sans Bengali installed) to measure real Bangla metrics.
+"""
+import time
+
+try:
+    from reportlab.pdfbase import pdfmetrics
+except ImportError:
+    pdfmetrics = None
+
+LINES = 20_000
+SAMPLES = [
+    "The quick brown fox jumps over the lazy dog while the editor keeps typing along.",
+    "আমার সোনার বাংলা, আমি তোমায় ভালোবাসি। চিরদিন তোমার আকাশ, তোমার বাতাস, আমার প্রাণে বাজায় বাঁশি।",
+    "    def layout(self, lines):  # indented code keeps its indentation on the first line",
+    "",
+    "মিশ্র লেখা: Bangla and English words mixed together in one fairly long paragraph line.",
+]
+
+
+def make_lines(n: int):
+    return [SAMPLES[i % len(SAMPLES)] * (1 + i % 3) for i in range(n)]
+
+
+def uncached(font: str, size: float):
+    return lambda text: pdfmetrics.stringWidth(text, font, size)
+
+
+def bench(label: str, lines, measure, lines_per_page: int):
+    from editor.pdf_export import PAGE_W, LM, RM
+    from editor.pdf_layout import wrap_line
+
+    width = PAGE_W - LM - RM
+    t0 = time.perf_counter()
+    out = 0
+    for raw in lines:
+        out += len(wrap_line(raw, width, measure))
+    elapsed = time.perf_counter() - t0
+    pages = out / lines_per_page
+    print(f"{label:<22}  {pages:>8.0f}  {elapsed:>8.2f}  {pages / elapsed:>10.0f}")
+
+
+def main():
+    if pdfmetrics is None:
+        print("reportlab is not installed; nothing to measure.")
+        return
+    from editor.pdf_export import PAGE_H, TM, BM, LINE_H, BODY_SIZE
+    from editor.pdf_layout import GlyphWidths, body_font
+
+    font = body_font()
+    lines_per_page = int((PAGE_H - TM - BM) // LINE_H) + 1
+    lines = make_lines(LINES)
+    print(f"font: {font}, {LINES} document lines")
+    print(f"{'':<22}  {'pages':>8}  {'seconds':>8}  {'pages/s':>10}")
+    bench("stringWidth per token", lines, uncached(font, BODY_SIZE), lines_per_page)
+    bench("glyph-width cache", lines, GlyphWidths(font, BODY_SIZE), lines_per_page)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Import-time regression check for a cold start.
+
+    python -m benchmarks.bench_startup [--scale 2.0]
+
+Imports each startup module in a fresh interpreter (python -X importtime),
+keeps the best of a few runs and exits with status 1 if one takes longer
+than its budget or pulls in a module that must stay lazy (reportlab, the
+process pool). --scale multiplies the budgets for slow machines.
+No display is needed.
+"""
+import os
+import sys
+import subprocess
+
+REPEATS = 5
+IMPORT_BUDGET_MS = {
+    "editor.welcome": 60,  # everything before the welcome window can paint
+    "editor.ui": 120,  # preloaded in the background while the welcome screen waits
+}
+MUST_STAY_LAZY = ["reportlab", "concurrent.futures", "multiprocessing",
+                  "editor.pdf_export", "editor.pdf_layout", "editor.find_in_files"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_ms(module: str) -> float:
+    """Cumulative import time of module in a fresh interpreter, in ms."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    for line in out.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}")
+
+
+def eager_modules(module: str):
+    code = (f"import sys, {module}; "
+            f"print(' '.join(m for m in {MUST_STAY_LAZY!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def main():
+    scale = 1.0
+    if "--scale" in sys.argv:
+        scale = float(sys.argv[sys.argv.index("--scale") + 1])
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "editor"], cwd=ROOT, check=True)
+
+    failed = False
+    print(f"{'module':<18}  {'best ms':>8}  {'budget':>8}")
+    for module, budget in IMPORT_BUDGET_MS.items():
+        best = min(import_ms(module) for _ in range(REPEATS))
+        budget *= scale
+        over = best > budget
+        failed |= over
+        print(f"{module:<18}  {best:>8.1f}  {budget:>8.0f}  {'OVER BUDGET' if over else 'ok'}")
+        eager = eager_modules(module)
+        if eager:
+            failed = True
+            print(f"  imports {', '.join(eager)} at startup; these must be loaded on first use")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
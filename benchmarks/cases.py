@@ -0,0 +1,249 @@
+"""
+One benchmark case on one fixture, in this process.
+
+    python -m benchmarks.cases <case> <kind> <size>
+
+Prints one JSON object: {"seconds": ..., "peak_rss_mb": ...}, or
+{"skipped": reason}. benchmarks.suite runs every case in a fresh
+interpreter this way, so peak RSS belongs to that case alone. Run it from
+a scratch directory: FileManager and TextEditorUI create data/, logs/
+and autosave/ in the working directory.
+
+`seconds` covers only the measured operation, not loading the fixture
+first. The ui_* cases need a display (Xvfb works); the root window is
+withdrawn.
+"""
+import os
+import sys
+import json
+import time
+
+from benchmarks.fixtures import KINDS, fixture_path, fixture_tree
+
+KEYSTROKES = 100  # typed by the ui_typing case
+UI_POLL_S = 0.005
+
+
+class Skipped(Exception):
+    pass
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, None where the resource module is missing (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def timed(action) -> float:
+    t0 = time.perf_counter()
+    action()
+    return time.perf_counter() - t0
+
+
+def load(path):
+    from editor.file_manager import FileManager
+
+    fm = FileManager()
+    return fm, fm.open_document(path)
+
+
+# ===================== FILE MANAGER =====================
+def case_open(path, needle):
+    from editor.file_manager import FileManager
+
+    fm = FileManager()
+    return timed(lambda: list(fm.open_document(path).lines(0, 100)))  # what the first screen needs
+
+
+def case_hash(path, needle):
+    fm, doc = load(path)
+    return timed(lambda: fm.hash_lines(doc.lines()))
+
+
+def case_save(path, needle):
+    fm, doc = load(path)
+    return timed(lambda: fm.save_document("saved.txt", doc, fsync=fm.fsync_policy()))
+
+
+def case_autosave(path, needle):
+    from editor.autosave import write_snapshot
+
+    fm, doc = load(path)
+    return timed(lambda: write_snapshot("autosave.txt", doc.snapshot()))
+
+
+# ===================== SEARCH AND STATS =====================
+def case_words(path, needle):
+    from editor.stats import DocumentStats
+
+    fm, doc = load(path)
+
+    def scan():
+        stats = DocumentStats(doc)
+        while not stats.scan():
+            pass
+
+    return timed(scan)
+
+
+def case_find(path, needle):
+    from editor.search import compile_query, iter_matches
+
+    fm, doc = load(path)
+    return timed(lambda: sum(len(found) for found in iter_matches(doc, compile_query(needle))))
+
+
+def case_find_dialog(path, needle):
+    """Find the way the dialog runs it: a SearchJob on a snapshot, polled until it is done."""
+    from editor.search import SearchJob, compile_query
+
+    fm, doc = load(path)
+    query = (needle, False, False, False)
+
+    def search():
+        job = SearchJob(doc.snapshot(), compile_query(*query), query)
+        while not job.done:
+            time.sleep(UI_POLL_S)
+        if job.timed_out:
+            raise RuntimeError(f"search timed out after {job.timeout} s")
+
+    return timed(search)
+
+
+def case_find_regex(path, needle):
+    from editor.search import compile_query, iter_matches
+
+    fm, doc = load(path)
+    pattern = compile_query(needle, ignore_case=True, whole_word=True)
+    return timed(lambda: sum(len(found) for found in iter_matches(doc, pattern)))
+
+
+def case_replace_all(path, needle):
+    from editor.search import apply_spans, compile_query, replace_spans
+
+    fm, doc = load(path)
+    return timed(lambda: apply_spans(doc, replace_spans(doc, compile_query(needle), "REPLACED")))
+
+
+def case_find_in_files(path, needle):
+    """Find in Files over the fixture cut into a directory tree, as the dialog starts it."""
+    from benchmarks.fixtures import END_MARKER
+    from editor.find_in_files import FindInFilesJob
+
+    tree = fixture_tree(path)
+
+    def search():
+        # only one file holds the marker, so every file is read to the end
+        job = FindInFilesJob((END_MARKER, False, False, False), directory=tree)
+        while not job.done:
+            time.sleep(UI_POLL_S)
+        if job.error:
+            raise job.error
+        if job.files_matched != 1:
+            raise RuntimeError(f"expected one matching file, got {job.files_matched}")
+
+    return timed(search)
+
+
+# ===================== PDF =====================
+def case_pdf(path, needle):
+    try:
+        from editor.pdf_export import PdfExportJob
+    except ImportError:
+        raise Skipped("needs reportlab")
+    fm, doc = load(path)
+
+    def export():
+        job = PdfExportJob(doc.snapshot(), os.path.abspath("export.pdf"))
+        while not job.done:
+            time.sleep(UI_POLL_S)
+        if job.error:
+            raise job.error
+
+    return timed(export)
+
+
+# ===================== TEXT EDITOR UI =====================
+def editor_ui():
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise Skipped(f"no display ({e})")
+    root.withdraw()
+    from editor.ui import TextEditorUI
+
+    ui = TextEditorUI(root)
+    root.update()  # font enumeration and other first-paint work stay out of the measurement
+    return root, ui
+
+
+def open_in_ui(root, ui, path):
+    ui.open_specific_file(path)
+    while ui.open_jobs:
+        root.update()
+        time.sleep(UI_POLL_S)
+    root.update()
+
+
+def case_ui_open(path, needle):
+    root, ui = editor_ui()
+    seconds = timed(lambda: open_in_ui(root, ui, path))
+    root.destroy()
+    return seconds
+
+
+def case_ui_typing(path, needle):
+    """Keystrokes near the top of the document, each followed by a full redraw (gutter, status)."""
+    root, ui = editor_ui()
+    open_in_ui(root, ui, path)
+    text = ui.current_frame()._text
+    text.mark_set("insert", "2.0")
+
+    def type_keys():
+        for i in range(KEYSTROKES):
+            text.insert("insert", "\n" if i % 10 == 0 else "x")
+            root.update()
+
+    seconds = timed(type_keys)
+    root.destroy()
+    return seconds
+
+
+# name -> (function, largest fixture it runs on in bytes or None)
+CASES = {
+    "open": (case_open, None),
+    "hash": (case_hash, None),
+    "save": (case_save, None),
+    "autosave": (case_autosave, None),
+    "words": (case_words, None),
+    "find": (case_find, None),
+    "find_dialog": (case_find_dialog, None),
+    "find_regex": (case_find_regex, None),
+    "replace_all": (case_replace_all, None),
+    "find_in_files": (case_find_in_files, None),
+    "pdf": (case_pdf, 1024 ** 2),  # layout + drawing is ~seconds per MB
+    "ui_open": (case_ui_open, None),
+    "ui_typing": (case_ui_typing, None),
+}
+
+
+def main():
+    name, kind, size = sys.argv[1:4]
+    path = fixture_path(kind, size)
+    try:
+        seconds = CASES[name][0](path, KINDS[kind][1])
+        result = {"seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+    except Skipped as e:
+        result = {"skipped": str(e)}
+    print(json.dumps(result))
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Generated documents for the benchmark suite.
+
+    python -m benchmarks.fixtures [--max-size 50MB]
+
+Fixtures are written once to benchmarks/fixtures/ and reused; delete the
+directory to regenerate them. Every fixture ends with END_MARKER, so a
+search for it has to read the whole file. fixture_tree() cuts a fixture
+into a directory tree of TREE_FILES files for the Find in Files case.
+"""
+import os
+import sys
+import shutil
+from itertools import cycle
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SIZES = {
+    "1KB": 1024,
+    "1MB": 1024 ** 2,
+    "50MB": 50 * 1024 ** 2,
+    "500MB": 500 * 1024 ** 2,
+}
+LONG_LINE_CHARS = 50_000  # width of a line in the "long" fixtures (minified JSON / logs)
+BLOCK_BYTES = 1024 * 1024  # written per call once the fixture is bigger than this
+END_MARKER = "END OF FIXTURE"
+TREE_FILES = 200  # files a fixture is cut into for the Find in Files case
+TREE_DIRS = 10  # spread over this many subdirectories
+
+ASCII_LINES = [
+    "The quick brown fox jumps over the lazy dog while the editor keeps typing along.",
+    "    def layout(self, lines):  # indented code keeps its indentation on the first line",
+    "",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.",
+    "{\"id\": 42, \"name\": \"benchmark\", \"tags\": [\"open\", \"save\", \"find\"]}",
+]
+BANGLA_LINES = [
+    "আমার সোনার বাংলা, আমি তোমায় ভালোবাসি। চিরদিন তোমার আকাশ, তোমার বাতাস, আমার প্রাণে বাজায় বাঁশি।",
+    "মিশ্র লেখা: Bangla and English words mixed together in one fairly long paragraph line.",
+    "",
+    "ও মা, ফাগুনে তোর আমের বনে ঘ্রাণে পাগল করে, মরি হায়, হায় রে।",
+    "সংখ্যা: ১২৩৪৫৬৭৮৯০ এবং বিরামচিহ্ন, যেমন — এবং ।",
+]
+
+# kind -> (lines the fixture repeats, needle the find / replace cases look for)
+KINDS = {
+    "ascii": (ASCII_LINES, "fox"),
+    "bangla": (BANGLA_LINES, "সোনার"),
+    "long": (ASCII_LINES, "fox"),
+}
+
+
+def fixture_lines(kind: str, size: int):
+    lines = KINDS[kind][0]
+    if kind == "long":
+        width = min(LONG_LINE_CHARS, size)  # the 1 KB fixture is a single 1 KB line
+        row = " ".join(line for line in lines if line)
+        return [(row * (width // len(row) + 1))[:width]]
+    return lines
+
+
+def fixture_name(kind: str, size: str) -> str:
+    return f"{kind}-{size}"
+
+
+def fixture_path(kind: str, size: str) -> str:
+    """Path of a fixture, generating it first if it is not there yet."""
+    path = os.path.join(FIXTURE_DIR, fixture_name(kind, size) + ".txt")
+    if not os.path.exists(path):
+        generate(path, fixture_lines(kind, SIZES[size]), SIZES[size])
+    return path
+
+
+def generate(path: str, lines, size: int):
+    """Repeat lines until the file holds at least size bytes (UTF-8), then add END_MARKER."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    encoded = [(line + "\n").encode("utf-8") for line in lines]
+    block = b""
+    for data in cycle(encoded):
+        if len(block) >= BLOCK_BYTES:
+            break
+        block += data
+    tmp = path + ".tmp"
+    written = 0
+    with open(tmp, "wb") as f:
+        while size - written >= len(block):
+            f.write(block)
+            written += len(block)
+        for data in cycle(encoded):
+            if written >= size:
+                break
+            f.write(data)
+            written += len(data)
+        f.write(END_MARKER.encode("utf-8"))
+    os.replace(tmp, path)
+
+
+def fixture_tree(path: str) -> str:
+    """
+    Directory holding the fixture at path cut into TREE_FILES files at line
+    boundaries (generated first if it is not there yet). END_MARKER ends up
+    in exactly one of them.
+    """
+    tree = os.path.splitext(path)[0] + "-tree"
+    if os.path.isdir(tree):
+        return tree
+    tmp = tree + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    part_bytes = max(os.path.getsize(path) // TREE_FILES, 1)
+    with open(path, "rb") as src:
+        for i in range(TREE_FILES):
+            part = os.path.join(tmp, f"d{i % TREE_DIRS}", f"part{i:04}.txt")
+            os.makedirs(os.path.dirname(part), exist_ok=True)
+            with open(part, "wb") as f:
+                if i == TREE_FILES - 1:
+                    shutil.copyfileobj(src, f, BLOCK_BYTES)
+                    continue
+                written = 0
+                while written < part_bytes:
+                    line = src.readline()
+                    if not line:
+                        break
+                    f.write(line)
+                    written += len(line)
+    os.replace(tmp, tree)
+    return tree
+
+
+def size_limit(label: str) -> int:
+    if label not in SIZES:
+        raise SystemExit(f"unknown size {label!r}; one of {', '.join(SIZES)}")
+    return SIZES[label]
+
+
+def main():
+    limit = SIZES["50MB"]
+    if "--max-size" in sys.argv:
+        limit = size_limit(sys.argv[sys.argv.index("--max-size") + 1])
+    for size, nbytes in SIZES.items():
+        if nbytes > limit:
+            continue
+        for kind in KINDS:
+            path = fixture_path(kind, size)
+            print(f"{os.path.getsize(path):>12}  {path}")
+
+
+if __name__ == "__main__":
+    main()
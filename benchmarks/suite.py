@@ -0,0 +1,213 @@
+"""
+Benchmark suite for the editor's hot paths, with a regression check.
+
+    python -m benchmarks.suite [--max-size 50MB] [--cases open,save] [--kinds ascii,bangla]
+                               [--out results.json] [--baseline benchmarks/baseline.json]
+                               [--save-baseline [--allow-skipped]] [--time-threshold 1.5]
+                               [--rss-threshold 1.25]
+
+Runs every case in benchmarks.cases on every fixture in benchmarks.fixtures
+(ASCII, Bangla and long-line documents from 1 KB up to --max-size; the
+500 MB fixtures take several GB of disk and a long time, so they are only
+included with --max-size 500MB). Each run gets a fresh interpreter and a
+scratch working directory. Timing and peak RSS go to a JSON file
+(benchmarks/results/<time>.json by default).
+
+With a baseline the results are compared against it: a case regresses
+when it is slower than the baseline by more than --time-threshold (a
+ratio) and by more than MIN_DELTA_S, or uses more memory by more than
+--rss-threshold and MIN_DELTA_MB. A case that is skipped although the
+baseline holds a measurement for it fails too, so a CI machine that lost
+its display or reportlab cannot pass by measuring less. The exit status
+is 1 if anything regressed, failed or went missing.
+
+--save-baseline writes the results as the new baseline instead of
+comparing; record it on the machine that runs the check, with everything
+installed:
+
+    xvfb-run -a python -m benchmarks.suite --save-baseline
+
+It refuses to write a baseline with skipped cases unless --allow-skipped
+is given.
+
+The ui_* cases need a display (Xvfb works) and are skipped without one;
+pdf needs reportlab.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from benchmarks.cases import CASES
+from benchmarks.fixtures import KINDS, SIZES, fixture_name, fixture_path, fixture_tree, size_limit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+REPEATS = 3  # runs per case on fixtures below REPEAT_BYTES; the fastest counts
+REPEAT_BYTES = 50 * 1024 ** 2
+CASE_TIMEOUT_S = 3600
+TIME_THRESHOLD = 1.5
+RSS_THRESHOLD = 1.25
+MIN_DELTA_S = 0.05  # smaller slowdowns are noise, whatever the ratio
+MIN_DELTA_MB = 16
+
+
+def run_case(name: str, kind: str, size: str) -> dict:
+    """Result of one run in a fresh interpreter inside a scratch directory."""
+    workdir = tempfile.mkdtemp(prefix="editor-bench-")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    try:
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.cases", name, kind, size],
+                              cwd=workdir, env=env, capture_output=True, text=True, timeout=CASE_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {CASE_TIMEOUT_S} s"}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit status {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def best_of(name: str, kind: str, size: str) -> dict:
+    repeats = REPEATS if SIZES[size] < REPEAT_BYTES else 1
+    runs = [run_case(name, kind, size) for _ in range(repeats)]
+    timed = [r for r in runs if "seconds" in r]
+    if not timed:
+        return runs[0]
+    rss = [r["peak_rss_mb"] for r in timed if r["peak_rss_mb"] is not None]
+    return {"seconds": min(r["seconds"] for r in timed), "peak_rss_mb": min(rss) if rss else None}
+
+
+def machine() -> dict:
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "cpus": os.cpu_count(), "machine": platform.machine()}
+
+
+# ===================== COMPARISON =====================
+def regressions(result: dict, base: dict, time_threshold: float, rss_threshold: float):
+    """Descriptions of the ways result is worse than base."""
+    found = []
+    seconds, base_s = result.get("seconds"), base.get("seconds")
+    if seconds is not None and base_s is not None:
+        if seconds > base_s * time_threshold and seconds - base_s > MIN_DELTA_S:
+            found.append(f"time {seconds / base_s:.2f}x")
+    rss, base_rss = result.get("peak_rss_mb"), base.get("peak_rss_mb")
+    if rss is not None and base_rss is not None:
+        if rss > base_rss * rss_threshold and rss - base_rss > MIN_DELTA_MB:
+            found.append(f"memory {rss / base_rss:.2f}x")
+    return found
+
+
+def report(results: dict, baseline: dict, time_threshold: float, rss_threshold: float) -> bool:
+    """Print the results next to the baseline; returns False if anything failed or regressed."""
+    ok = True
+    print(f"{'case':<14}  {'fixture':<14}  {'seconds':>9}  {'base':>9}  {'RSS MB':>8}  {'base':>8}  status")
+    for key, result in results.items():
+        name, fixture = key.split("/")
+        if "skipped" in result:
+            if "seconds" in baseline.get(key, {}):
+                ok = False
+                print(f"{name:<14}  {fixture:<14}  MISSING (the baseline has a measurement): {result['skipped']}")
+            else:
+                print(f"{name:<14}  {fixture:<14}  skipped: {result['skipped']}")
+            continue
+        if "error" in result:
+            ok = False
+            print(f"{name:<14}  {fixture:<14}  FAILED: {result['error']}")
+            continue
+        base = baseline.get(key, {})
+        worse = regressions(result, base, time_threshold, rss_threshold)
+        ok &= not worse
+        status = "REGRESSED: " + ", ".join(worse) if worse else ("ok" if base else "new")
+        print(f"{name:<14}  {fixture:<14}  {result['seconds']:>9.3f}  {fmt(base.get('seconds'), 3):>9}  "
+              f"{fmt(result['peak_rss_mb'], 1):>8}  {fmt(base.get('peak_rss_mb'), 1):>8}  {status}")
+    return ok
+
+
+def fmt(value, digits: int) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    p.add_argument("--max-size", default="50MB", help=f"largest fixture: {', '.join(SIZES)}")
+    p.add_argument("--cases", default=",".join(CASES))
+    p.add_argument("--kinds", default=",".join(KINDS))
+    p.add_argument("--out", help="results file (default: benchmarks/results/<time>.json)")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save-baseline", action="store_true", help="write the results as the baseline")
+    p.add_argument("--allow-skipped", action="store_true", help="save a baseline even with skipped cases")
+    p.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD)
+    p.add_argument("--rss-threshold", type=float, default=RSS_THRESHOLD)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    limit = size_limit(args.max_size)
+    names = [n for n in args.cases.split(",") if n]
+    kinds = [k for k in args.kinds.split(",") if k]
+    unknown = [n for n in names if n not in CASES] + [k for k in kinds if k not in KINDS]
+    if unknown:
+        sys.exit(f"unknown case or kind: {', '.join(unknown)}")
+
+    results = {}
+    for size, nbytes in SIZES.items():
+        if nbytes > limit:
+            continue
+        for kind in kinds:
+            path = fixture_path(kind, size)  # generated here, outside any measurement
+            if "find_in_files" in names:
+                fixture_tree(path)
+            for name in names:
+                max_bytes = CASES[name][1]
+                if max_bytes is not None and nbytes > max_bytes:
+                    continue
+                print(f"  {name} / {fixture_name(kind, size)}...", file=sys.stderr)
+                results[f"{name}/{fixture_name(kind, size)}"] = best_of(name, kind, size)
+
+    data = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine(), "results": results}
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    write_json(out, data)
+    skipped = sorted(key for key, result in results.items() if "skipped" in result)
+    refused = args.save_baseline and skipped and not args.allow_skipped
+    if refused:
+        print(f"baseline NOT written: {len(skipped)} cases were skipped ({', '.join(skipped[:5])}"
+              f"{', ...' if len(skipped) > 5 else ''}); install what they need or pass --allow-skipped")
+        args.save_baseline = False
+    elif args.save_baseline:
+        write_json(args.baseline, data)
+        print(f"baseline written to {args.baseline}")
+
+    baseline = {}
+    if not args.save_baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            baseline = stored["results"]
+            if stored.get("machine") != data["machine"]:
+                print("note: the baseline was recorded on a different machine or Python")
+        except FileNotFoundError:
+            print(f"no baseline at {args.baseline}; record one with --save-baseline")
+    ok = report(results, baseline, args.time_threshold, args.rss_threshold)
+    print(f"results written to {out}")
+    sys.exit(0 if ok and not refused else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import queue
+import threading
+
+WRITE_BATCH = 10000  # lines joined per write call
+
+
+def write_snapshot(path: str, snapshot):
+    """Write a document snapshot to a temp file and swap it in, so a crash never leaves half a file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        batch = []
+        sep = ""
+        for line in snapshot.lines():
+            batch.append(line)
+            if len(batch) == WRITE_BATCH:
+                f.write(sep + "\n".join(batch))
+                sep = "\n"
+                batch = []
+        if batch:
+            f.write(sep + "\n".join(batch))
+    os.replace(tmp, path)
+
+
+class AutosaveWriter:
+    """
+    Background thread that runs autosave jobs in the order they were submitted.
+
+    The Tk thread only captures edits and snapshots and puts them on a
+    queue; jobs never touch Tk. They only write under autosave/, never to
+    the files being edited, so they share no lock with the SaveService
+    writers and a foreground save never waits for an autosave.
+    """
+
+    def __init__(self, on_error=None):
+        """on_error(job, exc) runs on the worker thread."""
+        self.on_error = on_error
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, job, *args):
+        self._queue.put((job, args))
+
+    def close(self, timeout: float = 5.0):
+        """Finish the queued jobs (waiting at most `timeout` seconds) and stop the thread."""
+        self._queue.put((None, ()))
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job, args = self._queue.get()
+            if job is None:
+                return
+            try:
+                job(*args)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(job, e)
+            del job, args  # a snapshot must not outlive its job: it keeps a mapped file open
@@ -1,25 +1,28 @@
+import os
+import re
+from contextlib import contextmanager
 from tkinter import *
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 
+from editor.search import SearchJob, apply_spans, compile_query, first_match_after, visible_matches
 
-def word_count(text_widget: Text) -> int:
-    content = text_widget.get("1.0", "end-1c").strip()
-    return len(content.split()) if content else 0
-
-
-def get_cursor_line_col(text_widget: Text):
-    index = text_widget.index(INSERT)  # e.g. "3.5"
-    line, col = index.split(".")
-    return int(line), int(col)
+SEARCH_POLL_MS = 50
+RESULT_ROWS_PER_POLL = 2000  # Find in Files rows added to the list per poll
 
 
 def open_find_replace_dialog(root, text_widget: Text):
     """
     Find/Replace dialog (Unicode + uses editor font so Bangla typing works here too).
+
+    Searching runs on a snapshot of the whole document in the background
+    (see editor.search); only the matches inside the viewport are tagged.
     """
+    view = text_widget._view
+    doc = view.doc
+
     win = Toplevel(root)
     win.title("Find & Replace")
-    win.geometry("430x230")
+    win.geometry("430x290")
     win.resizable(False, False)
     win.transient(root)
     win.grab_set()
@@ -43,59 +46,407 @@ def open_find_replace_dialog(root, text_widget: Text):
     rep_entry = Entry(frm, textvariable=rep_var, width=30, font=editor_font)
     rep_entry.grid(row=1, column=1, pady=6, sticky="w")
 
-    def do_find():
+    modes = Frame(frm)
+    modes.grid(row=2, column=0, columnspan=2, sticky="w")
+    regex_var = BooleanVar()
+    case_var = BooleanVar()
+    word_var = BooleanVar()
+    Checkbutton(modes, text="Regex", variable=regex_var).pack(side=LEFT)
+    Checkbutton(modes, text="Ignore case", variable=case_var).pack(side=LEFT)
+    Checkbutton(modes, text="Whole word", variable=word_var).pack(side=LEFT)
+
+    counter = Label(frm, text="", fg="gray")
+    counter.grid(row=3, column=1, sticky="w")
+
+    text_widget.tag_config("match", background="yellow")
+    text_widget.tag_config("current_match", background="orange")
+    # "then": an action waiting for the search job (Replace clicked while it still runs)
+    state = {"job": None, "current": -1, "jump": False, "error": None, "then": None}
+
+    # ===================== SEARCH STATE =====================
+    def query():
+        return find_var.get(), regex_var.get(), case_var.get(), word_var.get()
+
+    def pattern_for(q):
+        """Compiled pattern for a query, or None (with the error shown) if there is none."""
+        if not q[0]:
+            return None
+        try:
+            return compile_query(*q)
+        except re.error as e:
+            state["error"] = f"Invalid pattern: {e}"
+            return None
+
+    def start_search(replace: str = None):
+        if state["job"]:
+            state["job"].cancel()
+        state["job"] = None
+        state["current"] = -1
+        state["error"] = None
+        q = query()
+        pattern = pattern_for(q)
+        if pattern is not None:
+            state["job"] = SearchJob(doc.snapshot(), pattern, q, replace=replace)
+            poll(state["job"])
+        highlight_visible()
+        update_counter()
+        return state["job"]
+
+    def current_job(replace: str = None):
+        """The search for the current query and text (and replacement, if given), restarted if any changed."""
+        job = state["job"]
+        if job is None or job.query != query() or job.version != doc.version or \
+                (replace is not None and job.replace != replace):
+            job = start_search(replace)
+        return job
+
+    def poll(job):
+        if job is not state["job"] or not win.winfo_exists():
+            return
+        highlight_visible()
+        if state["jump"] and job.matches:
+            state["jump"] = False
+            goto(1)
+        update_counter()
+        then, state["then"] = state["then"], None
+        if then:
+            then()
+        if not job.done:
+            win.after(SEARCH_POLL_MS, poll, job)
+        elif state["jump"]:
+            state["jump"] = False
+            messagebox.showinfo("Find", "No match found.", parent=win)
+
+    def update_counter():
+        job = state["job"]
+        if job is None:
+            counter.config(text=state["error"] or "", fg="red")
+            return
+        if job.error:
+            counter.config(text=f"Invalid replacement: {job.error}", fg="red")
+            return
+        counter.config(fg="gray")
+        total = f"{len(job.matches)}{'' if job.done else '+'}"
+        if job.timed_out:
+            total += " (search stopped: too slow)"
+        if state["current"] >= 0:
+            counter.config(text=f"{state['current'] + 1} of {total}")
+        else:
+            counter.config(text=f"{total} matches")
+
+    def highlight_visible():
         text_widget.tag_remove("match", "1.0", END)
-        needle = find_var.get()
-        if not needle:
+        text_widget.tag_remove("current_match", "1.0", END)
+        job = state["job"]
+        if job is None or job.version != doc.version:
+            return
+        for line, col, length in visible_matches(job.matches, view.top_line(), view.bottom_line()):
+            idx = view.widget_index(line, col)
+            if idx:
+                text_widget.tag_add("match", idx, f"{idx}+{length}c")
+        if state["current"] >= 0:
+            line, col, length = job.matches[state["current"]]
+            idx = view.widget_index(line, col)
+            if idx:
+                text_widget.tag_add("current_match", idx, f"{idx}+{length}c")
+
+    def goto(step: int):
+        job = current_job()
+        if job is None:
             return
+        if not job.matches:
+            if job.done:
+                messagebox.showinfo("Find", "No match found.", parent=win)
+            else:
+                state["jump"] = True  # move as soon as the first match shows up
+            return
+        if state["current"] < 0:
+            i = first_match_after(job.matches, *view.cursor())
+            if i < 0 and step > 0 and not job.done:
+                state["jump"] = True  # the next match is further down than the scan got so far
+                return
+            if step < 0:
+                i = (i if i >= 0 else len(job.matches)) - 1
+            state["current"] = max(i, 0)
+        else:
+            state["current"] = (state["current"] + step) % len(job.matches)
+        line, col, length = job.matches[state["current"]]
+        view.see(line, col)
+        highlight_visible()
+        update_counter()
+
+    # ===================== ACTIONS =====================
+    def do_find():
+        state["jump"] = bool(find_var.get())
+        start_search()
 
-        start = "1.0"
-        found_any = False
-        while True:
-            pos = text_widget.search(needle, start, stopindex=END)
-            if not pos:
-                break
-            endpos = f"{pos}+{len(needle)}c"
-            text_widget.tag_add("match", pos, endpos)
-            start = endpos
-            found_any = True
+    def replace_job():
+        """
+        The search job with replacements for the current query, or None if
+        the action cannot run (yet). Matching and group expansion only ever
+        happen in the job, so a slow pattern cannot freeze the editor.
+        """
+        state["then"] = None
+        job = current_job(rep_var.get())
+        if job is None:
+            return None
+        if job.error:
+            messagebox.showerror("Replace", f"Invalid replacement: {job.error}", parent=win)
+            return None
+        return job
 
-        text_widget.tag_config("match", background="yellow")
-        if not found_any:
-            messagebox.showinfo("Find", "No match found.")
+    def refuse_timed_out():
+        messagebox.showerror("Replace", "The search stopped before reaching the end of the document "
+                                        "(too slow), so nothing was replaced.", parent=win)
 
     def do_replace_one():
-        needle = find_var.get()
-        repl = rep_var.get()
-        if not needle:
+        job = replace_job()
+        if job is None:
             return
-
-        pos = text_widget.search(needle, INSERT, stopindex=END)
-        if not pos:
-            messagebox.showinfo("Replace", "No next match found.")
+        i = first_match_after(job.matches, *view.cursor())
+        if i < 0:
+            if not job.done:
+                state["then"] = do_replace_one  # the scan has not got past the cursor yet
+            elif job.timed_out:
+                refuse_timed_out()
+            else:
+                messagebox.showinfo("Replace", "No next match found.", parent=win)
             return
-        endpos = f"{pos}+{len(needle)}c"
-        text_widget.delete(pos, endpos)
-        text_widget.insert(pos, repl)
+        line, col, length = job.matches[i]
+        repl = job.replacements[i]
+        view.see(line, col)
+        pos = view.widget_index(line, col)
+
+        with undo_group():
+            text_widget.delete(pos, f"{pos}+{length}c")
+            text_widget.insert(pos, repl)
+        text_widget.mark_set(INSERT, f"{pos}+{len(repl)}c")
+        start_search(job.replace)
 
     def do_replace_all():
-        needle = find_var.get()
-        repl = rep_var.get()
-        if not needle:
+        job = replace_job()
+        if job is None:
             return
-        content = text_widget.get("1.0", END)
-        text_widget.delete("1.0", END)
-        text_widget.insert("1.0", content.replace(needle, repl))
+        if not job.done:
+            state["then"] = do_replace_all
+            return
+        if job.timed_out:
+            refuse_timed_out()
+            return
+        if not job.matches:
+            messagebox.showinfo("Replace", "No match found.", parent=win)
+            return
+        spans = [(*m, repl) for m, repl in zip(job.matches, job.replacements)]
+
+        if view.windowed():
+            # Most spans are outside the widget: edit the document, then refill the window.
+            # The refill resets Tk's undo stack; Ctrl+Z undoes from the document's history.
+            with view.history.group():
+                apply_spans(doc, spans)
+            view.reload()
+        else:
+            # Only the changed spans, last first so earlier indices stay valid
+            with undo_group():
+                for line, col, length, repl in reversed(spans):
+                    pos = view.widget_index(line, col)
+                    text_widget.replace(pos, f"{pos}+{length}c", repl)
+        start_search()
+
+    @contextmanager
+    def undo_group():
+        """Make the edits inside the block a single undo step."""
+        auto = text_widget.cget("autoseparators")
+        text_widget.edit_separator()
+        text_widget.configure(autoseparators=False)
+        try:
+            yield
+        finally:
+            text_widget.edit_separator()
+            text_widget.configure(autoseparators=auto)
+
+    def on_close(event):
+        if event.widget is win:
+            view.remove_view_listener(highlight_visible)
+            if state["job"]:
+                state["job"].cancel()
+
+    view.add_view_listener(highlight_visible)
+    win.bind("<Destroy>", on_close)
+    find_entry.bind("<Return>", lambda e: goto(1))
+    find_entry.bind("<Shift-Return>", lambda e: goto(-1))
 
     btns = Frame(frm)
-    btns.grid(row=2, column=0, columnspan=2, pady=14, sticky="w")
+    btns.grid(row=4, column=0, columnspan=2, pady=14, sticky="w")
 
-    Button(btns, text="Find", width=10, command=do_find).pack(side=LEFT, padx=4)
-    Button(btns, text="Replace Next", width=12, command=do_replace_one).pack(side=LEFT, padx=4)
-    Button(btns, text="Replace All", width=10, command=do_replace_all).pack(side=LEFT, padx=4)
+    Button(btns, text="Find", width=6, command=do_find).pack(side=LEFT, padx=2)
+    Button(btns, text="◀", width=2, command=lambda: goto(-1)).pack(side=LEFT, padx=2)
+    Button(btns, text="▶", width=2, command=lambda: goto(1)).pack(side=LEFT, padx=2)
+    Button(btns, text="Replace Next", width=12, command=do_replace_one).pack(side=LEFT, padx=2)
+    Button(btns, text="Replace All", width=10, command=do_replace_all).pack(side=LEFT, padx=2)
 
     Label(frm, text="Bangla typing: switch keyboard using Win + Space", fg="gray").grid(
-        row=3, column=0, columnspan=2, sticky="w"
+        row=5, column=0, columnspan=2, sticky="w"
     )
 
     find_entry.focus_set()
+
+
+def open_find_in_files_dialog(root, get_sources, on_open, directory: str = ""):
+    """
+    Find in Files: searches the open tabs plus a folder (see editor.find_in_files).
+
+    get_sources() -> (tabs, files, skip) as FindInFilesJob takes them;
+    on_open(target, line, col) shows a result.
+    """
+    win = Toplevel(root)
+    win.title("Find in Files")
+    win.geometry("720x460")
+    win.transient(root)
+
+    frm = Frame(win)
+    frm.pack(fill=BOTH, expand=True, padx=12, pady=12)
+    frm.columnconfigure(1, weight=1)
+    frm.rowconfigure(4, weight=1)
+
+    Label(frm, text="Find:").grid(row=0, column=0, sticky="w", pady=4)
+    find_var = StringVar()
+    find_entry = Entry(frm, textvariable=find_var)
+    find_entry.grid(row=0, column=1, columnspan=2, sticky="we", pady=4)
+
+    Label(frm, text="Folder:").grid(row=1, column=0, sticky="w", pady=4)
+    dir_var = StringVar(value=directory)
+    Entry(frm, textvariable=dir_var).grid(row=1, column=1, sticky="we", pady=4)
+
+    def browse():
+        path = filedialog.askdirectory(parent=win, initialdir=dir_var.get() or None)
+        if path:
+            dir_var.set(path)
+
+    Button(frm, text="Browse...", command=browse).grid(row=1, column=2, padx=4)
+
+    modes = Frame(frm)
+    modes.grid(row=2, column=0, columnspan=3, sticky="w")
+    regex_var = BooleanVar()
+    case_var = BooleanVar()
+    word_var = BooleanVar()
+    Checkbutton(modes, text="Regex", variable=regex_var).pack(side=LEFT)
+    Checkbutton(modes, text="Ignore case", variable=case_var).pack(side=LEFT)
+    Checkbutton(modes, text="Whole word", variable=word_var).pack(side=LEFT)
+
+    bar = Frame(frm)
+    bar.grid(row=3, column=0, columnspan=3, sticky="we", pady=6)
+    status = Label(bar, text="Searches the open tabs and, if set, the folder.", fg="gray")
+
+    box = Frame(frm)
+    box.grid(row=4, column=0, columnspan=3, sticky="nsew")
+    results = Listbox(box, activestyle="none")
+    scroll = Scrollbar(box, command=results.yview)
+    results.configure(yscrollcommand=scroll.set)
+    scroll.pack(side=RIGHT, fill=Y)
+    results.pack(side=LEFT, fill=BOTH, expand=True)
+
+    state = {"job": None, "shown": 0}
+
+    def start():
+        stop()
+        q = (find_var.get(), regex_var.get(), case_var.get(), word_var.get())
+        if not q[0]:
+            return
+        try:
+            compile_query(*q)
+        except re.error as e:
+            status.config(text=f"Invalid pattern: {e}", fg="red")
+            return
+        folder = dir_var.get().strip()
+        if folder and not os.path.isdir(folder):
+            status.config(text="Folder not found.", fg="red")
+            return
+
+        results.delete(0, END)
+        tabs, files, skip = get_sources()
+        from editor.find_in_files import FindInFilesJob  # process pool machinery, loaded on first use
+        state["job"] = FindInFilesJob(q, tabs, files, folder or None, skip)
+        state["shown"] = 0
+        poll(state["job"])
+
+    def stop():
+        if state["job"]:
+            state["job"].cancel()
+
+    def poll(job):
+        if job is not state["job"] or not win.winfo_exists():
+            return
+        # rows are only ever appended, so new ones are simply the tail
+        new = job.results[state["shown"]:state["shown"] + RESULT_ROWS_PER_POLL]
+        if new:
+            results.insert(END, *(f"{label}: {preview}" if line is None else f"{label}:{line + 1}: {preview.strip()}"
+                                  for _, label, line, _, _, preview in new))
+            state["shown"] += len(new)
+
+        summary = f"{job.matches} matches in {job.files_matched} files ({job.files_scanned} files read)"
+        if job.files_skipped:
+            summary += f", {job.files_skipped} too large to search"
+        if job.error:
+            status.config(text=f"Search failed: {job.error}", fg="red")
+        elif not job.done or state["shown"] < len(job.results):
+            status.config(text="Searching... " + summary, fg="gray")
+            win.after(SEARCH_POLL_MS * 2, poll, job)
+        elif job.truncated:
+            status.config(text=summary + f" - stopped at {len(job.results)} results", fg="gray")
+        elif job.cancelled:
+            status.config(text=summary + " - stopped", fg="gray")
+        else:
+            status.config(text=summary, fg="gray")
+
+    def open_selected(event=None):
+        job = state["job"]
+        sel = results.curselection()
+        if job and sel:
+            target, _, line, col, _, _ = job.results[sel[0]]
+            on_open(target, line or 0, col)  # a skipped file opens at the top
+
+    def on_close(event):
+        if event.widget is win:
+            stop()
+
+    Button(bar, text="Search", width=10, command=start).pack(side=LEFT, padx=2)
+    Button(bar, text="Stop", width=8, command=stop).pack(side=LEFT, padx=2)
+    status.pack(side=LEFT, padx=8)
+
+    results.bind("<Double-Button-1>", open_selected)
+    results.bind("<Return>", open_selected)
+    find_entry.bind("<Return>", lambda e: start())
+    win.bind("<Destroy>", on_close)
+    find_entry.focus_set()
+
+
+def open_save_summary(root, rows, title: str = "Save All"):
+    """
+    Non-modal list of per-file results, rows = [(path, outcome, ok)];
+    failed rows are shown in red. Editing carries on while it is open.
+    """
+    win = Toplevel(root)
+    win.title(title)
+    win.geometry("640x320")
+    win.transient(root)
+
+    frm = Frame(win)
+    frm.pack(fill=BOTH, expand=True, padx=12, pady=12)
+    failed = sum(1 for _, _, ok in rows if not ok)
+    Label(frm, text=f"{len(rows) - failed} OK, {failed} failed", anchor="w").pack(fill=X)
+
+    box = Frame(frm)
+    box.pack(fill=BOTH, expand=True, pady=6)
+    results = Listbox(box, activestyle="none")
+    scroll = Scrollbar(box, command=results.yview)
+    results.configure(yscrollcommand=scroll.set)
+    scroll.pack(side=RIGHT, fill=Y)
+    results.pack(side=LEFT, fill=BOTH, expand=True)
+    for path, outcome, ok in sorted(rows, key=lambda r: (r[2], r[0])):
+        results.insert(END, f"{outcome}: {path}")
+        if not ok:
+            results.itemconfig(END, fg="red")
+
+    Button(frm, text="Close", command=win.destroy).pack(anchor="e")
+    win.bind("<Escape>", lambda e: win.destroy())
+    return win
@@ -0,0 +1,390 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+SPLICE_MIN_CHARS = 64 * 1024  # lines at least this long are edited as column pieces instead of copied
+MERGE_PART_CHARS = 1024  # neighbouring typed pieces up to this size are joined into one string
+
+
+class LongLine:
+    """
+    A long line kept as column pieces: (text, start, end) slices of the
+    strings it was built from. Typing into a 50 MB line makes a new
+    LongLine that shares those strings, so an edit costs the size of the
+    edit plus the number of pieces, not the length of the line.
+
+    Documents only hand these out from raw_lines(); everywhere else the
+    line is read back as a plain str.
+    """
+
+    __slots__ = ("parts", "length")
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.length = sum(end - start for _, start, end in parts)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return "".join(text[start:end] for text, start, end in self.parts)
+
+    def __getitem__(self, key):
+        """Slicing returns a str and only joins the pieces it covers."""
+        a, b, _ = key.indices(self.length)
+        return "".join(text[s:e] for text, s, e in _parts(self, a, b))
+
+    def split(self, *args):
+        return str(self).split(*args)
+
+
+def _parts(line, a: int, b: int):
+    """Pieces of a line (str or LongLine) covering columns [a, b)."""
+    if a >= b:
+        return []
+    if line.__class__ is not LongLine:
+        return [(line, a, b)]
+    out = []
+    pos = 0
+    for text, start, end in line.parts:
+        n = end - start
+        lo, hi = max(a - pos, 0), min(b - pos, n)
+        if lo < hi:
+            out.append((text, start + lo, start + hi))
+        pos += n
+        if pos >= b:
+            break
+    return out
+
+
+def _build(parts):
+    """A line from pieces: a LongLine if it is long, else a plain str."""
+    merged = []
+    for piece in parts:
+        if merged:
+            text, start, end = merged[-1]
+            if text is piece[0] and end == piece[1]:
+                merged[-1] = (text, start, piece[2])
+                continue
+            if end - start + piece[2] - piece[1] <= MERGE_PART_CHARS:
+                joined = text[start:end] + piece[0][piece[1]:piece[2]]
+                merged[-1] = (joined, 0, len(joined))
+                continue
+        merged.append(piece)
+    line = LongLine(tuple(merged))
+    return line if line.length >= SPLICE_MIN_CHARS else str(line)
+
+
+def _is_long(line) -> bool:
+    return line.__class__ is LongLine or len(line) >= SPLICE_MIN_CHARS
+
+
+class _AddedLines(list):
+    """The added-lines buffer: LongLine entries are read back as str."""
+
+    has_long = False
+
+    def __getitem__(self, key):
+        item = list.__getitem__(self, key)
+        if not self.has_long:
+            return item
+        if isinstance(key, slice):
+            return [str(x) if x.__class__ is LongLine else x for x in item]
+        return str(item) if item.__class__ is LongLine else item
+
+
+def _iter_lines(pieces, starts, line_count, first, last, raw=False):
+    if last is None or last > line_count:
+        last = line_count
+    if first >= last:
+        return
+    i = bisect_right(starts, first) - 1
+    while first < last:
+        buf, start, count = pieces[i]
+        off = first - starts[i]
+        take = min(count - off, last - first)
+        if raw and buf.__class__ is _AddedLines:
+            yield from list.__getitem__(buf, slice(start + off, start + off + take))
+        else:
+            yield from buf[start + off:start + off + take]
+        first += take
+        i += 1
+
+
+class DocumentSnapshot:
+    """
+    Frozen view of a document at one version.
+
+    Buffers are append-only, so a snapshot only copies the piece list and
+    can be read from a worker thread while the Tk thread keeps editing.
+    """
+
+    def __init__(self, pieces, starts, line_count, version):
+        self._pieces = pieces
+        self._starts = starts
+        self.line_count = line_count
+        self.version = version
+
+    def lines(self, first: int = 0, last: int = None):
+        return _iter_lines(self._pieces, self._starts, self.line_count, first, last)
+
+    def get_text(self) -> str:
+        return "\n".join(self.lines())
+
+
+class Document:
+    """
+    Line based piece table.
+
+    The original content is never copied: pieces point into either the
+    original line source or an append-only list of added lines, so an
+    edit only costs the size of the edit plus the number of pieces.
+    """
+
+    def __init__(self, source=None):
+        if source is None or len(source) == 0:
+            source = [""]
+        self._original = source
+        self._added = _AddedLines()
+        self._pieces = [(source, 0, len(source))]
+        self._starts = [0]
+        self._line_count = len(source)
+        self._listeners = []
+        self.version = 0
+
+    @classmethod
+    def from_text(cls, content: str):
+        return cls(content.split("\n"))
+
+    # ===================== READING =====================
+    @property
+    def line_count(self) -> int:
+        return self._line_count
+
+    def line(self, index: int) -> str:
+        i = bisect_right(self._starts, index) - 1
+        buf, start, _ = self._pieces[i]
+        return buf[start + index - self._starts[i]]
+
+    def lines(self, first: int = 0, last: int = None):
+        """Yield lines [first, last) without materialising the whole document."""
+        return _iter_lines(self._pieces, self._starts, self._line_count, first, last)
+
+    def raw_lines(self, first: int = 0, last: int = None):
+        """Like lines(), but long edited lines come back as LongLine (len() and slicing work)."""
+        return _iter_lines(self._pieces, self._starts, self._line_count, first, last, raw=True)
+
+    def line_length(self, index: int) -> int:
+        return len(self._raw(index))
+
+    def get_text(self) -> str:
+        return "\n".join(self.lines())
+
+    def snapshot(self) -> DocumentSnapshot:
+        snap = DocumentSnapshot(list(self._pieces), list(self._starts), self._line_count, self.version)
+        if hasattr(self._original, "retain"):
+            self._original.retain(snap)  # a mapped file stays mapped while the snapshot can read it
+        return snap
+
+    # ===================== EDITING =====================
+    def insert(self, line: int, col: int, text: str):
+        old = self._raw(line)
+        if not _is_long(old):
+            parts = (old[:col] + text + old[col:]).split("\n")
+            self.replace_lines(line, line + 1, parts)
+            return
+        col = min(col, len(old))
+        head, tail = _parts(old, 0, col), _parts(old, col, len(old))
+        parts = text.split("\n")
+        if len(parts) == 1:
+            new_lines = [_build(head + _parts(text, 0, len(text)) + tail)]
+        else:
+            first, last = parts[0], parts[-1]
+            new_lines = ([_build(head + _parts(first, 0, len(first)))] + parts[1:-1]
+                         + [_build(_parts(last, 0, len(last)) + tail)])
+        self._replace(line, line + 1, new_lines, [old], (line, col, 0, text))
+
+    def delete(self, line1: int, col1: int, line2: int, col2: int):
+        if (line1, col1) >= (line2, col2):
+            return
+        a, b = self._raw(line1), self._raw(line2)
+        if not (_is_long(a) or _is_long(b)):
+            merged = a[:col1] + b[col2:]
+            self.replace_lines(line1, line2 + 1, [merged])
+            return
+        old_lines = list(self.raw_lines(line1, line2 + 1))
+        col1, col2 = min(col1, len(a)), min(col2, len(b))
+        # characters removed, a newline counting as one
+        deleted = sum(map(len, old_lines)) + len(old_lines) - 1 - col1 - (len(b) - col2)
+        merged = _build(_parts(a, 0, col1) + _parts(b, col2, len(b)))
+        self._replace(line1, line2 + 1, [merged], old_lines, (line1, col1, deleted, ""))
+
+    def splice(self, line: int, col: int, deleted: int, text: str):
+        """Remove `deleted` characters at (line, col), a newline counting as one, then insert text there."""
+        end_line, end_col = line, col + deleted
+        while end_line + 1 < self._line_count and end_col > self.line_length(end_line):
+            end_col -= self.line_length(end_line) + 1
+            end_line += 1
+        if deleted:
+            self.delete(line, col, end_line, end_col)
+        if text:
+            self.insert(line, col, text)
+
+    def replace_lines(self, first: int, last: int, new_lines):
+        """Replace lines [first, last) with new_lines (at least one line must remain)."""
+        self._replace(first, last, list(new_lines))
+
+    def _replace(self, first: int, last: int, new_lines, old_lines=None, splice=None):
+        """
+        Listeners get (first, old_lines, new_lines, splice). old_lines /
+        new_lines may hold LongLine objects (len() works, str() joins); for
+        edits inside long lines splice is (line, col, deleted, inserted).
+        """
+        i = self._split(first)
+        j = self._split(last)
+        if old_lines is None:
+            old_lines = list(self.raw_lines(first, last))
+
+        pieces = []
+        if new_lines:
+            pieces.append(self._append(new_lines))
+        self._pieces[i:j] = pieces
+        self._line_count += len(new_lines) - (last - first)
+        if not self._pieces:
+            self._added.append("")
+            self._pieces = [(self._added, len(self._added) - 1, 1)]
+            self._line_count = 1
+        self._reindex(i)
+
+        self.version += 1
+        for cb in self._listeners:
+            cb(first, old_lines, new_lines, splice)
+
+    def replace_many(self, edits):
+        """
+        Apply several replace_lines edits in one pass over the piece list.
+
+        `edits` are (first, last, new_lines), sorted and non-overlapping, in
+        the current line numbers. Listeners are told about them last first,
+        the order in which applying them one by one keeps every line number
+        valid; they run once the whole batch is in place.
+        """
+        if not edits:
+            return
+        pieces = []
+        notes = []
+        pos = 0
+        total = self._line_count
+        for first, last, new_lines in edits:
+            new_lines = list(new_lines)
+            pieces.extend(self._slice(pos, first))
+            notes.append((first, list(self.raw_lines(first, last)), new_lines))
+            if new_lines:
+                pieces.append(self._append(new_lines))
+            total += len(new_lines) - (last - first)
+            pos = last
+        pieces.extend(self._slice(pos, self._line_count))
+        self._line_count = total
+
+        merged = []
+        for piece in pieces:
+            if merged and merged[-1][0] is piece[0] and merged[-1][1] + merged[-1][2] == piece[1]:
+                buf, start, count = merged[-1]
+                merged[-1] = (buf, start, count + piece[2])
+            else:
+                merged.append(piece)
+        if not merged:
+            self._added.append("")
+            merged = [(self._added, len(self._added) - 1, 1)]
+            self._line_count = 1
+        self._pieces = merged
+        self._starts = list(accumulate((p[2] for p in merged[:-1]), initial=0))
+
+        self.version += 1
+        for first, old_lines, new_lines in reversed(notes):
+            for cb in self._listeners:
+                cb(first, old_lines, new_lines, None)
+
+    def rebase(self, source):
+        """
+        Point the document at `source`, which must hold exactly the current
+        content (used after saving, so the old file is no longer referenced).
+        """
+        self._original = source
+        self._added = _AddedLines()
+        self._pieces = [(source, 0, len(source))]
+        self._starts = [0]
+        self._line_count = len(source)
+
+    @property
+    def original(self):
+        return self._original
+
+    # ===================== LISTENERS =====================
+    def subscribe(self, callback):
+        """callback(first, old_lines, new_lines, splice) runs after every edit (see _replace)."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # ===================== INTERNAL =====================
+    def _append(self, new_lines):
+        """Piece for new_lines, added to the end of the added buffer."""
+        start = len(self._added)
+        if not self._added.has_long and any(line.__class__ is LongLine for line in new_lines):
+            self._added.has_long = True
+        self._added.extend(new_lines)
+        return self._added, start, len(new_lines)
+
+    def _raw(self, index: int):
+        """Line `index` as stored: a LongLine stays one."""
+        i = bisect_right(self._starts, index) - 1
+        buf, start, _ = self._pieces[i]
+        k = start + index - self._starts[i]
+        return list.__getitem__(buf, k) if buf.__class__ is _AddedLines else buf[k]
+
+    def _split(self, line: int) -> int:
+        """Make sure a piece starts at `line` and return its piece index."""
+        if line >= self._line_count:
+            return len(self._pieces)
+        i = bisect_right(self._starts, line) - 1
+        off = line - self._starts[i]
+        if off == 0:
+            return i
+        buf, start, count = self._pieces[i]
+        self._pieces[i:i + 1] = [(buf, start, off), (buf, start + off, count - off)]
+        self._starts.insert(i + 1, line)
+        return i + 1
+
+    def _slice(self, first: int, last: int):
+        """Pieces covering lines [first, last), trimmed at both ends."""
+        if first >= last:
+            return []
+        out = []
+        i = bisect_right(self._starts, first) - 1
+        while first < last:
+            buf, start, count = self._pieces[i]
+            off = first - self._starts[i]
+            take = min(count - off, last - first)
+            out.append((buf, start + off, take))
+            first += take
+            i += 1
+        return out
+
+    def _reindex(self, i: int):
+        # merge neighbours that are contiguous in the same buffer
+        lo = max(i - 1, 0)
+        k = lo
+        while k + 1 < len(self._pieces) and k <= i + 1:
+            a, b = self._pieces[k], self._pieces[k + 1]
+            if a[0] is b[0] and a[1] + a[2] == b[1]:
+                self._pieces[k:k + 2] = [(a[0], a[1], a[2] + b[2])]
+            else:
+                k += 1
+
+        del self._starts[lo:]
+        pos = 0 if lo == 0 else self._starts[-1] + self._pieces[lo - 1][2]
+        for buf, start, count in self._pieces[lo:]:
+            self._starts.append(pos)
+            pos += count
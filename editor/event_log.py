@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+
+LOG_FILE = os.path.join("logs", "editor.log")
+LOG_FORMATS = ("text", "jsonl")
+LOG_BUFFER = 10000  # events held in memory; if the flusher falls this far behind the oldest are dropped
+LOG_FLUSH_S = 1.0  # an event reaches the file at most this long after it was logged
+LOG_MAX_BYTES = 1024 * 1024  # the log is rotated once it would grow past this
+LOG_BACKUPS = 3  # editor.log.1 (newest) ... editor.log.3 (oldest)
+
+_log = None
+
+
+class EventLog:
+    """
+    Activity log written by a background thread.
+
+    log() only appends (time, event, details) to an in-memory ring buffer,
+    so the Tk thread never waits for the disk. The flusher wakes every
+    LOG_FLUSH_S, formats whatever piled up and appends it in one write,
+    rotating by size: editor.log -> editor.log.1 -> ... -> editor.log.N.
+
+    Lines are "[time] EVENT: details" or, with the "jsonl" format, one JSON
+    object per line.
+    """
+
+    def __init__(self, path: str = LOG_FILE, fmt: str = "text",
+                 max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS):
+        self.path = path
+        self.fmt = fmt if fmt in LOG_FORMATS else "text"
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._buffer = deque(maxlen=LOG_BUFFER)
+        self._lock = threading.Lock()  # one writer at a time: the flusher or flush()
+        self._wake = threading.Event()
+        self._size = None
+        self._written = 0  # lines of the current batch that reached a file
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, event: str, details: str = ""):
+        self._buffer.append((time.time(), event, details))
+
+    def flush(self):
+        """Write everything logged so far, on the calling thread."""
+        with self._lock:
+            self._write_pending()
+
+    def close(self, timeout: float = 5.0):
+        """Stop the flusher and write what is left."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    # ===================== FLUSHER =====================
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(LOG_FLUSH_S)
+            try:
+                self.flush()
+            except OSError:
+                pass  # kept in the buffer, tried again next time
+
+    def _write_pending(self):
+        buf = self._buffer
+        if not buf:
+            return
+        dropped = len(buf) == buf.maxlen
+        batch = []
+        while buf:
+            batch.append(buf.popleft())
+        if dropped:
+            batch.insert(0, (batch[0][0], "LOG_OVERFLOW", "older events were dropped"))
+        lines = [self._format(t, event, details) for t, event, details in batch]
+        self._written = 0
+        try:
+            self._append([line.encode("utf-8") for line in lines])
+        except OSError:
+            # lines written before a rotation are already in editor.log.1: only retry the rest
+            buf.extendleft(reversed(batch[self._written:]))
+            raise
+
+    def _format(self, t: float, event: str, details: str) -> str:
+        stamp = datetime.fromtimestamp(t)
+        if self.fmt == "jsonl":
+            return json.dumps({"time": stamp.isoformat(timespec="milliseconds"),
+                               "event": event, "details": details}, ensure_ascii=False) + "\n"
+        return f"[{stamp.strftime('%Y-%m-%d %H:%M:%S')}] {event}: {details}\n"
+
+    def _append(self, lines):
+        """One write per file: a batch that crosses max_bytes is split at a rotation."""
+        if self._size is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            try:
+                self._size = os.path.getsize(self.path)
+            except OSError:
+                self._size = 0
+        chunk = []
+        size = self._size
+        for line in lines:
+            if size and size + len(line) > self.max_bytes:
+                self._write(chunk)
+                self._rotate()
+                chunk = []
+                size = 0
+            chunk.append(line)
+            size += len(line)
+        self._write(chunk)
+
+    def _write(self, chunk):
+        if chunk:
+            data = b"".join(chunk)
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self._size += len(data)
+            self._written += len(chunk)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+        self._size = 0
+
+
+def event_log(fmt: str = "text") -> EventLog:
+    """The process-wide log, created on first use (fmt only counts then) and flushed at exit."""
+    global _log
+    if _log is None:
+        _log = EventLog(fmt=fmt)
+        atexit.register(_log.close)
+    return _log
@@ -1,9 +1,48 @@
 import os
 import json
+import shutil
+import hashlib
+from array import array
 from datetime import datetime
 
+from editor.document import Document
+from editor.event_log import event_log
+from editor.line_index import (
+    MappedLineSource, decode_text, extend_index, open_mapped
+)
+
 RECENT_FILE = os.path.join("data", "recent_files.json")
-LOG_FILE = os.path.join("logs", "editor.log")
+CONFIG_FILE = os.path.join("data", "config.json")
+MAP_THRESHOLD = 4 * 1024 * 1024  # files at least this big are memory-mapped
+SAVE_BATCH = 10000  # lines encoded per write when saving a document
+FSYNC_POLICIES = ("none", "file", "full")
+DEFAULT_FSYNC = "file"
+
+
+def content_digest():
+    """Hash used to tell whether saved content changed."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def _encoded(lines):
+    """The lines as UTF-8 with OS line endings, SAVE_BATCH lines per chunk."""
+    sep = os.linesep
+    prefix = ""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == SAVE_BATCH:
+            yield (prefix + sep.join(batch)).encode("utf-8")
+            prefix = sep
+            batch = []
+    if batch or not prefix:
+        yield (prefix + sep.join(batch)).encode("utf-8")
+
+
+def _sync(f, fsync: str):
+    if fsync != "none":
+        f.flush()
+        os.fsync(f.fileno())
 
 
 class FileManager:
@@ -15,30 +54,130 @@ class FileManager:
             with open(RECENT_FILE, "w", encoding="utf-8") as f:
                 json.dump([], f, indent=2)
 
-        if not os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "w", encoding="utf-8") as f:
-                f.write("")
+        # read once: saves and tab setup consult it often, edits take effect on restart
+        self.config = self.load_config()
+        # "log_format" in config.json: text (default) or jsonl
+        self.log = event_log(self.config.get("log_format", "text"))
 
     # ===================== FILE I/O (UTF-8 SAFE) =====================
     def open_file(self, path: str) -> str:
         """
         Reads file as UTF-8 to preserve Bangla.
-        If an old ANSI file is opened, fallback safely.
+        Old ANSI files (anything that is not valid UTF-8) are read as cp1252.
         """
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # fallback for old Windows ANSI files
-            with open(path, "r", encoding="cp1252", errors="replace") as f:
-                return f.read()
-
-    def save_file(self, path: str, content: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        return decode_text(data).replace("\r\n", "\n")
+
+    def open_document(self, path: str, progress=None, cancel=None) -> Document:
+        """
+        Small files are read into memory. Big files are memory-mapped and
+        only the lines on screen are ever decoded.
+        progress/cancel are passed to the line indexer (see build_line_index).
+        """
+        if os.path.getsize(path) < MAP_THRESHOLD:
+            return Document.from_text(self.open_file(path))
+        return Document(open_mapped(path, progress=progress, cancel=cancel))
+
+    def save_file(self, path: str, content: str, fsync: str = DEFAULT_FSYNC):
         """
         Always saves as UTF-8 so Bangla stays correct.
+        Written to a temp file and swapped in, so a crash never truncates the file.
         """
-        with open(path, "w", encoding="utf-8") as f:
+        tmp = self.temp_path(path)
+        with open(tmp, "w", encoding="utf-8") as f:
             f.write(content)
+            _sync(f, fsync)
+        self.replace_file(tmp, path, fsync)
+
+    def save_document(self, path: str, doc: Document, fsync: str = DEFAULT_FSYNC):
+        """
+        Streams the document to a temp file (UTF-8) and swaps it in.
+        A mapped document is then re-pointed at the saved file, so the old
+        mapping is dropped (Windows cannot replace a file that is mapped).
+        """
+        path = os.path.abspath(path)
+        tmp = self.temp_path(path)
+        starts = self.write_lines(tmp, doc.lines(), fsync)
+        self.swap_document(path, tmp, doc, starts, fsync)
+
+    def write_lines(self, tmp: str, lines, fsync: str = DEFAULT_FSYNC, digest=None) -> array:
+        """
+        Writes lines to tmp with OS line endings; returns the line index of
+        what was written. digest (see content_digest) is fed the same bytes.
+        """
+        starts = array("Q", [0])
+        pos = 0
+        with open(tmp, "wb") as f:
+            for data in _encoded(lines):
+                extend_index(starts, data, pos)
+                f.write(data)
+                if digest is not None:
+                    digest.update(data)
+                pos += len(data)
+            _sync(f, fsync)
+        return starts
+
+    def hash_lines(self, lines) -> str:
+        """Hash of the bytes write_lines would produce for these lines."""
+        digest = content_digest()
+        for data in _encoded(lines):
+            digest.update(data)
+        return digest.hexdigest()
+
+    def temp_path(self, path: str) -> str:
+        """Where a save of path is written first: next to the file a symlink points to."""
+        return os.path.realpath(path) + ".tmp"
+
+    def replace_file(self, tmp: str, path: str, fsync: str = DEFAULT_FSYNC):
+        """Swap tmp in for path; a symlink is followed and stays a link, and the file keeps its mode."""
+        target = os.path.realpath(path)
+        try:
+            shutil.copymode(target, tmp)
+        except FileNotFoundError:
+            pass  # a new file
+        os.replace(tmp, target)
+        if fsync == "full" and os.name != "nt":
+            # make the rename itself durable
+            fd = os.open(os.path.dirname(target), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def swap_document(self, path: str, tmp: str, doc: Document, starts: array, fsync: str = DEFAULT_FSYNC):
+        """
+        Replace path with tmp (which holds exactly doc's content) and rebase a mapped doc onto it.
+        Windows cannot replace a mapped file, so there the save fails while
+        a background task still reads the old mapping through a snapshot.
+        """
+        old = doc.original
+        mapped = isinstance(old, MappedLineSource)
+        try:
+            if mapped and old.path == path and not old.close() and os.name == "nt":
+                raise OSError(f"{os.path.basename(path)} is still being read by a background task "
+                              "(search, export); save again once it has finished.")
+            self.replace_file(tmp, path, fsync)
+        except OSError:
+            if mapped:
+                old.reopen()
+            raise
+        if mapped:
+            self.rebase_mapped(path, doc, starts)
+
+    def rebase_mapped(self, path: str, doc: Document, starts: array):
+        """
+        Point a mapped doc at the file it was just saved to (same content)
+        and drop the old mapping once no snapshot reads from it any more.
+        """
+        old = doc.original
+        doc.rebase(open_mapped(path, starts))
+        old.close()
+
+    def fsync_policy(self) -> str:
+        """From config.json: none, file (default: fsync the file before the rename) or full (the directory too)."""
+        policy = self.config.get("fsync", DEFAULT_FSYNC)
+        return policy if policy in FSYNC_POLICIES else DEFAULT_FSYNC
 
     def file_info(self, path: str) -> dict:
         st = os.stat(path)
@@ -57,18 +196,28 @@ class FileManager:
         except Exception:
             return []
 
-    def add_recent(self, path: str):
-        path = os.path.abspath(path)
-        items = self.load_recent_files()
-        if path in items:
-            items.remove(path)
-        items.insert(0, path)
-        items = items[:10]
-        with open(RECENT_FILE, "w", encoding="utf-8") as f:
+    def save_recent_files(self, items):
+        """Written to a temp file and swapped in; see RecentFiles for when."""
+        tmp = RECENT_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(items, f, indent=2)
+        os.replace(tmp, RECENT_FILE)
+
+    # ===================== CONFIG / SECURITY =====================
+    def load_config(self) -> dict:
+        try:
+            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def verify_pin(self, pin: str) -> bool:
+        """The PIN is stored as a SHA-256 hex digest under "pin_hash"."""
+        stored = self.load_config().get("pin_hash")
+        return bool(stored) and hashlib.sha256(pin.encode("utf-8")).hexdigest() == stored
 
     # ===================== LOGGING =====================
     def log_event(self, event: str, details: str):
-        line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {event}: {details}\n"
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(line)
+        """Queued for the log's flusher thread (see EventLog)."""
+        self.log.log(event, details)
@@ -0,0 +1,258 @@
+import os
+import mmap
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain
+
+from editor.document import Document
+from editor.line_index import SAMPLE_SIZE, detect_encoding
+from editor.search import compile_query, iter_matches
+
+BATCH_FILES = 64  # files per worker task, so 100k-file trees don't cost 100k round trips
+IN_FLIGHT_PER_WORKER = 4
+BINARY_SAMPLE = 8192  # a NUL byte in here marks a file as binary
+MAX_DECODE_BYTES = 64 * 1024 * 1024  # regex / ignore-case searches decode the file
+MAX_FILE_MATCHES = 1000
+MAX_RESULTS = 100000
+PREVIEW_CHARS = 200
+TOO_LARGE = "skipped (too large)"  # preview of the row that stands for a file that was not searched
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".tox", ".mypy_cache"}
+
+
+def iter_files(directory: str):
+    """Every regular file under directory (symlinked directories are not followed)."""
+    stack = [os.path.abspath(directory)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+
+# ===================== WORKER PROCESSES =====================
+class FileTooLarge(Exception):
+    """The search needs the file decoded, and it is over MAX_DECODE_BYTES."""
+
+
+def _encode(needle: str, encoding: str):
+    """The needle as bytes of the file's encoding, or None if it cannot occur there."""
+    try:
+        return needle.encode("utf-8" if encoding == "utf-8-sig" else encoding)
+    except UnicodeEncodeError:
+        return None
+
+
+def _scan_literal(mm, needle: str, encoding: str):
+    """Matches of a plain needle found straight in the mapped bytes; only hit lines are decoded."""
+    nb = _encode(needle, encoding)
+    if nb is None:
+        return []
+    out = []
+    line = 0
+    last = 0
+    pos = mm.find(nb)
+    while pos != -1 and len(out) < MAX_FILE_MATCHES:
+        line += mm[last:pos].count(b"\n")
+        start = mm.rfind(b"\n", 0, pos) + 1
+        end = mm.find(b"\n", pos)
+        if end == -1:
+            end = len(mm)
+        col = len(mm[start:pos].decode(encoding, "replace"))
+        preview = mm[start:end].decode(encoding, "replace").rstrip("\r")
+        out.append((line, col, len(needle), preview[:PREVIEW_CHARS]))
+        last = pos
+        pos = mm.find(nb, pos + len(nb))
+    return out
+
+
+def scan_file(path: str, query) -> list:
+    """
+    [(line, col, length, preview)] for one file; binary and unreadable files
+    have none. Raises FileTooLarge if the file would have to be decoded.
+    """
+    needle, regex, ignore_case, whole_word = query
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                head = mm[:SAMPLE_SIZE]
+                if b"\0" in head[:BINARY_SAMPLE]:
+                    return []
+                encoding = detect_encoding(head)
+                if not (regex or ignore_case or whole_word):
+                    return _scan_literal(mm, needle, encoding)
+
+                # literal prefilter: most files can be dropped without decoding them
+                if not (regex or ignore_case):
+                    nb = _encode(needle, encoding)
+                    if nb is None or mm.find(nb) == -1:
+                        return []
+                if size > MAX_DECODE_BYTES:
+                    raise FileTooLarge(path)
+                text = mm[:].decode(encoding, "replace")
+    except (OSError, ValueError):
+        return []
+
+    doc = Document(text.replace("\r\n", "\n").split("\n"))
+    out = []
+    for found in iter_matches(doc, compile_query(*query)):
+        for line, col, length in found:
+            out.append((line, col, length, doc.line(line)[:PREVIEW_CHARS]))
+            if len(out) >= MAX_FILE_MATCHES:
+                return out
+    return out
+
+
+def scan_batch(paths, query):
+    """(files scanned, [(path, matches)] for the files that matched, [paths too large to search])."""
+    hits = []
+    too_large = []
+    for path in paths:
+        try:
+            found = scan_file(path, query)
+        except FileTooLarge:
+            too_large.append(path)
+            continue
+        if found:
+            hits.append((path, found))
+    return len(paths), hits, too_large
+
+
+# ===================== COORDINATOR =====================
+def _preview(snapshot, line: int) -> str:
+    return next(snapshot.lines(line, line + 1), "")[:PREVIEW_CHARS]
+
+
+class FindInFilesJob:
+    """
+    Searches open tabs and a directory tree without blocking Tk.
+
+    Tabs are searched on a thread from document snapshots (so unsaved
+    edits count); files go to a process pool in batches. Result rows
+    (target, label, line, col, length, preview) are appended to `results`
+    as they arrive; `target` is whatever the caller passed for a tab, or a
+    file path. A file too large to search gets one row with line None and
+    TOO_LARGE as its preview, so it is not silently left out.
+    """
+
+    def __init__(self, query, tabs=(), files=(), directory=None, skip=(), workers=None):
+        """tabs: [(target, label, snapshot)]; files: extra paths; skip: paths never read from disk."""
+        self.query = query
+        self.results = []
+        self.files_scanned = 0
+        self.files_matched = 0
+        self.files_skipped = 0
+        self.truncated = False
+        self.error = None
+        self.done = False
+        self._cancel = threading.Event()
+        self._workers = workers or os.cpu_count() or 2
+        self._args = (list(tabs), list(files), directory, {os.path.abspath(p) for p in skip})
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _run(self):
+        try:
+            tabs, files, directory, skip = self._args
+            pattern = compile_query(*self.query)
+            for target, label, snapshot in tabs:
+                for found in iter_matches(snapshot, pattern):
+                    if self._cancel.is_set():
+                        return
+                    self._add(target, label, [(l, c, n, _preview(snapshot, l)) for l, c, n in found])
+            self._scan_files(files, directory, skip)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+    def _scan_files(self, files, directory, skip):
+        if not files and not directory:
+            return
+        paths = [os.path.abspath(p) for p in files]
+        if directory:
+            paths = chain(paths, iter_files(directory))
+        # spawned, not forked: this thread's process also runs Tk and other threads
+        pool = ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context("spawn"))
+        pending = set()
+        try:
+            batch = []
+            seen = set(skip)
+            for path in paths:
+                if self._cancel.is_set():
+                    return
+                if path in seen:
+                    continue
+                seen.add(path)
+                batch.append(path)
+                if len(batch) == BATCH_FILES:
+                    pending.add(pool.submit(scan_batch, batch, self.query))
+                    batch = []
+                    while len(pending) >= self._workers * IN_FLIGHT_PER_WORKER:
+                        pending = self._collect(pending, directory)
+            if batch:
+                pending.add(pool.submit(scan_batch, batch, self.query))
+            while pending and not self._cancel.is_set():
+                pending = self._collect(pending, directory)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _collect(self, pending, directory):
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            scanned, hits, too_large = fut.result()
+            self.files_scanned += scanned
+            for path, found in hits:
+                self._add(path, self._label(path, directory), found)
+            for path in too_large:
+                self._add_skipped(path, self._label(path, directory))
+        return pending
+
+    @staticmethod
+    def _label(path: str, directory):
+        if directory:
+            root = os.path.abspath(directory)
+            if path.startswith(root + os.sep):
+                return os.path.relpath(path, root)
+        return path
+
+    def _add(self, target, label, found):
+        if not found:
+            return
+        room = MAX_RESULTS - len(self.results)
+        if len(found) > room:
+            found = found[:room]
+            self.truncated = True
+            self._cancel.set()
+        self.files_matched += 1
+        self.results.extend((target, label, *m) for m in found)
+
+    def _add_skipped(self, target, label):
+        if len(self.results) >= MAX_RESULTS:
+            self.truncated = True
+            self._cancel.set()
+            return
+        self.files_skipped += 1
+        self.results.append((target, label, None, 0, 0, TOO_LARGE))
+
+    @property
+    def matches(self) -> int:
+        return len(self.results) - self.files_skipped
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import hashlib
+import tkinter.font as tkfont
+
+FONT_CACHE = os.path.join("data", "font_families.json")
+PREFERRED_FONTS = ["Consolas", "Cascadia Mono", "Courier New", "Segoe UI", "Arial", "Times New Roman"]
+FALLBACK_FAMILY = "Arial"
+
+
+def font_dirs():
+    """Directories whose contents change when fonts are installed or removed."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        return [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                os.path.join(os.environ.get("LOCALAPPDATA", home), "Microsoft", "Windows", "Fonts")]
+    if sys.platform == "darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts", os.path.join(home, ".fonts"),
+            os.path.join(home, ".local", "share", "fonts"),
+            # fontconfig rewrites its caches whenever fc-cache picks up a change
+            "/var/cache/fontconfig", os.path.join(home, ".cache", "fontconfig")]
+
+
+def font_fingerprint(tk_version: str = "") -> str:
+    parts = [sys.platform, tk_version]
+    for d in font_dirs():
+        try:
+            parts.append(f"{d}:{os.stat(d).st_mtime_ns}")
+        except OSError:
+            pass
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class FontService:
+    """
+    Font families and font objects for the editor.
+
+    Enumerating families is slow with many fonts installed, so the sorted
+    list is kept in data/font_families.json together with a fingerprint of
+    the font directories and is only enumerated again once that changes.
+    Tk can only be asked on its own thread, so a cache miss is enumerated
+    from an idle callback after the window is up (see load).
+
+    Text widgets get named tkfont.Font objects instead of (family, size)
+    tuples: `editor` is the font all tabs share, and font() hands out one
+    object per custom (family, size). Reconfiguring a named font updates
+    every widget using it at once.
+    """
+
+    def __init__(self, root, family: str = None, size: int = 12):
+        self.root = root
+        self._families = None
+        self._fonts = {}
+        self._fingerprint = font_fingerprint(str(root.tk.call("info", "patchlevel")))
+        self._load_cache()
+        self.editor = tkfont.Font(root, family=family or self.pick_default(), size=size)
+
+    # ===================== FAMILIES =====================
+    def families(self):
+        """Sorted family names, enumerating them now if the cache had none."""
+        if self._families is None:
+            self._families = sorted(set(tkfont.families(self.root)))
+            self._save_cache()
+        return self._families
+
+    def load(self, callback):
+        """callback(families) now if they are cached, else from an idle callback once enumerated."""
+        if self._families is not None:
+            callback(self._families)
+        else:
+            self.root.after_idle(lambda: callback(self.families()))
+
+    def pick_default(self) -> str:
+        if self._families is not None:
+            names = set(self._families)
+            for f in PREFERRED_FONTS:
+                if f in names:
+                    return f
+            return self._families[0] if self._families else FALLBACK_FAMILY
+        # not enumerated yet: ask Tk to resolve each candidate instead
+        for f in PREFERRED_FONTS:
+            if tkfont.Font(self.root, family=f).actual("family") == f:
+                return f
+        return FALLBACK_FAMILY
+
+    def _load_cache(self):
+        try:
+            with open(FONT_CACHE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("fingerprint") == self._fingerprint and isinstance(data.get("families"), list):
+                self._families = data["families"]
+        except Exception:
+            pass
+
+    def _save_cache(self):
+        tmp = FONT_CACHE + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self._fingerprint, "families": self._families}, f, ensure_ascii=False)
+            os.replace(tmp, FONT_CACHE)
+        except OSError:
+            pass
+
+    # ===================== FONT OBJECTS =====================
+    def font(self, family: str, size: int) -> tkfont.Font:
+        """The shared editor font if it matches, else one shared object per (family, size)."""
+        if self.editor_tuple() == (family, size):
+            return self.editor
+        key = (family, size)
+        f = self._fonts.get(key)
+        if f is None:
+            f = self._fonts[key] = tkfont.Font(self.root, family=family, size=size)
+        return f
+
+    def editor_tuple(self):
+        return (self.editor.cget("family"), int(self.editor.cget("size")))
+
+    def set_editor_font(self, family: str, size: int):
+        self.editor.configure(family=family, size=size)
@@ -0,0 +1,79 @@
+class LineGutter:
+    """
+    Line-number gutter for one Text widget.
+
+    Canvas items are pooled and only touched when their number or
+    position changed. Redraw requests made in the same idle cycle
+    collapse into a single redraw.
+    """
+
+    X = 40  # right edge of the numbers
+
+    def __init__(self, canvas, text):
+        self.canvas = canvas
+        self.text = text
+        self.fg = "#444"
+        self._items = []  # canvas item ids, reused between redraws
+        self._shown = []  # (line, y) each item currently shows, None if hidden
+        self._pending = None
+
+    def schedule(self):
+        if self._pending is None:
+            self._pending = self.canvas.after_idle(self.redraw)
+
+    def set_colors(self, bg: str, fg: str):
+        self.canvas.config(bg=bg)
+        if fg != self.fg:
+            self.fg = fg
+            self.canvas.itemconfigure("num", fill=fg)
+
+    def visible_rows(self):
+        """(document line number, y) for every line that starts on screen."""
+        text = self.text
+        top = text.index("@0,0")
+        first = int(top.split(".")[0])
+        last = int(text.index(f"@0,{text.winfo_height()}").split(".")[0])
+        offset = text._view.first
+
+        if str(text.cget("wrap")) == "none":
+            # every line is one display line: one dlineinfo gives the rest
+            d = text.dlineinfo(top)
+            if not d:
+                return []
+            return [(offset + first + k, d[1] + k * d[3]) for k in range(last - first + 1)]
+
+        rows = []
+        for line in range(first, last + 1):
+            d = text.dlineinfo(top if line == first else f"{line}.0")
+            if d:
+                rows.append((offset + line, d[1]))
+        return rows
+
+    def redraw(self):
+        self._pending = None
+        rows = self.visible_rows()
+        canvas = self.canvas
+
+        for k, (line, y) in enumerate(rows):
+            if k == len(self._items):
+                self._items.append(canvas.create_text(
+                    self.X, y, anchor="ne", text=str(line), fill=self.fg, tags="num"
+                ))
+                self._shown.append((line, y))
+                continue
+
+            item, shown = self._items[k], self._shown[k]
+            if shown is None:
+                canvas.itemconfigure(item, text=str(line), state="normal")
+                canvas.coords(item, self.X, y)
+            else:
+                if shown[0] != line:
+                    canvas.itemconfigure(item, text=str(line))
+                if shown[1] != y:
+                    canvas.coords(item, self.X, y)
+            self._shown[k] = (line, y)
+
+        for k in range(len(rows), len(self._items)):
+            if self._shown[k] is not None:
+                canvas.itemconfigure(self._items[k], state="hidden")
+                self._shown[k] = None
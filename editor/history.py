@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+from collections import deque
+
+UNDO_STEPS = 500  # undo steps kept per document
+UNDO_MERGE_S = 1.0  # edits of one line less than this apart undo together
+
+
+class EditHistory:
+    """
+    Undo / redo kept on the Document side.
+
+    A Text widget that only holds a window of a big document loses its own
+    undo stack on every refill, so for those the viewport undoes from here
+    instead. Every edit is recorded as (version, first, old lines, new line
+    count); undoing a step puts the old lines back. The edits of one
+    replace_many batch share a version and are put back with one
+    replace_many, so undoing a Replace All costs about as much as doing it.
+    """
+
+    def __init__(self, doc, steps: int = UNDO_STEPS):
+        self.doc = doc
+        self.undo_steps = deque(maxlen=steps)
+        self.redo_steps = deque(maxlen=steps)
+        self._replayed = None  # records made while a step is replayed
+        self._grouping = 0
+        self._last = 0.0
+        doc.subscribe(self._on_edit)
+
+    def _on_edit(self, first, old_lines, new_lines, splice=None):
+        record = (self.doc.version, first, old_lines, len(new_lines))
+        if self._replayed is not None:
+            self._replayed.append(record)
+            return
+        self.redo_steps.clear()
+        now = time.monotonic()
+        step = self.undo_steps[-1] if self.undo_steps else None
+        if self._grouping and step is not None:
+            step.append(record)
+        elif step and now - self._last < UNDO_MERGE_S and self._same_line(step[-1], record):
+            pass  # the step already holds this line as it was before the first of these edits
+        else:
+            self.undo_steps.append([record])
+        self._last = now
+
+    @staticmethod
+    def _same_line(a, b) -> bool:
+        return a[1] == b[1] and len(a[2]) == a[3] == len(b[2]) == b[3] == 1
+
+    @contextmanager
+    def group(self):
+        """Edits made inside the block undo as one step."""
+        self.undo_steps.append([])
+        self._grouping += 1
+        try:
+            yield
+        finally:
+            self._grouping -= 1
+            self._last = 0.0
+            if not self.undo_steps[-1]:
+                self.undo_steps.pop()
+
+    def undo(self):
+        """Undo the last step; returns the first line it touched, or None if there is nothing to undo."""
+        return self._replay(self.undo_steps, self.redo_steps)
+
+    def redo(self):
+        return self._replay(self.redo_steps, self.undo_steps)
+
+    def _replay(self, source, target):
+        if not source:
+            return None
+        step = source.pop()
+        self._replayed = []
+        try:
+            i = len(step)
+            while i > 0:
+                # a run of records from one batch was recorded bottom-up; put it back in one pass
+                j = i - 1
+                while j > 0 and step[j - 1][0] == step[i - 1][0]:
+                    j -= 1
+                edits = []
+                shift = 0
+                for _, first, old_lines, count in reversed(step[j:i]):
+                    edits.append((first + shift, first + shift + count, old_lines))
+                    shift += count - len(old_lines)
+                self.doc.replace_many(edits)
+                i = j
+        finally:
+            replayed, self._replayed = self._replayed, None
+        target.append(replayed)
+        self._last = 0.0
+        return min(record[1] for record in replayed)
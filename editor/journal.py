@@ -0,0 +1,177 @@
+import os
+import json
+import glob
+
+from editor.autosave import write_snapshot
+from editor.document import Document
+
+COMPACT_MIN_BYTES = 1024 * 1024  # never compact a journal smaller than this
+
+
+# ===================== WORKER SIDE =====================
+def _journal_path(base: str, gen: int) -> str:
+    return f"{base}.{gen}.journal"
+
+
+def _snapshot_path(base: str, gen: int) -> str:
+    return f"{base}.{gen}.snap"
+
+
+def _start_generation(base: str, gen: int, header: dict):
+    tmp = _journal_path(base, gen) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _journal_path(base, gen))
+
+
+def _drop_generation(base: str, gen: int):
+    for p in (_journal_path(base, gen), _snapshot_path(base, gen)):
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def _append_ops(base: str, gen: int, ops):
+    data = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops)
+    with open(_journal_path(base, gen), "a", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _compact(base: str, gen: int, snapshot):
+    # snapshot first, journal header second: a journal only exists once its base is complete
+    write_snapshot(_snapshot_path(base, gen), snapshot)
+    _start_generation(base, gen, {"base": "snapshot"})
+    _drop_generation(base, gen - 1)
+
+
+# ===================== TK SIDE =====================
+class EditJournal:
+    """
+    Append-only log of the edits made to one document.
+
+    Every edit is recorded as (first line, lines removed, new lines), or
+    for edits inside long lines as (line, col, chars deleted, inserted
+    text) so typing into a 50 MB line writes a few bytes per key. The
+    autosave tick hands the pending ops to the writer thread, which
+    appends and fsyncs them as one batch, so autosave I/O follows the
+    edit rate instead of the document size. Once the journal outgrows its
+    base, it is compacted into a snapshot and a new generation starts.
+    """
+
+    def __init__(self, writer, base: str, doc, header: dict, base_bytes: int = 0, gen: int = 0):
+        self.writer = writer
+        self.base = base
+        self.doc = doc
+        self.header = header
+        self.gen = gen
+        self.started = False
+        self.pending = []
+        self.bytes = 0
+        self.base_bytes = base_bytes
+        doc.subscribe(self._on_edit)
+
+    def _on_edit(self, first, old_lines, new_lines, splice=None):
+        if splice is not None:
+            self.pending.append(splice)
+            self.bytes += 16 + len(splice[3])
+            return
+        new_lines = list(map(str, new_lines))  # undo can put LongLine objects back
+        self.pending.append((first, len(old_lines), new_lines))
+        self.bytes += 16 + sum(map(len, new_lines))
+
+    def flush(self) -> bool:
+        """Queue the pending ops; returns True if anything was queued."""
+        if not self.pending:
+            return False
+        if not self.started:
+            self.writer.submit(_start_generation, self.base, self.gen, self.header)
+            self.started = True
+        ops, self.pending = self.pending, []
+        self.writer.submit(_append_ops, self.base, self.gen, ops)
+
+        if self.bytes > max(COMPACT_MIN_BYTES, self.base_bytes // 2):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Make a snapshot of the whole document the base of a new generation."""
+        self.gen += 1
+        self.writer.submit(_compact, self.base, self.gen, self.doc.snapshot())
+        self.started = True
+        self.pending = []
+        self.base_bytes += self.bytes
+        self.bytes = 0
+
+    def rebase(self, header: dict, base_bytes: int = 0):
+        """Start over from a new base, e.g. the file that was just saved."""
+        self.pending = []
+        self.bytes = 0
+        self.base_bytes = base_bytes
+        self.header = header
+        if self.started:
+            self.gen += 1
+            self.writer.submit(_drop_generation, self.base, self.gen - 1)
+            self.started = False
+
+
+def file_header(path: str) -> dict:
+    st = os.stat(path)
+    return {"base": "file", "path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# ===================== RECOVERY =====================
+def recover(base: str, open_document, gen: int = None):
+    """
+    Rebuild a document from the newest journal generation of `base`:
+    its base (empty, snapshot or the untouched original file) plus the
+    recorded edits. Returns None if there is nothing usable.
+
+    With a `gen` hint (from the recovery index) no directory listing is
+    needed; gen + 1 is also tried in case a compaction finished after the
+    index was written.
+    """
+    if gen is None:
+        gens = []
+        for p in glob.glob(glob.escape(base) + ".*.journal"):
+            try:
+                gens.append(int(p[len(base) + 1:-len(".journal")]))
+            except ValueError:
+                pass
+    else:
+        gens = [g for g in (gen, gen + 1) if os.path.exists(_journal_path(base, g))]
+    if not gens:
+        return None
+    gen = max(gens)
+
+    with open(_journal_path(base, gen), "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("base") == "snapshot":
+            with open(_snapshot_path(base, gen), "r", encoding="utf-8", newline="\n") as s:
+                doc = Document.from_text(s.read())
+        elif header.get("base") == "file":
+            try:
+                st = os.stat(header["path"])
+            except OSError:
+                return None
+            if st.st_size != header["size"] or st.st_mtime_ns != header["mtime_ns"]:
+                return None  # the file changed since, the edits no longer apply
+            doc = open_document(header["path"])
+        else:
+            doc = Document()
+
+        for raw in f:
+            try:
+                op = json.loads(raw)
+            except ValueError:
+                break  # torn last write
+            if len(op) == 4:
+                doc.splice(*op)
+            else:
+                first, removed, new_lines = op
+                doc.replace_lines(first, first + removed, new_lines)
+    return doc
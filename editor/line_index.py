@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import mmap
+import codecs
+import hashlib
+import weakref
+import threading
+from array import array
+from itertools import accumulate, islice
+
+INDEX_DIR = os.path.join("data", "index")
+SAMPLE_SIZE = 64 * 1024
+CHUNK_SIZE = 4 * 1024 * 1024  # small enough that one chunk never holds the GIL for long
+
+
+class OpenCancelled(Exception):
+    pass
+
+
+# ===================== ENCODING =====================
+def detect_encoding(sample: bytes) -> str:
+    """
+    Guess the encoding from the first bytes of a file.
+    A multi-byte character cut at the end of the sample is not an error.
+    Only for files too big to check whole; see decode_text.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        # old Windows ANSI files
+        return "cp1252"
+
+
+def decode_text(data: bytes) -> str:
+    """
+    A whole file's text: strict UTF-8 (a BOM is dropped) or, if any byte
+    is not valid UTF-8, cp1252. Checking everything, not just a sample,
+    keeps an ANSI file with a long ASCII start from losing its accents.
+    """
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+# ===================== LINE INDEX =====================
+def extend_index(starts: array, chunk: bytes, pos: int):
+    """Append the offset of every line that starts after a newline inside chunk (chunk begins at byte pos)."""
+    parts = chunk.split(b"\n")
+    starts.extend(islice(accumulate((len(p) + 1 for p in parts[:-1]), initial=pos), 1, None))
+
+
+def build_line_index(mm, start: int = 0, progress=None, cancel=None) -> array:
+    """
+    One streaming pass over the file; memory is 8 bytes per line.
+    progress(done_bytes, total_bytes) is called after every chunk and
+    setting the `cancel` event aborts with OpenCancelled.
+    """
+    starts = array("Q", [start])
+    total = len(mm)
+    for pos in range(start, total, CHUNK_SIZE):
+        if cancel is not None and cancel.is_set():
+            raise OpenCancelled()
+        extend_index(starts, mm[pos:pos + CHUNK_SIZE], pos)
+        if progress:
+            progress(min(pos + CHUNK_SIZE, total), total)
+    return starts
+
+
+def _index_path(path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(INDEX_DIR, key + ".idx")
+
+
+def load_index(path: str, st):
+    """Return the persisted index if the file still has the same size and mtime."""
+    try:
+        with open(_index_path(path), "rb") as f:
+            header = json.loads(f.readline())
+            if (header.get("size") != st.st_size or header.get("mtime_ns") != st.st_mtime_ns
+                    or header.get("byteorder") != sys.byteorder):
+                return None
+            starts = array("Q")
+            starts.frombytes(f.read())
+        return starts if len(starts) == header.get("lines") else None
+    except (OSError, ValueError):
+        return None
+
+
+def save_index(path: str, st, starts: array):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    header = {
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "byteorder": sys.byteorder,
+        "lines": len(starts),
+    }
+    target = _index_path(path)
+    try:
+        with open(target + ".tmp", "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            starts.tofile(f)
+        os.replace(target + ".tmp", target)
+    except OSError:
+        pass
+
+
+# ===================== MAPPED SOURCE =====================
+class MappedLineSource:
+    """
+    Read-only sequence of lines over a memory-mapped file.
+    Only the byte ranges that are asked for get decoded.
+
+    The encoding is guessed from the start of the file, so a later byte
+    may not fit it. Such bytes are shown as U+FFFD and `invalid` is set,
+    so the editor can warn before a save replaces them for good.
+
+    Document snapshots read from the mapping on worker threads (saves,
+    searches, exports, journal compaction), so close() only unmaps once
+    every snapshot registered with retain() has been garbage collected.
+    """
+
+    def __init__(self, path: str, starts: array, encoding: str):
+        self.path = os.path.abspath(path)
+        self.starts = starts
+        self.encoding = encoding
+        self.invalid = False
+        self.mm = None
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._close_pending = False
+        self.reopen()
+
+    def reopen(self):
+        """Map the file again after close(), or cancel a close still waiting for readers."""
+        with self._lock:
+            self._close_pending = False
+            if self.mm is None:
+                with open(self.path, "rb") as f:
+                    self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> bool:
+        """Unmap now, or once the last reader is gone; returns True if the file is unmapped now."""
+        with self._lock:
+            if self._readers:
+                self._close_pending = True
+                return False
+            self._unmap()
+            return True
+
+    def retain(self, reader):
+        """Keep the mapping open (even through close()) until reader is garbage collected."""
+        with self._lock:
+            self._readers += 1
+        weakref.finalize(reader, self._release)
+
+    def _release(self):
+        with self._lock:
+            self._readers -= 1
+            if not self._readers and self._close_pending:
+                self._unmap()
+
+    def _unmap(self):
+        self._close_pending = False
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            first, last, _ = key.indices(len(self.starts))
+            if first >= last:
+                return []
+            return self._decode(first, last).split("\n")
+        return self._decode(key, key + 1)
+
+    def _decode(self, first: int, last: int) -> str:
+        begin = self.starts[first]
+        end = self.starts[last] - 1 if last < len(self.starts) else len(self.mm)
+        data = self.mm[begin:end]
+        try:
+            text = data.decode(self.encoding)
+        except UnicodeDecodeError:
+            self.invalid = True
+            text = data.decode(self.encoding, errors="replace")
+        if "\r" in text:
+            if last < len(self.starts) and text.endswith("\r"):
+                text = text[:-1]
+            text = text.replace("\r\n", "\n")
+        return text
+
+
+def open_mapped(path: str, starts: array = None, progress=None, cancel=None) -> MappedLineSource:
+    """Map a (non-empty) file, reusing or building its line index."""
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        encoding = detect_encoding(f.read(SAMPLE_SIZE))
+    bom = len(codecs.BOM_UTF8) if encoding == "utf-8-sig" else 0
+
+    # a caller that just wrote the file already knows the index
+    fresh = starts is not None
+    if starts is None:
+        starts = load_index(path, st)
+    source = MappedLineSource(path, starts if starts is not None else array("Q"), "utf-8" if bom else encoding)
+    if starts is None:
+        try:
+            source.starts = build_line_index(source.mm, bom, progress, cancel)
+        except BaseException:
+            source.close()
+            raise
+        fresh = True
+    if fresh:
+        save_index(path, st, source.starts)
+    return source
@@ -0,0 +1,48 @@
+import os
+import threading
+
+from editor.line_index import OpenCancelled
+
+
+class OpenJob:
+    """
+    Opens a document on a worker thread.
+
+    The worker only reads, decodes and indexes; it never touches Tk. The
+    Tk thread polls `done` / `fraction` with after() and builds the tab
+    once the document is ready.
+    """
+
+    def __init__(self, fm, path: str):
+        self.path = os.path.abspath(path)
+        self.goto = None  # (line, col) to show once the tab exists
+        self.stat = None  # os.stat of the file as it was read
+        self.fraction = 0.0
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.done = False
+        self._cancel = threading.Event()
+        threading.Thread(target=self._run, args=(fm,), daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, done: int, total: int):
+        self.fraction = done / total if total else 1.0
+
+    def _run(self, fm):
+        try:
+            self.stat = os.stat(self.path)
+            doc = fm.open_document(self.path, progress=self._progress, cancel=self._cancel)
+            if self._cancel.is_set():
+                if hasattr(doc.original, "close"):
+                    doc.original.close()
+                raise OpenCancelled()
+            self.result = doc
+        except OpenCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
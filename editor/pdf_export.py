@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.pdfencrypt import StandardEncryption
+
+from editor.pdf_layout import body_font, wrap_lines
+
+LAYOUT_CHUNK_LINES = 5000  # document lines wrapped per worker task
+POOL_MIN_LINES = 20000  # smaller documents are wrapped on the export thread
+IN_FLIGHT_PER_WORKER = 2
+
+PAGE_W, PAGE_H = A4
+LM, RM, TM, BM = 2 * cm, 2 * cm, 2.5 * cm, 2.5 * cm
+BODY_SIZE, LINE_H = 11, 14
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+# ===================== LAYOUT (worker processes) =====================
+def iter_layout(snapshot, workers=None, cancel=None):
+    """
+    Yield (wrapped lines, document lines done) in document order.
+
+    Wrapping a line does not depend on any other line, so the document is
+    cut into runs of lines that worker processes wrap in parallel; pages
+    are cut from the stream afterwards, while drawing.
+    """
+    total = snapshot.line_count
+    width = PAGE_W - LM - RM
+    ranges = [(a, min(a + LAYOUT_CHUNK_LINES, total)) for a in range(0, total, LAYOUT_CHUNK_LINES)]
+    if total < POOL_MIN_LINES:
+        for a, b in ranges:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            yield wrap_lines(snapshot.lines(a, b), width, BODY_SIZE), b
+        return
+
+    workers = workers or os.cpu_count() or 2
+    # spawned, not forked: forking a process that runs Tk and other threads can deadlock the children
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        pending = deque()
+        todo = iter(ranges)
+        for a, b in todo:
+            pending.append((pool.submit(wrap_lines, list(snapshot.lines(a, b)), width, BODY_SIZE), b))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                break
+        while pending:
+            fut, done = pending.popleft()
+            wrapped = fut.result()
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            nxt = next(todo, None)
+            if nxt:
+                a, b = nxt
+                pending.append((pool.submit(wrap_lines, list(snapshot.lines(a, b)), width, BODY_SIZE), b))
+            yield wrapped, done
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ===================== RENDERING (export thread) =====================
+def encryption_for(password):
+    if not password:
+        return None
+    return StandardEncryption(
+        userPassword=password,
+        ownerPassword=password,
+        canPrint=1,
+        canModify=0,
+        canCopy=0,
+        canAnnotate=0
+    )
+
+
+class PdfExportJob:
+    """
+    Exports a document snapshot to PDF without blocking Tk.
+
+    Layout runs in worker processes (see iter_layout); reportlab draws all
+    pages into a single canvas on this job's thread, since its output can't
+    be stitched together from separately rendered files. The PDF is written
+    to a temp file and only replaces `path` once it is complete.
+    """
+
+    def __init__(self, snapshot, path: str, password=None, workers=None):
+        self.path = path
+        self.password = password
+        self.fraction = 0.0
+        self.pages = 0
+        self.error = None
+        self.cancelled = False
+        self.done = False
+        self._cancel = threading.Event()
+        threading.Thread(target=self._run, args=(snapshot, workers), daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self, snapshot, workers):
+        tmp = self.path + ".tmp"
+        try:
+            c = canvas.Canvas(tmp, pagesize=A4, encrypt=encryption_for(self.password))
+            font = body_font()
+            title = os.path.basename(self.path)
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            page = 1
+
+            def header_footer():
+                c.setFont("Helvetica-Bold" if font == "Courier" else font, 10)
+                c.drawString(LM, PAGE_H - 1.5 * cm, title)
+                c.setFont("Helvetica", 9)
+                c.drawRightString(PAGE_W - RM, PAGE_H - 1.5 * cm, now)
+
+                c.setFont("Helvetica", 9)
+                c.drawCentredString(PAGE_W / 2, 1.5 * cm, f"Page {page}")
+                c.setFont(font, BODY_SIZE)
+
+            y = PAGE_H - TM
+            header_footer()
+            total = max(snapshot.line_count, 1)
+            for wrapped, done in iter_layout(snapshot, workers, self._cancel):
+                for line in wrapped:
+                    if y <= BM:
+                        c.showPage()
+                        page += 1
+                        y = PAGE_H - TM
+                        header_footer()
+                    c.drawString(LM, y, line)
+                    y -= LINE_H
+                if self._cancel.is_set():
+                    raise ExportCancelled()
+                self.fraction = done / total
+                self.pages = page
+
+            c.save()
+            os.replace(tmp, self.path)
+        except ExportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            self.done = True
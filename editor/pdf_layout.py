@@ -0,0 +1,152 @@
+import os
+import re
+import glob
+import unicodedata
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+UNICODE_FONT = "EditorUnicode"
+FALLBACK_FONT = "Courier"  # built in, Latin only
+FONT_DIRS = [
+    os.path.join("data", "fonts"),  # any .ttf dropped here wins
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+    "/usr/share/fonts/truetype/noto",
+    "/usr/share/fonts/truetype/dejavu",
+    "/Library/Fonts",
+    "/System/Library/Fonts/Supplemental",
+]
+FONT_FILES = ["Nirmala.ttf", "Vrinda.ttf", "NotoSansBengali-Regular.ttf", "arialuni.ttf",
+              "Arial Unicode.ttf", "NotoSans-Regular.ttf", "DejaVuSans.ttf"]
+
+_TOKENS = re.compile(r"\s+|\S+")
+_font = None
+_measures = {}
+
+
+# ===================== FONT =====================
+def font_candidates():
+    yield from sorted(glob.glob(os.path.join(FONT_DIRS[0], "*.ttf")))
+    for d in FONT_DIRS[1:]:
+        for name in FONT_FILES:
+            path = os.path.join(d, name)
+            if os.path.exists(path):
+                yield path
+
+
+def body_font() -> str:
+    """
+    Name of the font used for the document text: the first Unicode TTF
+    that registers (reportlab embeds it in the PDF), or Courier if none
+    is installed. Every worker process registers it on first use.
+    """
+    global _font
+    if _font is None:
+        _font = FALLBACK_FONT
+        for path in font_candidates():
+            try:
+                pdfmetrics.registerFont(TTFont(UNICODE_FONT, path))
+            except Exception:
+                continue
+            _font = UNICODE_FONT
+            break
+    return _font
+
+
+class GlyphWidths:
+    """
+    Advance widths of one font at one size. Each character is measured
+    with stringWidth once; a string's width is then the sum of cached
+    glyph widths (reportlab does not kern, so this is exact).
+    """
+
+    def __init__(self, font: str, size: float):
+        self.font = font
+        self.size = size
+        self._cache = {}
+
+    def __call__(self, text: str) -> float:
+        cache = self._cache
+        try:
+            return sum(map(cache.__getitem__, text))
+        except KeyError:
+            for ch in set(text).difference(cache):
+                cache[ch] = pdfmetrics.stringWidth(ch, self.font, self.size)
+            return sum(map(cache.__getitem__, text))
+
+
+def measure_for(font: str, size: float) -> GlyphWidths:
+    m = _measures.get((font, size))
+    if m is None:
+        m = _measures[(font, size)] = GlyphWidths(font, size)
+    return m
+
+
+# ===================== WRAPPING =====================
+def _split_word(word: str, max_width: float, measure, min_chars: int = 1):
+    """Longest prefix of a word that fits (at least min_chars), never leaving a combining mark at the start of the rest."""
+    used = 0.0
+    i = 0
+    while i < len(word):
+        used += measure(word[i])
+        if used > max_width:
+            break
+        i += 1
+    i = max(i, min_chars)
+    while 1 < i < len(word) and unicodedata.category(word[i]) in ("Mn", "Mc"):
+        i -= 1
+    return word[:i], word[i:]
+
+
+def wrap_line(text: str, max_width: float, measure):
+    """
+    Greedy word wrap by measured width, like textwrap.wrap: leading
+    indentation is kept, whitespace at a break is dropped, and words wider
+    than a line are split. Always returns at least one line.
+    """
+    text = text.expandtabs()
+    if measure(text) <= max_width:
+        return [text.rstrip()]
+
+    out = []
+    cur = []
+    cur_w = 0.0
+    for tok in _TOKENS.findall(text):
+        w = measure(tok)
+        if cur_w + w <= max_width:
+            cur.append(tok)
+            cur_w += w
+            continue
+        if tok.isspace():
+            _flush(out, cur)  # the break goes here
+            cur, cur_w = [], 0.0
+            continue
+        if w > max_width:
+            # longer than a whole line: fill up this line, then as many full lines as needed
+            piece, tok = _split_word(tok, max_width - cur_w, measure, 0 if cur else 1)
+            out.append("".join(cur) + piece)
+            w = measure(tok)
+            while w > max_width:
+                piece, tok = _split_word(tok, max_width, measure)
+                out.append(piece)
+                w = measure(tok)
+        else:
+            _flush(out, cur)
+        cur, cur_w = ([tok], w) if tok else ([], 0.0)
+    _flush(out, cur)
+    return out or [""]
+
+
+def _flush(out, cur):
+    line = "".join(cur).rstrip()
+    if line:  # a line that was only whitespace disappears, as in textwrap
+        out.append(line)
+
+
+def wrap_lines(lines, max_width: float, size: float):
+    """Wrapped output lines for a run of document lines, in the body font at `size` points."""
+    measure = measure_for(body_font(), size)
+    out = []
+    for raw in lines:
+        out.extend(wrap_line(raw, max_width, measure))
+    return out
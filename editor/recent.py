@@ -0,0 +1,99 @@
+import os
+import time
+import threading
+
+RECENT_LIMIT = 10
+RECENT_SAVE_MS = 1000  # changes are written once they stop for this long
+RECENT_CHECK_S = 5.0  # existence checks run at most this often
+RECENT_POLL_MS = 50
+
+
+class RecentFiles:
+    """
+    The recent-files list, kept in memory.
+
+    recent_files.json is read once; after that add() and remove() only
+    change the list, and the file is rewritten (atomically, by the
+    FileManager) RECENT_SAVE_MS after the last change. on_change() runs
+    only when what the menu shows changes: the order, or which entries
+    are missing. Saving a file that is already at the top is free.
+
+    check() looks for missing files on a worker thread, so a file on a
+    slow or gone network share never blocks the Tk thread.
+    """
+
+    def __init__(self, root, fm, on_change=None):
+        self.root = root
+        self.fm = fm
+        self.on_change = on_change
+        self.items = [os.path.abspath(p) for p in fm.load_recent_files() if isinstance(p, str)][:RECENT_LIMIT]
+        self.missing = set()
+        self._save_after = None
+        self._checking = False
+        self._checked = None  # time.monotonic() of the last check
+
+    def add(self, path: str):
+        path = os.path.abspath(path)
+        if self.items and self.items[0] == path:
+            if path in self.missing:
+                self.missing.discard(path)
+                if self.on_change:
+                    self.on_change()
+            return
+        if path in self.items:
+            self.items.remove(path)
+        self.items.insert(0, path)
+        del self.items[RECENT_LIMIT:]
+        self.missing.discard(path)
+        self._changed()
+
+    def remove(self, path: str):
+        if path in self.items:
+            self.items.remove(path)
+            self.missing.discard(path)
+            self._changed()
+
+    def flush(self):
+        """Write a pending change now (on exit)."""
+        if self._save_after is not None:
+            self.root.after_cancel(self._save_after)
+            self._save()
+
+    def _changed(self):
+        if self._save_after is not None:
+            self.root.after_cancel(self._save_after)
+        self._save_after = self.root.after(RECENT_SAVE_MS, self._save)
+        if self.on_change:
+            self.on_change()
+
+    def _save(self):
+        self._save_after = None
+        try:
+            self.fm.save_recent_files(self.items)
+        except OSError as e:
+            self.fm.log_event("RECENT_SAVE_ERROR", str(e))
+
+    # ===================== EXISTENCE CHECKS =====================
+    def check(self, force: bool = False):
+        """Look for missing entries in the background; on_change() runs if that changes anything."""
+        now = time.monotonic()
+        if self._checking or (not force and self._checked is not None and now - self._checked < RECENT_CHECK_S):
+            return
+        self._checking = True
+        self._checked = now
+        paths = list(self.items)
+        result = {}
+        threading.Thread(target=lambda: result.update(missing={p for p in paths if not os.path.exists(p)}),
+                         daemon=True).start()
+        self._poll(result)
+
+    def _poll(self, result):
+        if "missing" not in result:
+            self.root.after(RECENT_POLL_MS, lambda: self._poll(result))
+            return
+        self._checking = False
+        missing = result["missing"] & set(self.items)
+        if missing != self.missing:
+            self.missing = missing
+            if self.on_change:
+                self.on_change()
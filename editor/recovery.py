@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+
+INDEX_NAME = "index.json"
+MAX_AGE_DAYS = 14
+QUOTA_BYTES = 256 * 1024 * 1024
+
+
+def file_key(path: str) -> str:
+    return "file:" + os.path.abspath(path)
+
+
+def untitled_key() -> str:
+    return "untitled:" + uuid.uuid4().hex
+
+
+def _write_index(path: str, entries: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class RecoveryStore:
+    """
+    Index of the buffers that have unsaved edits on disk.
+
+    Tabs are keyed by their file path, or by a UUID for untitled buffers,
+    so the same buffer maps to the same journal across restarts. Startup
+    reads only autosave/index.json; the directory itself is never scanned.
+    """
+
+    def __init__(self, directory: str, writer):
+        self.directory = directory
+        self.writer = writer
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self._dirty = False
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data if isinstance(data, dict) else {}
+        except Exception:
+            self.entries = {}
+
+    def base_for(self, key: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, name)
+
+    # ===================== UPDATES (Tk thread) =====================
+    def touch(self, key: str, journal, path=None):
+        self.entries[key] = {
+            "base": journal.base,
+            "gen": journal.gen,
+            "path": path,
+            "updated": time.time(),
+            "bytes": journal.base_bytes + journal.bytes,
+        }
+        self._dirty = True
+
+    def forget(self, key: str):
+        if self.entries.pop(key, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Persist the index on the writer thread, after the journal jobs already queued."""
+        if self._dirty:
+            self.writer.submit(_write_index, self.index_path, dict(self.entries))
+            self._dirty = False
+
+    # ===================== STARTUP =====================
+    def recoverable(self):
+        """[(key, entry)] newest first."""
+        return sorted(self.entries.items(), key=lambda kv: kv[1].get("updated", 0), reverse=True)
+
+    def discard(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry:
+            gen = entry.get("gen", 0)
+            for p in (f"{entry['base']}.{g}.{ext}" for g in (gen, gen + 1) for ext in ("journal", "snap")):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            self._dirty = True
+
+    def collect(self, max_age_days: float = MAX_AGE_DAYS, quota_bytes: int = QUOTA_BYTES):
+        """Drop entries older than max_age_days, then the oldest ones until the quota fits."""
+        cutoff = time.time() - max_age_days * 86400
+        for key, entry in list(self.entries.items()):
+            if entry.get("updated", 0) < cutoff:
+                self.discard(key)
+
+        total = sum(e.get("bytes", 0) for e in self.entries.values())
+        for key, entry in reversed(self.recoverable()):
+            if total <= quota_bytes:
+                break
+            total -= entry.get("bytes", 0)
+            self.discard(key)
@@ -0,0 +1,215 @@
+import os
+import queue
+import time
+import threading
+from collections import deque
+
+from editor.file_manager import content_digest
+from editor.line_index import MappedLineSource
+
+SAVE_POLL_MS = 30
+SAVE_WORKERS = 8  # files written at once; a slow disk or share costs one write's time, not the sum
+
+
+class SaveJob:
+    def __init__(self, path: str, doc, fsync: str, known_hash=None):
+        self.path = path
+        self.doc = doc  # only touched on the Tk thread
+        self.fsync = fsync
+        self.snapshot = doc.snapshot()  # dropped once written, so a mapped file can be unmapped
+        self.version = self.snapshot.version
+        self.lines = self.snapshot.line_count
+        self.callbacks = []
+        self.known_hash = known_hash  # content already on disk; matching content is not rewritten
+        self.started = False
+        self.starts = None
+        self.hash = None  # hash of the content now on disk
+        self.skipped = False
+        self.error = None
+        # Windows cannot replace a file that is still mapped; that swap happens on the Tk thread
+        original = doc.original
+        self.swap_on_tk = (os.name == "nt" and isinstance(original, MappedLineSource)
+                           and original.path == path)
+
+
+class HashJob:
+    """Hashes a document snapshot on a worker thread, the way FileManager.hash_lines does."""
+
+    def __init__(self, fm, snapshot):
+        self.version = snapshot.version
+        self.lines = snapshot.line_count
+        self.hash = None
+        self.error = None
+        self.done = False
+        threading.Thread(target=self._run, args=(fm, snapshot), daemon=True).start()
+
+    def _run(self, fm, snapshot):
+        try:
+            self.hash = fm.hash_lines(snapshot.lines())
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+
+class SaveService:
+    """
+    Saves documents on background threads.
+
+    save() only takes a snapshot of the document, so the Tk thread never
+    waits for the disk. A writer streams the snapshot to a temp file,
+    fsyncs it according to the policy and swaps it in with os.replace.
+    Up to SAVE_WORKERS different files are written at once; saves of the
+    same file always run one after another, in order. A save requested
+    while an earlier one for the same file is still queued replaces that
+    one's snapshot instead of queueing another write, so a burst of Ctrl+S
+    presses costs a single write.
+
+    Completion callbacks, callback(job), run on the Tk thread.
+    """
+
+    def __init__(self, root, fm):
+        self.root = root
+        self.fm = fm
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}  # path -> job not yet started
+        self._finished = deque()
+        self._active = []  # jobs submitted and not finished yet, oldest first
+        self._writing = set()  # paths with a job queued or being written
+        self._deferred = {}  # path -> jobs waiting for the write of that path to finish, in order
+        self._polling = False
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(SAVE_WORKERS)]
+        for t in self._threads:
+            t.start()
+
+    # ===================== TK THREAD =====================
+    def save(self, path: str, doc, callback=None, known_hash=None):
+        """
+        Queue a save of doc to path. With known_hash (the hash of what the
+        file already holds) an unchanged document is not rewritten; the
+        job then finishes with `skipped` set.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            job = self._pending.get(path)
+            if job is not None and not job.started and job.doc is doc:
+                job.snapshot = doc.snapshot()
+                job.version = job.snapshot.version
+                job.lines = job.snapshot.line_count
+                job.known_hash = known_hash
+                if callback:
+                    job.callbacks.append(callback)
+                return job
+            job = SaveJob(path, doc, self.fm.fsync_policy(), known_hash)
+            if callback:
+                job.callbacks.append(callback)
+            self._pending[path] = job
+            if path in self._writing:
+                # only one job per file is ever queued, so writers cannot reorder them
+                self._deferred.setdefault(path, deque()).append(job)
+            else:
+                self._writing.add(path)
+                self._queue.put(job)
+        self._active.append(job)
+        self._schedule_poll()
+        return job
+
+    def busy(self, doc) -> bool:
+        """True while a save of doc is queued or being written."""
+        return any(job.doc is doc for job in self._active)
+
+    def close(self, timeout: float = 10.0):
+        """Finish the queued saves (waiting at most `timeout` seconds) and run their callbacks."""
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self.poll()
+
+    def poll(self):
+        self._polling = False
+        while self._finished:
+            self._finish(self._finished.popleft())
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        if self._active and not self._polling and not self._closed:
+            self._polling = True
+            self.root.after(SAVE_POLL_MS, self.poll)
+
+    def _finish(self, job):
+        self._active.remove(job)
+        doc = job.doc
+        later = [j for j in self._active if j.doc is doc]
+        for j in later:
+            if j.path == job.path:
+                # a newer save of the same file supersedes this one
+                j.callbacks.extend(job.callbacks)
+                return
+
+        if job.error is None and not job.skipped:
+            try:
+                if job.swap_on_tk and (later or doc.version != job.version):
+                    # the old mapping is still in use: swap in a fresh write later instead
+                    if not self._closed:
+                        self.save(job.path, doc).callbacks.extend(job.callbacks)
+                        return
+                    self.fm.save_document(job.path, doc, job.fsync)
+                    job.hash = None  # what was written is newer than the snapshot
+                elif job.swap_on_tk:
+                    self.fm.swap_document(job.path, self.fm.temp_path(job.path), doc, job.starts, job.fsync)
+                elif not later and isinstance(doc.original, MappedLineSource) and doc.version == job.version:
+                    self.fm.rebase_mapped(job.path, doc, job.starts)
+            except Exception as e:
+                job.error = e
+        for cb in job.callbacks:
+            cb(job)
+
+    # ===================== WRITER THREADS =====================
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            while job is not None:
+                with self._lock:
+                    job.started = True
+                    if self._pending.get(job.path) is job:
+                        del self._pending[job.path]
+                    snapshot = job.snapshot
+                    known_hash = job.known_hash
+                self._write(job, snapshot, known_hash)
+                job.snapshot = snapshot = None
+                self._finished.append(job)
+                with self._lock:
+                    path = job.path
+                    waiting = self._deferred.get(path)
+                    job = waiting.popleft() if waiting else None
+                    if waiting is not None and not waiting:
+                        del self._deferred[path]
+                    if job is None:
+                        self._writing.discard(path)
+
+    def _write(self, job, snapshot, known_hash):
+        tmp = self.fm.temp_path(job.path)
+        try:
+            if known_hash is not None:
+                job.hash = self.fm.hash_lines(snapshot.lines())
+                if job.hash == known_hash:
+                    job.skipped = True
+                    return
+            digest = content_digest()
+            job.starts = self.fm.write_lines(tmp, snapshot.lines(), job.fsync, digest)
+            job.hash = digest.hexdigest()
+            if not job.swap_on_tk:
+                self.fm.replace_file(tmp, job.path, job.fsync)
+        except Exception as e:
+            job.error = e
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
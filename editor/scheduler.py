@@ -0,0 +1,55 @@
+import time
+
+DEBOUNCE_MS = 0  # 0 = flush on the next idle cycle
+MAX_LATENCY_MS = 100
+
+
+class UpdateScheduler:
+    """
+    Collects "dirty" flags posted by UI components and flushes them together.
+
+    A flush happens once no new flag was posted for `debounce_ms`, but
+    never later than `max_latency_ms` after the first pending flag, so a
+    paste storm or a replace-all costs one refresh instead of thousands.
+    """
+
+    def __init__(self, root, debounce_ms: int = DEBOUNCE_MS, max_latency_ms: int = MAX_LATENCY_MS):
+        self.root = root
+        self.debounce_ms = debounce_ms
+        self.max_latency_ms = max_latency_ms
+        self._handlers = {}  # flag -> callback(keys), run in registration order
+        self._dirty = {}  # flag -> set of keys posted since the last flush
+        self._first_post = None
+        self._timer = None
+
+    def register(self, flag: str, callback):
+        """callback(keys) gets the set of keys posted with the flag (None when posted without one)."""
+        self._handlers[flag] = callback
+
+    def post(self, flag: str, key=None):
+        self._dirty.setdefault(flag, set()).add(key)
+
+        now = time.monotonic()
+        if self._first_post is None:
+            self._first_post = now
+        remaining = self.max_latency_ms - (now - self._first_post) * 1000
+        delay = int(min(self.debounce_ms, remaining))
+
+        if self._timer is not None:
+            if delay <= 0:
+                return  # already due, the pending flush picks this up
+            self.root.after_cancel(self._timer)
+        if delay <= 0:
+            self._timer = self.root.after_idle(self.flush)
+        else:
+            self._timer = self.root.after(delay, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = None
+        self._first_post = None
+        dirty, self._dirty = self._dirty, {}
+        for flag, callback in self._handlers.items():
+            if flag in dirty:
+                callback(dirty[flag])
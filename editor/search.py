@@ -0,0 +1,280 @@
+import re
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+CHUNK_LINES = 2000  # lines searched per str.find / finditer pass
+REGEX_SPAN_LINES = 16  # a regex match may cover at most this many lines
+PATTERN_CACHE_SIZE = 64
+SEARCH_TIMEOUT = 10.0  # seconds a background search may run
+WORKER_POLL_S = 0.05  # how often a wait on the regex worker checks its deadline and cancel flag
+
+
+class SearchTimeout(Exception):
+    """A bounded search ran past its deadline or was cancelled."""
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_query(needle: str, regex: bool = False, ignore_case: bool = False, whole_word: bool = False):
+    """
+    Pattern for a search query: the needle itself for a plain literal
+    search (str.find is faster than re), a compiled regex otherwise.
+    Raises re.error for an invalid regex.
+    """
+    if not (regex or ignore_case or whole_word):
+        return needle
+    body = needle if regex else re.escape(needle)
+    if whole_word:
+        body = rf"\b(?:{body})\b"
+    return re.compile(body, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+
+
+def _find_all(text: str, pattern, start: int, stop: int, template: str = None):
+    """
+    (start, end) of the non-empty matches in text that start in [start, stop),
+    plus the expanded template as a third item when one is given.
+    """
+    if isinstance(pattern, str):
+        pos = text.find(pattern, start)
+        while pos != -1 and pos < stop:
+            yield pos, pos + len(pattern)
+            pos = text.find(pattern, pos + len(pattern))
+        return
+    for m in pattern.finditer(text, start):
+        if m.start() >= stop:
+            return
+        if m.end() > m.start():
+            yield (m.start(), m.end()) if template is None else (m.start(), m.end(), m.expand(template))
+
+
+def iter_matches(doc, pattern, first_line: int = 0, deadline: float = None, cancel=None, template: str = None):
+    """
+    Yield lists of (line, col, length) matches, one list per chunk of lines,
+    in document order. `doc` may be a Document or a DocumentSnapshot and
+    `pattern` comes from compile_query. Matches never overlap, like the
+    old Tk search loop; empty regex matches are skipped.
+
+    With a `deadline` (time.monotonic()) regexes run in the regex worker
+    process, and SearchTimeout is raised once the deadline passes or the
+    `cancel` event is set. With a regex `template`, every match carries
+    its replacement (group references expanded) as a fourth item.
+    """
+    if isinstance(pattern, str):
+        extra = pattern.count("\n")  # a match may run this many lines into the next chunk
+    else:
+        extra = REGEX_SPAN_LINES - 1
+    total = doc.line_count
+    first = first_line
+    skip_until = 0  # chars of the chunk already covered by a match from the previous chunk
+    while first < total:
+        last = min(first + CHUNK_LINES, total)
+        lines = list(doc.lines(first, min(last + extra, total)))
+        offsets = list(accumulate((len(line) + 1 for line in lines), initial=0))
+        own = offsets[last - first]  # matches must start inside this chunk's own lines
+        text = "\n".join(lines)
+
+        found = []
+        start, skip_until = skip_until, 0
+        if deadline is not None and not isinstance(pattern, str):
+            spans = _worker.call(_regex_find, (pattern.pattern, pattern.flags, text, start, own, template),
+                                 deadline, cancel)
+        else:
+            spans = _find_all(text, pattern, start, own, template)
+        for pos, end, *repl in spans:
+            i = bisect_right(offsets, pos) - 1
+            found.append((first + i, pos - offsets[i], end - pos, *repl))
+            if end > own:
+                skip_until = end - own
+        yield found
+        first = last
+
+
+def replace_spans(doc, pattern, repl: str, regex: bool = False):
+    """(line, col, length, replacement) for every match, in document order; unbounded, not for Tk."""
+    if regex:
+        return [m for found in iter_matches(doc, pattern, template=repl) for m in found]
+    return [(*m, repl) for found in iter_matches(doc, pattern) for m in found]
+
+
+def apply_spans(doc, spans):
+    """
+    Apply replacement spans to a Document in one Document.replace_many
+    batch. Spans on the same lines are merged into one line edit, so only
+    the lines that contain a match are rewritten.
+    """
+    edits = []
+    group = None  # [first line, lines, [(offset in joined lines, length, text)]]
+    for line, col, length, text in spans:
+        if group is None or line >= group[0] + len(group[1]):
+            if group:
+                edits.append(_splice(*group))
+            group = [line, [], []]
+        lines = group[1]
+        offset = sum(len(x) + 1 for x in lines[:line - group[0]]) + col
+        covered = sum(len(x) + 1 for x in lines) - 1  # length of the joined lines
+        while covered < offset + length:  # pull in the lines the span reaches into
+            lines.append(doc.line(group[0] + len(lines)))
+            covered += len(lines[-1]) + 1
+        group[2].append((offset, length, text))
+    if group:
+        edits.append(_splice(*group))
+    doc.replace_many(edits)
+
+
+def _splice(first: int, lines, spans):
+    text = "\n".join(lines)
+    parts = []
+    pos = 0
+    for offset, length, repl in spans:
+        parts.append(text[pos:offset])
+        parts.append(repl)
+        pos = offset + length
+    parts.append(text[pos:])
+    return first, first + len(lines), "".join(parts).split("\n")
+
+
+def visible_matches(matches, top: int, bottom: int):
+    """Matches that start on document lines [top, bottom]."""
+    return matches[bisect_left(matches, (top,)):bisect_left(matches, (bottom + 1,))]
+
+
+def first_match_after(matches, line: int, col: int) -> int:
+    """Index of the first match at or after (line, col), or -1."""
+    i = bisect_left(matches, (line, col))
+    return i if i < len(matches) else -1
+
+
+class SearchJob:
+    """
+    Searches a document snapshot on a worker thread.
+
+    Matches are appended to `matches` in document order while the scan
+    runs, so the dialog can count and highlight them right away. A job
+    belongs to one query and one document version; when either changes
+    the dialog starts a new job. A scan that takes longer than `timeout`
+    stops with `timed_out` set; regexes run in the regex worker process,
+    so that holds even while a single match backtracks.
+
+    With `replace`, replacements[i] is the text matches[i] becomes (group
+    references expanded in regex mode), so Replace never has to scan or
+    match on the Tk thread. A bad template ends the job with `error` set.
+    """
+
+    def __init__(self, snapshot, pattern, query, timeout: float = SEARCH_TIMEOUT, replace: str = None):
+        """pattern: compile_query(*query); query is kept to tell whether the dialog's query changed."""
+        self.pattern = pattern
+        self.query = query
+        self.replace = replace
+        self.timeout = timeout
+        self.version = snapshot.version
+        self.matches = []
+        self.replacements = []
+        self.timed_out = False
+        self.error = None
+        self.done = False
+        self._cancel = threading.Event()
+        threading.Thread(target=self._run, args=(snapshot,), daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self, snapshot):
+        try:
+            deadline = time.monotonic() + self.timeout
+            template = self.replace if self.query[1] else None
+            for found in iter_matches(snapshot, self.pattern, deadline=deadline, cancel=self._cancel,
+                                      template=template):
+                if self._cancel.is_set():
+                    return
+                # replacements first: a match the dialog can see always has one
+                if template is not None:
+                    self.replacements.extend(m[3] for m in found)
+                    found = [m[:3] for m in found]
+                elif self.replace is not None:
+                    self.replacements.extend([self.replace] * len(found))
+                self.matches.extend(found)
+                if time.monotonic() > deadline:
+                    self.timed_out = True
+                    return
+        except SearchTimeout:
+            self.timed_out = not self._cancel.is_set()
+        except re.error as e:
+            self.error = e
+        finally:
+            self.done = True
+
+
+# ===================== REGEX WORKER =====================
+def _regex_find(source: str, flags: int, text: str, start: int, stop: int, template: str = None) -> list:
+    return list(_find_all(text, re.compile(source, flags), start, stop, template))
+
+
+def _serve(conn):
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+class _RegexWorker:
+    """
+    A child process that runs regex matching for bounded searches.
+
+    `_sre` holds the GIL for as long as one match runs, so a pattern that
+    backtracks for minutes would freeze Tk if it ran in this process. Out
+    here it is killed at the deadline instead; the next call starts a new
+    process. One call runs at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc = None
+        self._conn = None
+
+    def call(self, fn, args, deadline: float, cancel=None):
+        if not self._lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            raise SearchTimeout()
+        try:
+            if self._proc is None:
+                self._start()
+            try:
+                self._conn.send((fn, args))
+                while not self._conn.poll(WORKER_POLL_S):
+                    if time.monotonic() > deadline or (cancel is not None and cancel.is_set()):
+                        self._stop()
+                        raise SearchTimeout()
+                ok, result = self._conn.recv()
+            except (EOFError, OSError):
+                self._stop()
+                raise
+        finally:
+            self._lock.release()
+        if not ok:
+            raise result
+        return result
+
+    def _start(self):
+        import multiprocessing  # only searches with a regex pay for it
+
+        # spawned, not forked: the calling process runs Tk and other threads
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(target=_serve, args=(child,), daemon=True)
+        self._proc.start()
+        child.close()
+
+    def _stop(self):
+        self._proc.kill()
+        self._proc.join()
+        self._conn.close()
+        self._proc = self._conn = None
+
+
+_worker = _RegexWorker()
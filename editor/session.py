@@ -0,0 +1,23 @@
+import os
+import json
+
+SESSION_FILE = os.path.join("data", "last_session.json")
+
+
+def load_session() -> dict:
+    try:
+        with open(SESSION_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {"files": [], "active": 0}
+    if not isinstance(data, dict) or not isinstance(data.get("files"), list):
+        return {"files": [], "active": 0}
+    return data
+
+
+def save_session(data: dict):
+    os.makedirs(os.path.dirname(SESSION_FILE), exist_ok=True)
+    tmp = SESSION_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, SESSION_FILE)
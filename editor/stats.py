@@ -0,0 +1,75 @@
+SCAN_STEP = 20000  # lines counted per slice while a big document is scanned
+
+
+def count_words(lines) -> int:
+    return sum(len(line.split()) for line in lines)
+
+
+class DocumentStats:
+    """
+    Word and character totals that follow document edits.
+
+    Lines never share a word (a newline is whitespace), so an edit only
+    has to count the lines it removed and the lines it added. The first
+    full count is done in slices with scan(); until it finishes, totals
+    cover lines [0, scanned) and edits further down are picked up by the
+    scan itself.
+
+    With count_words=False (long-line mode) only characters are counted:
+    splitting a 50 MB line into words on every keystroke would stall typing.
+    `words` is then None.
+    """
+
+    def __init__(self, doc, count_words: bool = True):
+        self.doc = doc
+        self.count_words = count_words
+        self.words = 0 if count_words else None
+        self._line_chars = 0  # characters excluding newlines
+        self.scanned = 0
+        doc.subscribe(self._on_edit)
+
+    @property
+    def ready(self) -> bool:
+        return self.scanned >= self.doc.line_count
+
+    @property
+    def lines(self) -> int:
+        return self.doc.line_count
+
+    @property
+    def chars(self) -> int:
+        return self._line_chars + self.doc.line_count - 1
+
+    def scan(self, budget: int = SCAN_STEP) -> bool:
+        """Count the next `budget` lines; returns True once everything is counted."""
+        last = min(self.scanned + budget, self.doc.line_count)
+        chunk = list(self.doc.lines(self.scanned, last))
+        if self.count_words:
+            self.words += count_words(chunk)
+        self._line_chars += sum(map(len, chunk))
+        self.scanned = last
+        return self.ready
+
+    def _on_edit(self, first, old_lines, new_lines, splice=None):
+        end = first + len(old_lines)
+        if end <= self.scanned:
+            if self.count_words:
+                self.words += count_words(new_lines) - count_words(old_lines)
+            self._line_chars += sum(map(len, new_lines)) - sum(map(len, old_lines))
+            self.scanned += len(new_lines) - len(old_lines)
+        elif first < self.scanned:
+            # edit straddles the scan front: forget the counted part, rescan from `first`
+            counted = old_lines[:self.scanned - first]
+            if self.count_words:
+                self.words -= count_words(counted)
+            self._line_chars -= sum(map(len, counted))
+            self.scanned = first
+
+
+def selection_stats(text_widget):
+    """(chars, words) of the current selection, or None without one."""
+    ranges = text_widget.tag_ranges("sel")
+    if not ranges:
+        return None
+    content = text_widget.get(ranges[0], ranges[1])
+    return len(content), len(content.split())
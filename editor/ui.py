@@ -2,22 +2,36 @@ from tkinter import *
 from tkinter import filedialog, messagebox, simpledialog
 from tkinter import ttk
 import os
-import json
-import threading
-import time
-import textwrap
-import tkinter.font as tkfont
 from datetime import datetime
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.lib.pdfencrypt import StandardEncryption
-
 from editor.file_manager import FileManager
-from editor.commands import word_count, get_cursor_line_col, open_find_replace_dialog
+from editor.fonts import FontService
+from editor.recent import RecentFiles
+from editor.document import Document
+from editor.viewport import SEGMENT_CHARS, TextViewport
+from editor.gutter import LineGutter
+from editor.stats import SCAN_STEP, DocumentStats, selection_stats
+from editor.scheduler import UpdateScheduler
+from editor.autosave import AutosaveWriter
+from editor.journal import EditJournal, file_header, recover
+from editor.recovery import RecoveryStore, file_key, untitled_key
+from editor.session import load_session, save_session
+from editor.loader import OpenJob
+from editor.save_service import HashJob, SaveService
+from editor.commands import open_find_in_files_dialog, open_find_replace_dialog, open_save_summary
 
 AUTOSAVE_DIR = "autosave"
+AUTOSAVE_MS = 10000
+OPEN_POLL_MS = 40
+HASH_MAX_BYTES = 64 * 1024 * 1024  # bigger files are not hashed; any edit counts as a change
+DIVERGE_QUIET_MS = 500  # typing pause before the content is hashed against the saved file
+# Long-line mode (no wrapping, lines held in horizontal segments, no word counts);
+# "long_line_chars" / "large_file_bytes" in data/config.json override the thresholds
+LONG_LINE_CHARS = 10_000
+LARGE_FILE_BYTES = 256 * 1024 * 1024
+LONG_LINE_SAMPLE = 1000  # leading lines checked for length when a document is opened
+LONG_WINDOW_LINES = 400  # lines held in the widget in long-line mode
+LONG_SCAN_LINES = 50  # lines counted per idle slice in long-line mode
 
 
 class TextEditorUI:
@@ -31,12 +45,30 @@ class TextEditorUI:
         os.makedirs("logs", exist_ok=True)
 
         self.fm = FileManager()
-        self.file_lock = threading.Lock()
+        self.saver = SaveService(self.root, self.fm)
         self.dark_mode = False
 
+        # Status, tab titles, gutters and the recent menu are refreshed in batches
+        self.updates = UpdateScheduler(self.root)
+        self.updates.register("status", lambda keys: self.update_status_label())
+        self.updates.register("title", self.update_tab_titles)
+        self.updates.register("gutter", self.redraw_gutters)
+        self.updates.register("recent", lambda keys: self.rebuild_recent_menu())
+        # read once; the menu is rebuilt only when its order or missing entries change
+        self.recent = RecentFiles(self.root, self.fm, on_change=self.refresh_recent_menu)
+
+        # Autosave I/O runs on its own thread, in submission order
+        self.autosave = AutosaveWriter(
+            on_error=lambda job, e: self.fm.log_event("AUTOSAVE_ERROR", f"{job.__name__}: {e}")
+        )
+        self.recovery = RecoveryStore(AUTOSAVE_DIR, self.autosave)
+        self.recovery.collect()
+        self.recovery.save()
+
         # ---------- Font State ----------
-        self.available_fonts = sorted(set(tkfont.families()))
-        self.font_var = StringVar(value=self.pick_default_font())
+        # families come from the on-disk cache, or are enumerated once the window is up
+        self.fonts = FontService(self.root)
+        self.font_var = StringVar(value=self.fonts.editor.cget("family"))
         self.size_var = IntVar(value=12)
 
         # ---------- Toolbar ----------
@@ -45,9 +77,10 @@ class TextEditorUI:
 
         Label(self.toolbar, text="Font:").pack(side=LEFT, padx=(2, 4))
         self.font_combo = ttk.Combobox(
-            self.toolbar, values=self.available_fonts,
+            self.toolbar, values=[self.font_var.get()],
             textvariable=self.font_var, width=28, state="readonly"
         )
+        self.fonts.load(lambda families: self.font_combo.configure(values=families))
         self.font_combo.pack(side=LEFT, padx=(0, 8))
         self.font_combo.bind("<<ComboboxSelected>>", lambda e: self.apply_font_current_tab())
 
@@ -69,12 +102,23 @@ class TextEditorUI:
         # ---------- Notebook ----------
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(expand=1, fill=BOTH)
+        # current_frame() loads a restored tab the first time it is selected
         self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.refresh_status())
 
         # Status bar
         self.status = Label(root, text="Ready", anchor=W)
         self.status.pack(fill=X)
 
+        # Progress of background opens and PDF exports, only shown while one runs
+        self.open_jobs = []
+        self.export_job = None
+        self.load_bar = Frame(root)
+        self.load_label = Label(self.load_bar, anchor=W)
+        self.load_label.pack(side=LEFT, fill=X, expand=1)
+        self.load_progress = ttk.Progressbar(self.load_bar, length=200, maximum=1.0)
+        self.load_progress.pack(side=LEFT, padx=6)
+        Button(self.load_bar, text="Cancel", command=self.cancel_tasks).pack(side=LEFT, padx=4)
+
         self.create_menu()
         self.bind_shortcuts()
 
@@ -82,9 +126,11 @@ class TextEditorUI:
         self.new_tab()
 
         self.start_autosave()
+        self.root.after_idle(self.offer_recovery)
 
         self.fm.log_event("APP_START", "Editor started")
         self.refresh_recent_menu()
+        self.recent.check(force=True)
         self.refresh_status()
 
         # Exit on close
@@ -94,102 +140,198 @@ class TextEditorUI:
         self.exit_editor()
 
     # ================= Fonts =================
-    def pick_default_font(self) -> str:
-        preferred = ["Consolas", "Cascadia Mono", "Courier New", "Segoe UI", "Arial", "Times New Roman"]
-        for f in preferred:
-            if f in tkfont.families():
-                return f
-        return tkfont.families()[0] if tkfont.families() else "Arial"
-
     def current_font_tuple(self):
         return (self.font_var.get(), int(self.size_var.get()))
 
-    def apply_font_to_textwidget(self, text_widget: Text):
-        text_widget.configure(font=self.current_font_tuple())
+    def apply_font_to_textwidget(self, text_widget: Text, font=None):
+        """Gives the widget the shared font object for `font` (default: the toolbar's choice)."""
+        family, size = font or self.current_font_tuple()
+        text_widget.configure(font=self.fonts.font(family, int(size)))
 
     def apply_font_current_tab(self):
         frame = self.current_frame()
         if not frame:
             return
         self.apply_font_to_textwidget(frame._text)
-        self.redraw_lines(frame._gutter, frame._text)
+        frame._font = self.current_font_tuple()
+        self.updates.post("gutter", frame)
         self.refresh_status()
         self.fm.log_event("FONT_CHANGE_TAB", f"{self.font_var.get()} {self.size_var.get()}")
 
     def apply_font_all_tabs(self):
+        """One reconfigure of the shared editor font; only tabs with a font of their own are touched."""
+        font = self.current_font_tuple()
+        self.fonts.set_editor_font(*font)
+        shared = str(self.fonts.editor)
         for tab in self.notebook.tabs():
             f = self.root.nametowidget(tab)
-            self.apply_font_to_textwidget(f._text)
-            self.redraw_lines(f._gutter, f._text)
+            if f._placeholder:
+                f._placeholder["font"] = list(font)
+                continue
+            if str(f._text.cget("font")) != shared:
+                f._text.configure(font=self.fonts.editor)
+            f._font = font
         self.refresh_status()
         self.fm.log_event("FONT_CHANGE_ALL", f"{self.font_var.get()} {self.size_var.get()}")
 
     # ================= Tab & Editor widgets =================
-    def make_editor_widgets(self, parent):
+    def long_line_mode(self, doc, stat=None) -> bool:
+        """
+        Whether a document needs long-line mode: Tk lays out a wrapped line
+        in time proportional to its length, which makes minified or
+        single-line files of many MB unusable otherwise.
+        """
+        cfg = self.fm.config
+        long_chars = cfg.get("long_line_chars", LONG_LINE_CHARS)
+        size = stat.st_size if stat is not None else 0
+        if size >= cfg.get("large_file_bytes", LARGE_FILE_BYTES):
+            return True
+        if size / max(doc.line_count, 1) > long_chars:
+            return True
+        return any(len(line) > long_chars for line in doc.lines(0, min(doc.line_count, LONG_LINE_SAMPLE)))
+
+    def make_editor_widgets(self, parent, doc, long_lines=False):
+        if long_lines:
+            xscroll = Scrollbar(parent, orient=HORIZONTAL)
+            xscroll.pack(side=BOTTOM, fill=X)
         container = Frame(parent)
         container.pack(expand=1, fill=BOTH)
 
-        gutter = Canvas(container, width=45, highlightthickness=0)
-        gutter.pack(side=LEFT, fill=Y)
+        canvas = Canvas(container, width=45, highlightthickness=0)
+        canvas.pack(side=LEFT, fill=Y)
 
-        text = Text(container, undo=True, wrap="word")
+        text = Text(container, undo=True, wrap="none" if long_lines else "word")
         text.pack(side=LEFT, expand=1, fill=BOTH)
 
         self.apply_font_to_textwidget(text)
 
-        scroll = Scrollbar(container, command=text.yview)
+        scroll = Scrollbar(container)
         scroll.pack(side=RIGHT, fill=Y)
-        text.configure(yscrollcommand=lambda f, l: self.on_scroll(f, l, gutter, text, scroll))
-
-        text.bind("<KeyRelease>", lambda e: self.redraw_lines(gutter, text))
-        text.bind("<MouseWheel>", lambda e: self.redraw_lines(gutter, text))
-        text.bind("<ButtonRelease>", lambda e: self.redraw_lines(gutter, text))
-        text.bind("<Configure>", lambda e: self.redraw_lines(gutter, text))
-        text.bind("<<Modified>>", lambda e, t=text: self.on_modified(t))
-
-        return gutter, text
-
-    def on_scroll(self, first, last, gutter, text, scroll):
-        scroll.set(first, last)
-        self.redraw_lines(gutter, text)
-
-    def redraw_lines(self, gutter, text):
-        gutter.delete("all")
-        bg = "#1e1e1e" if self.dark_mode else "#f0f0f0"
-        fg = "#9aa0a6" if self.dark_mode else "#444"
-        gutter.config(bg=bg)
-
-        i = text.index("@0,0")
-        while True:
-            d = text.dlineinfo(i)
-            if not d:
-                break
-            y = d[1]
-            line = i.split(".")[0]
-            gutter.create_text(40, y, anchor="ne", text=line, fill=fg)
-            i = text.index(f"{i}+1line")
-
-    def new_tab(self, content="", file_path=None, title="Untitled"):
-        frame = Frame(self.notebook)
-        gutter, text = self.make_editor_widgets(frame)
 
-        text.insert("1.0", content)
+        # The viewport owns scrolling and keeps `doc` in sync with every edit.
+        # Scrolling always ends in its yscroll callback, so only edits
+        # (re-wrapping) and resizes need their own gutter trigger.
+        gutter = LineGutter(canvas, text)
+        on_view_change = lambda: self.updates.post("gutter", parent)
+        if long_lines:
+            view = TextViewport(text, doc, scroll, on_view_change, window_lines=LONG_WINDOW_LINES,
+                                segment=SEGMENT_CHARS, xscrollbar=xscroll)
+        else:
+            view = TextViewport(text, doc, scroll, on_view_change)
+
+        text.bind("<KeyRelease>", lambda e: self.updates.post("gutter", parent))
+        text.bind("<Configure>", lambda e: self.updates.post("gutter", parent))
+        text.bind("<<Selection>>", lambda e: self.refresh_status())
+
+        return gutter, text, view
+
+    def new_tab(self, content="", file_path=None, title="Untitled", doc=None, key=None, stat=None):
+        frame = Frame(self.notebook)
+        self.notebook.add(frame, text=title)
+        self.init_tab(frame, doc if doc is not None else Document.from_text(content), file_path, key, stat=stat)
+        self.notebook.select(frame)
+        if key is None:
+            self.try_recover(frame)
+
+    def init_tab(self, frame, doc, file_path=None, key=None, font=None, stat=None):
+        """stat: os.stat of file_path when doc was just read from it."""
+        long_lines = self.long_line_mode(doc, stat)
+        gutter, text, view = self.make_editor_widgets(frame, doc, long_lines)
+        if font:
+            self.apply_font_to_textwidget(text, font)
+
+        frame._placeholder = None
+        frame._font = font or self.current_font_tuple()
+        frame._doc = doc
+        frame._view = view
         frame._text = text
         frame._gutter = gutter
         frame._file_path = file_path
         frame._modified = False
-        frame._tab_id = f"tab_{int(time.time() * 1000)}"
-
-        self.notebook.add(frame, text=title)
-        self.notebook.select(frame)
+        frame._disk = None  # what file_path holds, as far as this tab knows (see track_disk)
+        frame._hash_job = None
+        frame._diverge_after = None  # pending check_divergence, see schedule_divergence
+        # Stable identity: the file path, or a UUID that survives restarts for untitled buffers
+        frame._tab_id = key or (file_key(file_path) if file_path else untitled_key())
+        # stats subscribe first so on_modified already sees the new totals
+        frame._long_lines = long_lines
+        frame._stats = DocumentStats(doc, count_words=not long_lines)
+        header = file_header(file_path) if file_path and os.path.exists(file_path) else {"base": "empty"}
+        entry = self.recovery.entries.get(frame._tab_id)
+        frame._journal = EditJournal(
+            self.autosave, self.recovery.base_for(frame._tab_id), doc, header,
+            header.get("size", 0), entry["gen"] if entry else 0
+        )
+        doc.subscribe(lambda *args, f=frame: self.on_modified(f))
+        if stat is not None:
+            self.track_disk(frame, stat)
 
         self.apply_theme(text, gutter)
-        self.redraw_lines(gutter, text)
-        self.try_recover(frame)
+        self.updates.post("gutter", frame)
+        self.scan_stats(frame)
+
+    def new_placeholder_tab(self, entry: dict):
+        """A restored tab whose file is only read when the tab is first selected."""
+        frame = Frame(self.notebook)
+        path = entry.get("path")
+        frame._placeholder = entry
+        frame._file_path = path
+        frame._tab_id = entry.get("key") or file_key(path)
+        self.notebook.add(frame, text=os.path.basename(path) if path else "Untitled")
+        return frame
+
+    def load_placeholder(self, frame):
+        entry, frame._placeholder = frame._placeholder, None
+        path = frame._file_path
+        rec = None if path else self.recovery.entries.get(frame._tab_id)
+        doc = None
+        stat = None
+        try:
+            if path:
+                stat = os.stat(path)
+                doc = self.fm.open_document(path)
+            elif rec:
+                doc = recover(rec["base"], self.fm.open_document, rec.get("gen"))
+        except Exception as e:
+            self.fm.log_event("SESSION_LOAD_ERROR", f"{path or frame._tab_id}: {e}")
+
+        font = tuple(entry["font"]) if entry.get("font") else None
+        self.init_tab(frame, doc or Document(), path, frame._tab_id, font, stat if doc is not None else None)
+        if rec and doc is not None:
+            frame._modified = True
+            frame._journal.compact()
+            self.recovery.touch(frame._tab_id, frame._journal, None)
+        elif path:
+            self.try_recover(frame)
+
+        frame._view.scroll_to(entry.get("top", 0))
+        frame._view.place_cursor(*entry.get("cursor", (0, 0)))
+        self.refresh_status()
+
+    def loaded_frames(self):
+        for tab in self.notebook.tabs():
+            f = self.root.nametowidget(tab)
+            if not f._placeholder:
+                yield f
+
+    def scan_stats(self, frame):
+        """Counts a big document in slices so opening it never blocks the UI."""
+        if not frame.winfo_exists():
+            return
+        if frame._stats.scan(LONG_SCAN_LINES if frame._long_lines else SCAN_STEP):
+            if frame is self.current_frame():
+                self.refresh_status()
+        else:
+            self.root.after(1, lambda: self.scan_stats(frame))
 
     def current_frame(self):
         tab_id = self.notebook.select()
-        return self.root.nametowidget(tab_id) if tab_id else None
+        if not tab_id:
+            return None
+        frame = self.root.nametowidget(tab_id)
+        if frame._placeholder:
+            self.load_placeholder(frame)
+        return frame
 
     # ================= Menu =================
     def create_menu(self):
@@ -206,7 +348,7 @@ class TextEditorUI:
         file_menu.add_separator()
         file_menu.add_command(label="File Properties", command=self.file_properties)
 
-        self.recent_menu = Menu(file_menu, tearoff=0)
+        self.recent_menu = Menu(file_menu, tearoff=0, postcommand=self.recent.check)
         file_menu.add_cascade(label="Recent Files", menu=self.recent_menu)
 
         file_menu.add_separator()
@@ -218,6 +360,7 @@ class TextEditorUI:
         edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
         edit_menu.add_separator()
         edit_menu.add_command(label="Find & Replace", command=self.find_replace, accelerator="Ctrl+F")
+        edit_menu.add_command(label="Find in Files", command=self.find_in_files, accelerator="Ctrl+Shift+F")
 
         view_menu = Menu(menu, tearoff=0)
         view_menu.add_command(label="Toggle Dark Mode", command=self.toggle_dark_mode, accelerator="Ctrl+H")
@@ -240,34 +383,157 @@ class TextEditorUI:
         self.root.bind("<Control-Alt-s>", lambda e: self.save_all_tabs())
         self.root.bind("<Control-w>", lambda e: self.close_tab())
         self.root.bind("<Control-f>", lambda e: self.find_replace())
+        self.root.bind("<Control-Shift-F>", lambda e: self.find_in_files())
         self.root.bind("<Control-h>", lambda e: self.toggle_dark_mode())
         self.root.bind("<Control-p>", lambda e: self.export_pdf())
 
     # ================= Status / Modified =================
     def refresh_status(self):
+        frame = self.current_frame()
+        if not frame:
+            return
+        self.updates.post("status")
+        self.updates.post("title", frame)
+        self.updates.post("gutter", frame)
+
+    def update_status_label(self):
         frame = self.current_frame()
         if not frame:
             return
         text = frame._text
+        stats = frame._stats
 
-        wc = word_count(text)
-        ln, col = get_cursor_line_col(text)
-        name = os.path.basename(frame._file_path) if frame._file_path else "Untitled"
-        mod = "*" if frame._modified else ""
+        if frame._long_lines:
+            counts = f"Chars: {stats.chars if stats.ready else 'counting...'} | Long-line mode"
+        elif stats.ready:
+            counts = f"Words: {stats.words} | Chars: {stats.chars}"
+        else:
+            counts = "Words: counting..."
+        sel = selection_stats(text)
+        if sel and not frame._long_lines:
+            counts += f" | Selected: {sel[0]} chars, {sel[1]} words"
+        elif sel:
+            counts += f" | Selected: {sel[0]} chars"
+        if self.undecodable(frame):
+            counts += " | Invalid characters"
+        ln, col = frame._view.cursor()
+        ln += 1
 
         self.status.config(
-            text=f"{name}{mod} | Words: {wc} | Ln {ln}, Col {col} | Font: {self.font_var.get()} {self.size_var.get()}"
+            text=f"{self.tab_title(frame)} | {counts} | Lines: {stats.lines} | Ln {ln}, Col {col} | "
+                 f"Font: {self.font_var.get()} {self.size_var.get()}"
         )
-        self.notebook.tab(self.notebook.index(frame), text=name + mod)
-        self.redraw_lines(frame._gutter, frame._text)
 
-    def on_modified(self, text):
-        frame = self.current_frame()
-        if not frame:
-            return
+    def tab_title(self, frame) -> str:
+        name = os.path.basename(frame._file_path) if frame._file_path else "Untitled"
+        return name + ("*" if frame._modified else "")
+
+    def update_tab_titles(self, frames):
+        for frame in frames:
+            if frame.winfo_exists():
+                self.notebook.tab(frame, text=self.tab_title(frame))
+
+    def redraw_gutters(self, frames):
+        for frame in frames:
+            if frame.winfo_exists():
+                frame._gutter.redraw()
+
+    def on_modified(self, frame):
         frame._modified = True
-        text.edit_modified(False)
-        self.refresh_status()
+        self.updates.post("title", frame)
+        self.schedule_divergence(frame)
+        if frame is self.current_frame():
+            self.updates.post("status")
+
+    # ================= Disk state =================
+    def track_disk(self, frame, stat):
+        """
+        Remembers what the file held when the tab was loaded: size and mtime
+        to notice changes made by other programs, and (computed in the
+        background) the hash of the content as a save would write it.
+        """
+        frame._disk = disk = {"hash": None, "lines": frame._doc.line_count,
+                              "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if stat.st_size <= HASH_MAX_BYTES:
+            self.wait_for(HashJob(self.fm, frame._doc.snapshot()), lambda job: disk.update(hash=job.hash))
+
+    def record_disk(self, frame, job):
+        """After a save: the file now holds the job's snapshot."""
+        try:
+            st = os.stat(job.path)
+        except OSError:
+            frame._disk = None
+            return
+        frame._disk = {"hash": job.hash, "lines": job.lines,
+                       "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def saved_hash(self, frame):
+        """Hash of what the file holds, or None when the document cannot match it anyway."""
+        disk = frame._disk
+        if disk and disk["lines"] == frame._doc.line_count:
+            return disk["hash"]
+        return None
+
+    def disk_changed(self, frame) -> bool:
+        """True if another program changed the file since this tab last loaded or saved it."""
+        disk = frame._disk
+        if not disk:
+            return False
+        try:
+            st = os.stat(frame._file_path)
+        except OSError:
+            return False  # gone: saving simply recreates it
+        return (st.st_size, st.st_mtime_ns) != (disk["size"], disk["mtime_ns"])
+
+    def undecodable(self, frame) -> bool:
+        """True once a mapped file turned out to hold bytes its detected encoding cannot decode."""
+        return getattr(frame._doc.original, "invalid", False)
+
+    def schedule_divergence(self, frame):
+        """Check the content against the saved file once edits pause for DIVERGE_QUIET_MS."""
+        if frame._diverge_after is not None:
+            self.root.after_cancel(frame._diverge_after)
+        frame._diverge_after = self.root.after(DIVERGE_QUIET_MS, lambda: self.check_divergence([frame]))
+
+    def check_divergence(self, frames):
+        """
+        Edits that end up back at the saved content (typing then deleting,
+        undo) clear the modified mark. Only one hash per tab runs at a time;
+        edits made meanwhile are checked once it finishes and typing pauses.
+        """
+        for frame in frames:
+            if not frame.winfo_exists():
+                continue
+            frame._diverge_after = None
+            if not frame._modified or frame._hash_job:
+                continue
+            disk = frame._disk
+            doc = frame._doc
+            if not disk or disk["hash"] is None or doc.line_count != disk["lines"]:
+                continue
+            frame._hash_job = HashJob(self.fm, doc.snapshot())
+            self.wait_for(frame._hash_job, lambda job, f=frame: self.on_content_hashed(f, job))
+
+    def on_content_hashed(self, frame, job):
+        frame._hash_job = None
+        if not frame.winfo_exists():
+            return
+        if frame._doc.version != job.version:
+            self.schedule_divergence(frame)  # edited meanwhile; check the newer content once typing pauses
+            return
+        disk = frame._disk
+        if (frame._modified and disk and job.hash == disk["hash"]
+                and not self.saver.busy(frame._doc) and not self.disk_changed(frame)):
+            self.mark_saved(frame)
+            self.updates.post("title", frame)
+            self.refresh_status()
+
+    def wait_for(self, job, callback):
+        """callback(job) on the Tk thread once a background job is done."""
+        if job.done:
+            callback(job)
+        else:
+            self.root.after(OPEN_POLL_MS, lambda: self.wait_for(job, callback))
 
     # ================= Basic actions =================
     def current_text(self):
@@ -277,12 +543,12 @@ class TextEditorUI:
     def undo(self):
         t = self.current_text()
         if t:
-            t.edit_undo()
+            t._view.undo()
 
     def redo(self):
         t = self.current_text()
         if t:
-            t.edit_redo()
+            t._view.redo()
 
     def new_file(self):
         self.new_tab()
@@ -294,33 +560,114 @@ class TextEditorUI:
         self.open_specific_file(path)
 
     # ✅ REQUIRED FUNCTION (Welcome + Recent uses this)
-    def open_specific_file(self, path: str):
-        try:
-            content = self.fm.open_file(path)
-            self.new_tab(content, os.path.abspath(path), os.path.basename(path))
-            self.fm.add_recent(path)
-            self.refresh_recent_menu()
-            self.fm.log_event("OPEN_FILE", os.path.abspath(path))
-        except Exception as e:
-            messagebox.showerror("Open Error", str(e))
+    def open_specific_file(self, path: str, goto=None):
+        """
+        Reads the file on a worker thread; the tab appears once it is ready.
+        goto=(line, col) moves the cursor there once it is open.
+        A file that already has a tab is not opened twice (both tabs would
+        journal into the same recovery files): that tab is selected instead.
+        """
+        path = os.path.abspath(path)
+        frame = self.frame_for_path(path)
+        if frame is not None:
+            if goto:
+                self.show_location(frame, *goto)
+            else:
+                self.notebook.select(frame)
+            return
+        for job in self.open_jobs:
+            if job.path == path:
+                job.goto = goto or job.goto
+                return
+        job = OpenJob(self.fm, path)
+        job.goto = goto
+        self.open_jobs.append(job)
+        self.show_load_bar()
+        self.poll_open(job)
+
+    def poll_open(self, job):
+        if not job.done:
+            self.load_label.config(text=f"Opening {os.path.basename(job.path)}... {int(job.fraction * 100)}%")
+            self.load_progress.config(value=job.fraction)
+            self.root.after(OPEN_POLL_MS, lambda: self.poll_open(job))
+            return
+
+        self.open_jobs.remove(job)
+        self.hide_load_bar()
+
+        if job.error:
+            messagebox.showerror("Open Error", str(job.error))
+        elif job.cancelled:
+            self.fm.log_event("OPEN_CANCELLED", job.path)
+        else:
+            self.new_tab(file_path=job.path, title=os.path.basename(job.path), doc=job.result, stat=job.stat)
+            if job.goto:
+                self.current_frame()._view.see(*job.goto)
+            self.recent.add(job.path)
+            self.fm.log_event("OPEN_FILE", job.path)
+
+    def show_load_bar(self):
+        self.load_bar.pack(fill=X, before=self.status)
+        self.root.bind("<Escape>", lambda e: self.cancel_tasks())
+
+    def hide_load_bar(self):
+        if not self.open_jobs and not self.export_job:
+            self.load_bar.pack_forget()
+            self.root.unbind("<Escape>")
+
+    def cancel_tasks(self):
+        """Cancel button / Esc: stop the running opens and PDF export."""
+        for job in self.open_jobs:
+            job.cancel()
+        if self.export_job:
+            self.export_job.cancel()
 
     def save_file(self):
+        """
+        Hands a snapshot to the save service; the tab is marked saved once
+        the write lands. Nothing is written when the content matches the
+        file, and a file changed by another program is only overwritten
+        after asking.
+        """
         frame = self.current_frame()
         if not frame:
             return
         if not frame._file_path:
             return self.save_as()
-
-        with self.file_lock:
-            try:
-                self.fm.save_file(frame._file_path, frame._text.get("1.0", END))
-                frame._modified = False
-                self.fm.add_recent(frame._file_path)
-                self.refresh_recent_menu()
-                self.fm.log_event("SAVE_FILE", frame._file_path)
-                self.refresh_status()
-            except Exception as e:
-                messagebox.showerror("Save Error", str(e))
+        if self.undecodable(frame) and not messagebox.askyesno(
+            "Invalid Characters",
+            f"{os.path.basename(frame._file_path)} contains bytes that are not valid "
+            f"{frame._doc.original.encoding}. They are shown as \ufffd, and saving writes that "
+            "character in their place, so the original bytes are lost.\n\nSave anyway?",
+            default=messagebox.NO
+        ):
+            return
+        known_hash = self.saved_hash(frame)
+        if not self.saver.busy(frame._doc):
+            if self.disk_changed(frame):
+                if not messagebox.askyesno(
+                    "File Changed",
+                    f"{os.path.basename(frame._file_path)} was changed by another program "
+                    "since it was opened or last saved.\n\nOverwrite it with this tab?"
+                ):
+                    return
+                known_hash = None  # the file no longer holds the content on record
+            elif not frame._modified and frame._disk and os.path.exists(frame._file_path):
+                return  # the file already holds this content
+        self.saver.save(frame._file_path, frame._doc, lambda job: self.on_saved(frame, job), known_hash)
+
+    def on_saved(self, frame, job):
+        if job.error:
+            messagebox.showerror("Save Error", str(job.error))
+            return
+        if not frame.winfo_exists():
+            return
+        self.record_disk(frame, job)
+        if frame._doc.version == job.version:
+            self.mark_saved(frame)
+        self.recent.add(job.path)
+        self.fm.log_event("SAVE_FILE", job.path)
+        self.refresh_status()
 
     def save_as(self):
         frame = self.current_frame()
@@ -332,41 +679,157 @@ class TextEditorUI:
         )
         if not path:
             return
+        other = self.frame_for_path(path)
+        if other is not None and other is not frame:
+            messagebox.showerror("Save As", f"{os.path.basename(path)} is open in another tab. Close that tab first.")
+            return
         frame._file_path = os.path.abspath(path)
+        frame._disk = None  # a different file now
         self.save_file()
 
     def save_all_tabs(self):
-        saved = 0
-        skipped = 0
-        with self.file_lock:
-            for tab in self.notebook.tabs():
-                f = self.root.nametowidget(tab)
-                if not f._file_path:
-                    skipped += 1
-                    continue
-                try:
-                    self.fm.save_file(f._file_path, f._text.get("1.0", END))
-                    f._modified = False
-                    saved += 1
-                except Exception:
-                    skipped += 1
-
-        self.fm.log_event("SAVE_ALL", f"saved={saved} skipped={skipped}")
-        self.refresh_status()
-        messagebox.showinfo("Save All", f"Saved: {saved}\nSkipped (unsaved tabs): {skipped}")
+        """
+        Hands every modified tab to the save service at once; the files are
+        written in parallel and unchanged content (by hash) is not rewritten.
+        Per-file results show in a non-modal summary.
+        """
+        loaded = list(self.loaded_frames())
+        rows = [(self.tab_title(f), "Not saved (no file name)", False)
+                for f in loaded if not f._file_path and f._modified]
+        frames = []
+        for f in loaded:
+            if not f._file_path or not f._modified:
+                continue
+            if not self.saver.busy(f._doc) and self.disk_changed(f):
+                rows.append((f._file_path, "Not saved (changed by another program; use Save)", False))
+            elif self.undecodable(f):
+                rows.append((f._file_path, "Not saved (invalid characters would be lost; use Save)", False))
+            else:
+                frames.append(f)
+        left = [len(frames)]
+
+        def done(frame, job):
+            left[0] -= 1
+            if job.error:
+                rows.append((job.path, f"Failed ({job.error})", False))
+            else:
+                rows.append((job.path, "Unchanged" if job.skipped else "Saved", True))
+                if frame.winfo_exists():
+                    self.record_disk(frame, job)
+                    if frame._doc.version == job.version:
+                        self.mark_saved(frame)
+            if left[0] == 0:
+                summary()
+
+        def summary():
+            saved = sum(1 for r in rows if r[1] == "Saved")
+            failed = sum(1 for r in rows if not r[2])
+            self.fm.log_event("SAVE_ALL", f"tabs={len(loaded)} saved={saved} failed={failed}")
+            self.refresh_status()
+            if rows:
+                open_save_summary(self.root, rows)
+            else:
+                self.status.config(text="Save All: nothing to save")
+
+        for f in frames:
+            self.saver.save(f._file_path, f._doc, lambda job, f=f: done(f, job), self.saved_hash(f))
+        if not frames:
+            summary()
+
+    def mark_saved(self, frame):
+        """The journal starts over from the saved file and the tab is keyed by its path from now on."""
+        frame._modified = False
+        header = file_header(frame._file_path)
+        frame._journal.rebase(header, header["size"])
+        self.recovery.forget(frame._tab_id)
+        frame._tab_id = file_key(frame._file_path)
+        frame._journal.base = self.recovery.base_for(frame._tab_id)
+        self.recovery.save()
 
     def close_tab(self):
         frame = self.current_frame()
         if not frame:
             return
+        # unsaved edits stay recoverable
+        self.flush_journal(frame)
+        self.recovery.save()
         self.notebook.forget(frame)
+        frame.destroy()
+        # unmapped once the snapshots of running saves, searches and exports are gone
+        if hasattr(frame._doc.original, "close"):
+            frame._doc.original.close()
         if not self.notebook.tabs():
             self.new_tab()
 
     def exit_editor(self):
+        # Unsaved edits go to the journal so the next start can offer them back
+        for f in self.loaded_frames():
+            self.flush_journal(f)
+        self.recovery.save()
+        self.saver.close()
+        self.autosave.close()
+        self.recent.flush()
+        self.save_session()
         self.fm.log_event("APP_EXIT", "")
+        self.fm.log.close()
         self.root.destroy()
 
+    # ================= Session =================
+    def save_session(self):
+        """Files, cursor/scroll positions and fonts of all tabs; untitled tabs only if they are recoverable."""
+        files = []
+        active = 0
+        current = self.notebook.select()
+        for tab in self.notebook.tabs():
+            f = self.root.nametowidget(tab)
+            if not f._file_path and f._tab_id not in self.recovery.entries:
+                continue
+            if tab == current:
+                active = len(files)
+            if f._placeholder:
+                files.append(f._placeholder)
+                continue
+            files.append({
+                "path": f._file_path,
+                "key": f._tab_id,
+                "cursor": list(f._view.cursor()),
+                "top": f._view.top_line(),
+                "font": list(f._font),
+            })
+        try:
+            save_session({
+                "files": files,
+                "active": active,
+                "font": [self.font_var.get(), int(self.size_var.get())],
+            })
+        except OSError as e:
+            self.fm.log_event("SESSION_SAVE_ERROR", str(e))
+
+    def restore_session(self):
+        """Re-creates the last session's tabs; only the active one is read now, the rest on first selection."""
+        data = load_session()
+        entries = [e for e in data["files"]
+                   if isinstance(e, dict) and (e.get("path") and os.path.exists(e["path"])
+                                               or e.get("key") in self.recovery.entries)]
+        if not entries:
+            return
+        if data.get("font"):
+            self.font_var.set(data["font"][0])
+            self.size_var.set(data["font"][1])
+
+        # drop the untouched empty tab every editor starts with
+        for tab in self.notebook.tabs():
+            f = self.root.nametowidget(tab)
+            if not f._placeholder and not f._file_path and not f._modified:
+                self.notebook.forget(f)
+                f.destroy()
+
+        frames = [self.new_placeholder_tab(e) for e in entries]
+        active = frames[min(max(int(data.get("active", 0)), 0), len(frames) - 1)]
+        self.notebook.select(active)
+        self.refresh_status()
+        self.fm.log_event("SESSION_RESTORE", f"{len(frames)} tabs")
+
     def file_properties(self):
         frame = self.current_frame()
         if not frame or not frame._file_path:
@@ -380,86 +843,189 @@ class TextEditorUI:
 
     # ================= Recent files =================
     def refresh_recent_menu(self):
+        self.updates.post("recent")
+
+    def rebuild_recent_menu(self):
         self.recent_menu.delete(0, END)
-        recents = self.fm.load_recent_files()
-        if not recents:
+        if not self.recent.items:
             self.recent_menu.add_command(label="(empty)", state="disabled")
             return
-        for p in recents[:10]:
-            self.recent_menu.add_command(label=p, command=lambda x=p: self.open_recent(x))
+        missing = self.recent.missing
+        for p in self.recent.items:
+            if p in missing:
+                self.recent_menu.add_command(label=f"{p}  (not found)", state="disabled")
+            else:
+                self.recent_menu.add_command(label=p, command=lambda x=p: self.open_recent(x))
+        if missing:
+            self.recent_menu.add_separator()
+            self.recent_menu.add_command(label="Remove Missing Files", command=self.remove_missing_recent)
 
     def open_recent(self, path: str):
         if not os.path.exists(path):
-            messagebox.showerror("Recent File", "File not found.")
+            if messagebox.askyesno("Recent File", f"{path}\n\nFile not found. Remove it from Recent Files?"):
+                self.recent.remove(path)
             return
         self.open_specific_file(path)
 
+    def remove_missing_recent(self):
+        for p in list(self.recent.missing):
+            self.recent.remove(p)
+
     # ================= Find / Replace =================
     def find_replace(self):
         t = self.current_text()
         if t:
             open_find_replace_dialog(self.root, t)
 
+    def find_in_files(self):
+        frame = self.current_frame()
+        folder = os.path.dirname(frame._file_path) if frame and frame._file_path else os.getcwd()
+        open_find_in_files_dialog(self.root, self.search_sources, self.show_location, folder)
+
+    def search_sources(self):
+        """
+        What Find in Files reads: snapshots of the loaded tabs (unsaved edits
+        included), the files of tabs not loaded yet, and the paths it must
+        not read from disk because a tab already holds them.
+        """
+        tabs, files, skip = [], [], []
+        for tab in self.notebook.tabs():
+            f = self.root.nametowidget(tab)
+            if f._placeholder:
+                if f._file_path:
+                    files.append(f._file_path)
+                continue
+            tabs.append((f, self.tab_title(f), f._doc.snapshot()))
+            if f._file_path:
+                skip.append(f._file_path)
+        return tabs, files, skip
+
+    def show_location(self, target, line: int, col: int = 0):
+        """Jump to a Find in Files result; target is a tab frame or a file path."""
+        frame = self.frame_for_path(target) if isinstance(target, str) else target
+        if frame is None:
+            self.open_specific_file(target, goto=(line, col))
+            return
+        if not frame.winfo_exists():
+            return
+        self.notebook.select(frame)
+        frame = self.current_frame()
+        frame._view.see(min(line, frame._doc.line_count - 1), col)
+        frame._text.focus_set()
+
+    def frame_for_path(self, path: str):
+        path = os.path.abspath(path)
+        for tab in self.notebook.tabs():
+            f = self.root.nametowidget(tab)
+            if f._file_path and os.path.abspath(f._file_path) == path:
+                return f
+        return None
+
     # ================= Theme =================
     def toggle_dark_mode(self):
         self.dark_mode = not self.dark_mode
-        for tab in self.notebook.tabs():
-            f = self.root.nametowidget(tab)
+        for f in self.loaded_frames():
             self.apply_theme(f._text, f._gutter)
-            self.redraw_lines(f._gutter, f._text)
+            self.updates.post("gutter", f)
         self.fm.log_event("TOGGLE_THEME", "dark" if self.dark_mode else "light")
         self.refresh_status()
 
     def apply_theme(self, text, gutter):
         if self.dark_mode:
             text.config(bg="#1e1e1e", fg="#e6e6e6", insertbackground="#e6e6e6")
-            gutter.config(bg="#1e1e1e")
+            gutter.set_colors("#1e1e1e", "#9aa0a6")
             self.status.config(bg="#1e1e1e", fg="#e6e6e6")
             self.toolbar.config(bg="#1e1e1e")
         else:
             text.config(bg="white", fg="black", insertbackground="black")
-            gutter.config(bg="#f0f0f0")
+            gutter.set_colors("#f0f0f0", "#444")
             self.status.config(bg=self.root.cget("bg"), fg="black")
             self.toolbar.config(bg=self.root.cget("bg"))
 
     # ================= Autosave + Recovery =================
-    def autosave_path(self, frame):
-        return os.path.join(AUTOSAVE_DIR, f"{frame._tab_id}.autosave.txt")
-
     def start_autosave(self):
-        def worker():
-            while True:
-                time.sleep(10)
-                with self.file_lock:
-                    for tab in self.notebook.tabs():
-                        f = self.root.nametowidget(tab)
-                        if f._modified:
-                            try:
-                                with open(self.autosave_path(f), "w", encoding="utf-8") as a:
-                                    a.write(f._text.get("1.0", END))
-                            except Exception:
-                                pass
-
-        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(AUTOSAVE_MS, self.autosave_tick)
+
+    def autosave_tick(self):
+        # Runs on the Tk thread: it only hands the recorded edits to the writer thread
+        for f in self.loaded_frames():
+            self.flush_journal(f)
+        self.recovery.save()
+        self.root.after(AUTOSAVE_MS, self.autosave_tick)
+
+    def flush_journal(self, frame):
+        if frame._journal.flush():
+            self.recovery.touch(frame._tab_id, frame._journal, frame._file_path)
+
+    def offer_recovery(self):
+        """Offers every buffer with unsaved edits from earlier sessions in one dialog."""
+        open_ids = {self.root.nametowidget(t)._tab_id for t in self.notebook.tabs()}
+        entries = [(k, e) for k, e in self.recovery.recoverable() if k not in open_ids]
+        if not entries:
+            return
+
+        names = "\n".join(e.get("path") or "Untitled" for _, e in entries[:10])
+        if len(entries) > 10:
+            names += f"\n... and {len(entries) - 10} more"
+        answer = messagebox.askyesnocancel(
+            "Recovery",
+            f"Unsaved changes were found for {len(entries)} buffer(s):\n\n{names}\n\n"
+            "Restore them now?\n(No discards them, Cancel keeps them for later.)"
+        )
+        if answer is None:
+            return
+        for key, entry in entries:
+            if answer:
+                self.restore_buffer(key, entry)
+            else:
+                self.recovery.discard(key)
+        self.recovery.save()
+
+    def restore_buffer(self, key, entry):
+        try:
+            doc = recover(entry["base"], self.fm.open_document, entry.get("gen"))
+        except Exception:
+            doc = None
+        if doc is None:
+            self.recovery.discard(key)
+            self.fm.log_event("RECOVERY_FAILED", entry.get("path") or key)
+            return
+
+        path = entry.get("path")
+        self.new_tab(file_path=path, title=os.path.basename(path) if path else "Untitled", doc=doc, key=key)
+        frame = self.current_frame()
+        frame._modified = True
+        frame._journal.compact()
+        self.recovery.touch(key, frame._journal, path)
+        self.refresh_status()
+        self.fm.log_event("RECOVERY_RESTORE", path or key)
 
     def try_recover(self, frame):
-        p = self.autosave_path(frame)
-        if os.path.exists(p):
-            try:
-                with open(p, "r", encoding="utf-8", errors="ignore") as f:
-                    data = f.read()
-                if data.strip():
-                    if messagebox.askyesno("Recovery", "Autosave found for this tab. Restore it?"):
-                        frame._text.delete("1.0", END)
-                        frame._text.insert("1.0", data)
-                        frame._modified = True
-                        self.fm.log_event("RECOVERY_RESTORE", p)
-            except Exception:
-                pass
+        """A file that is opened later can still get its unsaved edits back."""
+        entry = self.recovery.entries.get(frame._tab_id)
+        if not entry:
+            return
+        try:
+            if messagebox.askyesno("Recovery", "Unsaved changes to this file were found. Restore them?"):
+                doc = recover(entry["base"], self.fm.open_document, entry.get("gen"))
+                if doc is None:
+                    self.recovery.discard(frame._tab_id)
+                else:
+                    frame._doc.replace_lines(0, frame._doc.line_count, doc.lines())
+                    frame._view.reload()
+                    frame._journal.compact()
+                    self.recovery.touch(frame._tab_id, frame._journal, frame._file_path)
+                    self.fm.log_event("RECOVERY_RESTORE", frame._file_path)
+            else:
+                self.recovery.discard(frame._tab_id)
+            self.recovery.save()
+        except Exception:
+            pass
 
     # ================= Log =================
     def open_log(self):
-        log_path = os.path.abspath("logs/editor.log")
+        self.fm.log.flush()
+        log_path = os.path.abspath(self.fm.log.path)
         if not os.path.exists(log_path):
             with open(log_path, "w", encoding="utf-8") as f:
                 f.write("")
@@ -484,10 +1050,17 @@ class TextEditorUI:
 
         try:
             name = os.path.basename(frame._file_path) if frame._file_path else "Untitled"
-            wc = word_count(frame._text)
+            stats = frame._stats
+            if stats.words is None:
+                wc = "n/a (long-line mode)"  # words are not counted in long-line mode
+            elif not stats.ready:
+                wc = f"{stats.words} so far (still counting)"
+            else:
+                wc = stats.words
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            log_path = os.path.abspath("logs/editor.log")
+            self.fm.log.flush()
+            log_path = os.path.abspath(self.fm.log.path)
             tail = []
             if os.path.exists(log_path):
                 with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
@@ -522,8 +1095,15 @@ class TextEditorUI:
         frame = self.current_frame()
         if not frame:
             return
-        text = frame._text
-
+        if self.export_job:
+            messagebox.showinfo("Export PDF", "A PDF export is already running.")
+            return
+        try:
+            # reportlab is only loaded the first time a PDF is exported
+            from editor.pdf_export import PdfExportJob
+        except ImportError as e:
+            messagebox.showerror("Export PDF", f"PDF export needs reportlab (pip install reportlab).\n\n{e}")
+            return
         default_name = "Untitled.pdf"
         if frame._file_path:
             default_name = os.path.splitext(os.path.basename(frame._file_path))[0] + ".pdf"
@@ -542,66 +1122,27 @@ class TextEditorUI:
             show="*"
         )
 
-        try:
-            content = text.get("1.0", "end-1c")
-
-            encrypt_obj = None
-            if pwd and pwd.strip():
-                user_pwd = pwd.strip()
-                encrypt_obj = StandardEncryption(
-                    userPassword=user_pwd,
-                    ownerPassword=user_pwd,
-                    canPrint=1,
-                    canModify=0,
-                    canCopy=0,
-                    canAnnotate=0
-                )
-
-            c = canvas.Canvas(pdf_path, pagesize=A4, encrypt=encrypt_obj)
-            page_w, page_h = A4
-
-            lm, rm, tm, bm = 2 * cm, 2 * cm, 2.5 * cm, 2.5 * cm
-            body_font, body_size, line_h = "Courier", 11, 14
-
-            usable_w = page_w - lm - rm
-            max_chars = max(40, int(usable_w / (0.55 * body_size)))
-
-            file_title = os.path.basename(pdf_path)
-            now = time.strftime("%Y-%m-%d %H:%M:%S")
-            page = 1
-
-            def header_footer():
-                c.setFont("Helvetica-Bold", 10)
-                c.drawString(lm, page_h - 1.5 * cm, file_title)
-                c.setFont("Helvetica", 9)
-                c.drawRightString(page_w - rm, page_h - 1.5 * cm, now)
-
-                c.setFont("Helvetica", 9)
-                c.drawCentredString(page_w / 2, 1.5 * cm, f"Page {page}")
-                c.setFont(body_font, body_size)
-
-            y = page_h - tm
-            c.setFont(body_font, body_size)
-            header_footer()
-
-            for raw in content.splitlines():
-                lines = textwrap.wrap(raw, width=max_chars) or [""]
-                for line in lines:
-                    if y <= bm:
-                        c.showPage()
-                        page += 1
-                        y = page_h - tm
-                        header_footer()
-                    c.drawString(lm, y, line)
-                    y -= line_h
-
-            c.save()
-            self.fm.log_event("EXPORT_PDF", os.path.abspath(pdf_path))
-
-            if pwd and pwd.strip():
+        pwd = pwd.strip() if pwd else ""
+        self.export_job = PdfExportJob(frame._doc.snapshot(), pdf_path, pwd or None)
+        self.show_load_bar()
+        self.poll_export(self.export_job)
+
+    def poll_export(self, job):
+        if not job.done:
+            self.load_label.config(text=f"Exporting PDF... page {job.pages} ({int(job.fraction * 100)}%)")
+            self.load_progress.config(value=job.fraction)
+            self.root.after(OPEN_POLL_MS, lambda: self.poll_export(job))
+            return
+
+        self.export_job = None
+        self.hide_load_bar()
+        if job.error:
+            messagebox.showerror("Export PDF Error", str(job.error))
+        elif job.cancelled:
+            self.fm.log_event("EXPORT_PDF_CANCELLED", os.path.abspath(job.path))
+        else:
+            self.fm.log_event("EXPORT_PDF", os.path.abspath(job.path))
+            if job.password:
                 messagebox.showinfo("Export PDF", "PDF exported with password protection ✅")
             else:
                 messagebox.showinfo("Export PDF", "PDF exported (no password) ✅")
-
-        except Exception as e:
-            messagebox.showerror("Export PDF Error", str(e))
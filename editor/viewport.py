@@ -0,0 +1,368 @@
+from tkinter import TclError
+
+from editor.history import EditHistory
+
+WINDOW_LINES = 3000  # lines kept inside the Text widget for big documents
+REFILL_MARGIN = 500  # refill once the viewport gets this close to a window edge
+SEGMENT_CHARS = 4000  # long-line mode: columns of each line held in the widget
+SEGMENT_MARGIN = 400  # shift the segment once the view gets this close to its edge
+
+
+class TextViewport:
+    """
+    Binds a Document to a Tk Text widget.
+
+    Every insert/delete that reaches the widget (typing, paste, undo,
+    find/replace) is mirrored into the document, so the document is the
+    source of truth. Big documents are never loaded completely: the
+    widget only holds a window of lines around the viewport and is
+    refilled while scrolling.
+
+    With `segment` (long-line mode, for an unwrapped widget) only columns
+    [col0, col0 + segment) of each line are held too, and the segment
+    moves while scrolling sideways, so a 50 MB line costs Tk no more than
+    a short one. Edits that would need the hidden part of a line (joining
+    a line cut off on the right, or splitting lines while scrolled right)
+    are refused with a bell.
+
+    Refilling resets the widget's undo stack, so while the widget holds
+    only a window of the document, Ctrl+Z / Ctrl+Y replay `history` (an
+    EditHistory of the document) instead.
+    """
+
+    def __init__(self, text, doc, scrollbar, on_view_change=None, window_lines=WINDOW_LINES,
+                 segment=None, xscrollbar=None):
+        self.text = text
+        self.doc = doc
+        self.scrollbar = scrollbar
+        self.xscrollbar = xscrollbar
+        self.view_listeners = [on_view_change] if on_view_change else []
+        self.window_lines = window_lines
+        self.segment = segment
+        self.first = 0
+        self.count = 0
+        self.col0 = 0
+        self.max_cols = 0  # longest line in the window (segment mode)
+        self._lengths = []  # full length of each window line (segment mode)
+        self._mirror = True
+        self._refill_pending = False
+        self._shift_pending = False
+        self.history = EditHistory(doc)
+        text._view = self
+
+        # Put ourselves in front of the widget command (same trick as idlelib's redirector)
+        self._orig = text._w + "_orig"
+        text.tk.call("rename", text._w, self._orig)
+        text.tk.createcommand(text._w, self._dispatch)
+        if text._tclCommands is None:
+            text._tclCommands = []
+        text._tclCommands.append(text._w)
+
+        text.bind("<<Undo>>", lambda e: self.undo())
+        text.bind("<<Redo>>", lambda e: self.redo())
+        text.configure(yscrollcommand=self._on_yscroll)
+        scrollbar.configure(command=self.yview)
+        if xscrollbar is not None:
+            text.configure(xscrollcommand=self._on_xscroll)
+            xscrollbar.configure(command=self.xview)
+        self._fill(0)
+
+    # ===================== POSITIONS =====================
+    def windowed(self) -> bool:
+        return self.first > 0 or self.first + self.count < self.doc.line_count
+
+    def top_line(self) -> int:
+        """Document line (0-based) at the top of the viewport."""
+        return self.first + int(str(self._call("index", "@0,0")).split(".")[0]) - 1
+
+    def bottom_line(self) -> int:
+        """Document line (0-based) at the bottom of the viewport."""
+        height = self.text.winfo_height()
+        return self.first + int(str(self._call("index", f"@0,{height}")).split(".")[0]) - 1
+
+    def widget_index(self, line: int, col: int):
+        """Widget index of a document position, or None if it is outside the window."""
+        if self.first <= line < self.first + self.count and self._in_segment(col):
+            return self._index(line, col)
+        return None
+
+    def cursor(self):
+        """Document (line, col) of the insert mark, line 0-based."""
+        line, col = str(self._call("index", "insert")).split(".")
+        return self.first + int(line) - 1, self.col0 + int(col)
+
+    def see(self, line: int, col: int = 0):
+        """Scroll a document position into view and put the cursor there."""
+        if not self._in_segment(col):
+            self._fill(line - self.window_lines // 2 if not (self.first <= line < self.first + self.count)
+                       else self.first, col0=max(0, col - self.segment // 4))
+        elif not (self.first <= line < self.first + self.count):
+            self._fill(line - self.window_lines // 2)
+        idx = self._index(line, col)
+        self._call("mark", "set", "insert", idx)
+        self._call("see", idx)
+
+    def scroll_to(self, line: int):
+        """Make a document line the top line of the viewport."""
+        line = max(0, min(line, self.doc.line_count - 1))
+        if self.first <= line < self.first + self.count:
+            self._call("yview", f"{line - self.first + 1}.0")
+        else:
+            self._fill(line - self.window_lines // 2, line)
+
+    def place_cursor(self, line: int, col: int = 0):
+        """Move the insert mark without scrolling (ignored outside the window)."""
+        if self.first <= line < self.first + self.count and self._in_segment(col):
+            self._call("mark", "set", "insert", self._index(line, col))
+
+    def reload(self):
+        """Refill the widget after the document was changed behind its back."""
+        self._fill(self.first, self.top_line())
+
+    def undo(self):
+        return self._step(self.history.undo, self.text.edit_undo)
+
+    def redo(self):
+        return self._step(self.history.redo, self.text.edit_redo)
+
+    def _step(self, replay, tk_step):
+        if not self.windowed():
+            try:
+                tk_step()
+            except TclError:
+                pass  # nothing to undo
+            return "break"
+        line = replay()
+        if line is None:
+            self.text.bell()
+            return "break"
+        self.reload()
+        self.see(min(line, self.doc.line_count - 1))
+        return "break"
+
+    def add_view_listener(self, cb):
+        """cb() runs whenever the visible lines may have changed."""
+        self.view_listeners.append(cb)
+
+    def remove_view_listener(self, cb):
+        if cb in self.view_listeners:
+            self.view_listeners.remove(cb)
+
+    # ===================== SCROLLING =====================
+    def yview(self, *args):
+        if self.windowed() and args and args[0] == "moveto":
+            target = int(float(args[1]) * self.doc.line_count)
+            if self.first <= target < self.first + self.count - REFILL_MARGIN:
+                self._call("yview", f"{target - self.first + 1}.0")
+            else:
+                self._fill(target - self.window_lines // 2, target)
+            return
+        self._call("yview", *args)
+
+    def _on_yscroll(self, lo, hi):
+        lo, hi = float(lo), float(hi)
+        if self.windowed():
+            total = self.doc.line_count
+            top = self.first + lo * self.count
+            bottom = self.first + hi * self.count
+            self.scrollbar.set(top / total, bottom / total)
+
+            near_top = self.first > 0 and top < self.first + REFILL_MARGIN
+            near_bottom = (self.first + self.count < total
+                           and bottom > self.first + self.count - REFILL_MARGIN)
+            if (near_top or near_bottom) and not self._refill_pending:
+                self._refill_pending = True
+                self.text.after_idle(self._recenter)
+        else:
+            self.scrollbar.set(lo, hi)
+
+        for cb in list(self.view_listeners):
+            cb()
+
+    def _recenter(self):
+        self._refill_pending = False
+        top = self.top_line()
+        left = self._left_col()
+        self._fill(top - self.window_lines // 2, top)
+        self._restore_left(left)
+
+    # ===================== SIDEWAYS (segment mode) =====================
+    def xview(self, *args):
+        if self.segment and args and args[0] == "moveto" and self.max_cols > self.segment:
+            target = int(float(args[1]) * self.max_cols)
+            if not (self.col0 <= target < self.col0 + self.segment - SEGMENT_MARGIN):
+                self._fill(self.first, self.top_line(), max(0, target - self.segment // 4))
+            self._restore_left(target)
+            return
+        self._call("xview", *args)
+
+    def _on_xscroll(self, lo, hi):
+        lo, hi = float(lo), float(hi)
+        if not self.segment or self.max_cols <= self.segment:
+            self.xscrollbar.set(lo, hi)
+            return
+        width = self._segment_width()
+        left, right = self.col0 + lo * width, self.col0 + hi * width
+        self.xscrollbar.set(left / self.max_cols, right / self.max_cols)
+
+        near_left = self.col0 > 0 and left < self.col0 + SEGMENT_MARGIN
+        near_right = self.col0 + width < self.max_cols and right > self.col0 + width - SEGMENT_MARGIN
+        if (near_left or near_right) and not self._shift_pending:
+            self._shift_pending = True
+            self.text.after_idle(self._shift)
+
+    def _shift(self):
+        """Move the segment so the columns on screen sit in its middle."""
+        self._shift_pending = False
+        left = self._left_col()
+        self._fill(self.first, self.top_line(), max(0, left - self.segment // 2))
+        self._restore_left(left)
+
+    def _segment_width(self) -> int:
+        return max(1, min(self.segment, self.max_cols - self.col0))
+
+    def _left_col(self) -> int:
+        """Document column at the left edge of the viewport."""
+        if not self.segment:
+            return 0
+        lo = float(self._call("xview")[0])
+        return self.col0 + int(lo * self._segment_width())
+
+    def _restore_left(self, col: int):
+        if self.segment:
+            self._call("xview", "moveto", max(0, col - self.col0) / self._segment_width())
+
+    def _in_segment(self, col: int) -> bool:
+        return not self.segment or self.col0 <= col <= self.col0 + self.segment
+
+    # ===================== FILLING =====================
+    def _fill(self, first: int, top: int = None, col0: int = None):
+        total = self.doc.line_count
+        first = max(0, min(first, total - self.window_lines))
+        last = min(total, first + self.window_lines)
+        cur_line, cur_col = self.cursor() if self.count else (0, 0)
+        if col0 is not None:
+            self.col0 = col0
+
+        if self.segment:
+            # one line decoded at a time: only its length and the segment are kept
+            c0, c1 = self.col0, self.col0 + self.segment
+            self._lengths = []
+            parts = []
+            for line in self.doc.raw_lines(first, last):
+                self._lengths.append(len(line))
+                parts.append(line[c0:c1])
+            self.max_cols = max(self._lengths, default=0)
+            content = "\n".join(parts)
+        else:
+            content = "\n".join(self.doc.lines(first, last))
+
+        self._mirror = False
+        try:
+            self._call("delete", "1.0", "end")
+            self._call("insert", "1.0", content)
+        finally:
+            self._mirror = True
+        self.first, self.count = first, last - first
+
+        # Undo history and the modified flag only describe the old window
+        self._call("edit", "reset")
+        self._call("edit", "modified", 0)
+        if first <= cur_line < last and self._in_segment(cur_col):
+            self._call("mark", "set", "insert", self._index(cur_line, cur_col))
+        else:
+            self._call("mark", "set", "insert", "1.0")
+        if top is not None:
+            self._call("yview", f"{max(top - first, 0) + 1}.0")
+
+    # ===================== MIRRORING =====================
+    def _call(self, *args):
+        return self.text.tk.call((self._orig,) + args)
+
+    def _pos(self, index):
+        """Widget index -> (line, col), clamped to the last real character like Tk does."""
+        pos = str(self._call("index", index))
+        if self.text.tk.getboolean(self._call("compare", pos, ">", "end-1c")):
+            pos = str(self._call("index", "end-1c"))
+        line, col = pos.split(".")
+        return self.first + int(line) - 1, self.col0 + int(col)
+
+    def _dispatch(self, op, *args):
+        if not self._mirror or op not in ("insert", "delete", "replace"):
+            return self._call(op, *args)
+
+        before = self.doc.line_count
+        if op == "insert":
+            line, col = self._pos(args[0])
+            new = "".join(args[1::2])
+            if self.segment and not self._segment_edit(line, line, new):
+                return ""
+            result = self._call(op, *args)
+            self.doc.insert(line, col, new)
+            self._track_lengths(line, line, col, col, new)
+        elif op == "delete":
+            ranges = []
+            for k in range(0, len(args), 2):
+                start = self._pos(args[k])
+                end = self._pos(args[k + 1] if k + 1 < len(args) else f"{args[k]}+1c")
+                if start < end:
+                    ranges.append((start, end))
+            if self.segment and not all(self._segment_edit(s[0], e[0], "") for s, e in ranges):
+                return ""
+            # later ranges first so earlier positions stay valid
+            result = ""
+            for start, end in sorted(ranges, reverse=True):
+                self._call("delete", self._index(*start), self._index(*end))
+                self.doc.delete(*start, *end)
+                self._track_lengths(start[0], end[0], start[1], end[1], "")
+        else:
+            start, end = self._pos(args[0]), self._pos(args[1])
+            new = "".join(args[2::2])
+            if self.segment and not self._segment_edit(start[0], end[0], new):
+                return ""
+            result = self._call(op, *args)
+            if start < end:
+                self.doc.delete(*start, *end)
+            self.doc.insert(*start, new)
+            self._track_lengths(start[0], end[0], start[1], end[1], new)
+
+        self.count += self.doc.line_count - before
+        return result
+
+    def _segment_edit(self, first: int, last: int, new: str) -> bool:
+        """
+        Whether an edit of lines [first, last] keeps every widget line a
+        slice of its document line starting at col0; rings the bell if not.
+        """
+        i, j = first - self.first, last - self.first
+        if min(self._lengths[i:j + 1]) < self.col0:
+            # the line ends left of the segment: its widget line is empty and col0 is past its end
+            self.text.bell()
+            return False
+        if first == last and "\n" not in new:
+            return True
+        cut_right = self._lengths[i] > self.col0 + self._widget_len(first)
+        if self.col0 == 0 and not (first != last and cut_right):
+            return True
+        self.text.bell()
+        return False
+
+    def _widget_len(self, line: int) -> int:
+        return int(str(self._call("index", f"{line - self.first + 1}.end")).split(".")[1])
+
+    def _track_lengths(self, first: int, last: int, col1: int, col2: int, new: str):
+        if not self.segment:
+            return
+        i, j = first - self.first, last - self.first
+        parts = new.split("\n")
+        # lengths follow from the edit alone, the lines themselves are never re-read
+        head, tail = min(col1, self._lengths[i]), self._lengths[j] - min(col2, self._lengths[j])
+        if len(parts) == 1:
+            lengths = [head + len(new) + tail]
+        else:
+            lengths = [head + len(parts[0])] + [len(p) for p in parts[1:-1]] + [len(parts[-1]) + tail]
+        self._lengths[i:j + 1] = lengths
+        self.max_cols = max(self.max_cols, *lengths)
+
+    def _index(self, line: int, col: int) -> str:
+        return f"{line - self.first + 1}.{col - self.col0}"
@@ -142,14 +142,23 @@
 
 
 
+import importlib
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 
-from editor.ui import TextEditorUI
+
+def preload_editor():
+    """Import the editor module off the Tk thread while the welcome screen waits for a click."""
+    try:
+        importlib.import_module("editor.ui")
+    except Exception:
+        pass  # start_editor imports it again and reports the error
 
 
 class WelcomeScreen:
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, preload: bool = True):
+        """The editor module is only imported once this screen is up (in the background if preload)."""
         self.root = root
         self.root.title("Welcome - Basic Text Editor")
         self.root.geometry("520x300")
@@ -204,6 +213,9 @@ class WelcomeScreen:
 
         self.root.protocol("WM_DELETE_WINDOW", self.root.destroy)
 
+        if preload:
+            self.root.after(0, lambda: threading.Thread(target=preload_editor, daemon=True).start())
+
     # ---------------- Center helpers ----------------
     def center_fixed(self, w, h):
         """Center using a fixed width/height."""
@@ -244,8 +256,8 @@ class WelcomeScreen:
         self.root.focus_force()
 
     # ---------------- Security ----------------
-    def require_pin(self, app: TextEditorUI) -> bool:
-        cfg = app.fm.load_config()
+    def require_pin(self, app) -> bool:
+        cfg = app.fm.config
         if not cfg.get("pin_enabled"):
             return True
 
@@ -260,7 +272,7 @@ class WelcomeScreen:
         return False
 
     # ---------------- Switch to editor ----------------
-    def start_editor(self, open_path=None, fresh=False):
+    def start_editor(self, open_path=None, fresh=False, restore=False):
         # Remove welcome UI
         for w in self.root.winfo_children():
             w.destroy()
@@ -272,7 +284,8 @@ class WelcomeScreen:
         # Set size first (position will be fixed AFTER UI loads)
         self.root.geometry("1050x740")
 
-        # Create editor UI
+        # Create editor UI (usually already imported by preload_editor)
+        from editor.ui import TextEditorUI
         app = TextEditorUI(self.root)
 
         # Security check
@@ -289,6 +302,10 @@ class WelcomeScreen:
                 pass
             app.new_tab()
 
+        # Continue option: bring back the last session's tabs
+        if restore:
+            app.restore_session()
+
         # Open file option
         if open_path:
             app.open_specific_file(open_path)
@@ -310,4 +327,4 @@ class WelcomeScreen:
         self.start_editor(open_path=path)
 
     def continue_editor(self):
-        self.start_editor()
+        self.start_editor(restore=True)
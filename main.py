@@ -7,20 +7,69 @@
 # root.mainloop()
 
 
-import tkinter as tk
-from editor.welcome import WelcomeScreen
+import sys
+import time
+
+STARTUP_BUDGET_MS = 150  # welcome window painted within this
 
 
 def main():
+    profile = "--profile-startup" in sys.argv[1:]
+    marks = [("start", time.perf_counter())]
+
+    def mark(phase: str):
+        marks.append((phase, time.perf_counter()))
+
+    import tkinter as tk
+    mark("import tkinter")
+    from editor.welcome import WelcomeScreen
+    mark("import welcome screen")
+
     root = tk.Tk()
     root.geometry("520x300")
     root.resizable(False, False)
+    mark("create root window")
 
     # Start with Welcome screen in the same root window
-    WelcomeScreen(root)
+    WelcomeScreen(root, preload=not profile)
+    mark("build welcome screen")
+
+    if profile:
+        root.update()
+        mark("first paint")
+        report_startup(marks)
+        root.destroy()
+        return
 
     root.mainloop()
 
 
+def report_startup(marks):
+    """
+    --profile-startup: per-phase timings up to the first paint of the
+    welcome screen, then what the deferred subsystems cost when first used.
+    """
+    t0 = marks[0][1]
+    print(f"{'phase':<30}{'ms':>8}{'total':>9}")
+    prev = t0
+    for phase, t in marks[1:]:
+        print(f"{phase:<30}{(t - prev) * 1000:>8.1f}{(t - t0) * 1000:>9.1f}")
+        prev = t
+    painted = (marks[-1][1] - t0) * 1000
+    verdict = "ok" if painted <= STARTUP_BUDGET_MS else "OVER BUDGET"
+    print(f"welcome painted after {painted:.1f} ms (budget {STARTUP_BUDGET_MS} ms): {verdict}")
+    print("(interpreter startup before main.py ran is not included; see python -X importtime)")
+
+    print(f"\n{'deferred, on first use':<30}{'ms':>8}")
+    for module in ("editor.ui", "editor.find_in_files", "editor.pdf_export"):
+        t = time.perf_counter()
+        try:
+            __import__(module)
+            ms = f"{(time.perf_counter() - t) * 1000:>8.1f}"
+        except ImportError as e:
+            ms = f"  ({e.name} not installed)"
+        print(f"{'import ' + module:<30}{ms}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from editor import document
+from editor.document import Document, LongLine
+from editor.line_index import open_mapped
+
+ALPHABET = ["a", "b", " ", "\n", "\r\n", "বাংলা", "xyz\nq"]
+
+
+class Model:
+    """The document as one plain string, edited with slicing."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def offset(self, line: int, col: int) -> int:
+        lines = self.text.split("\n")
+        return sum(len(x) + 1 for x in lines[:line]) + col
+
+    def insert(self, line, col, text):
+        pos = self.offset(line, col)
+        self.text = self.text[:pos] + text + self.text[pos:]
+
+    def delete(self, line1, col1, line2, col2):
+        a, b = self.offset(line1, col1), self.offset(line2, col2)
+        self.text = self.text[:a] + self.text[b:]
+
+    def splice(self, line, col, deleted, text):
+        pos = self.offset(line, col)
+        self.text = self.text[:pos] + text + self.text[pos + deleted:]
+
+
+def random_position(rng, model: Model):
+    lines = model.text.split("\n")
+    line = rng.randrange(len(lines))
+    return line, rng.randint(0, len(lines[line]))
+
+
+def random_edits(rng, doc, model, count):
+    for _ in range(count):
+        op = rng.choice(["insert", "delete", "splice"])
+        if op == "insert":
+            line, col = random_position(rng, model)
+            text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+            doc.insert(line, col, text)
+            model.insert(line, col, text)
+        elif op == "delete":
+            p, q = sorted([random_position(rng, model), random_position(rng, model)])
+            doc.delete(*p, *q)
+            model.delete(*p, *q)
+        else:
+            line, col = random_position(rng, model)
+            deleted = rng.randint(0, len(model.text) - model.offset(line, col))
+            deleted = min(deleted, 12)
+            text = rng.choice(["", "z", "\n", "w\r\nw"])
+            doc.splice(line, col, deleted, text)
+            model.splice(line, col, deleted, text)
+        assert doc.get_text() == model.text
+
+
+@pytest.fixture(params=["short", "long"])
+def line_kind(request, monkeypatch):
+    """"long" makes every line of 8+ chars a LongLine, so the column-piece path is exercised too."""
+    if request.param == "long":
+        monkeypatch.setattr(document, "SPLICE_MIN_CHARS", 8)
+        monkeypatch.setattr(document, "MERGE_PART_CHARS", 2)
+    return request.param
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_edits_match_a_string_model(line_kind, seed):
+    rng = random.Random(seed)
+    text = "hello world\nবাংলা লেখা\n\nlast line here"
+    doc, model = Document.from_text(text), Model(text)
+    random_edits(rng, doc, model, 150)
+    assert doc.line_count == model.text.count("\n") + 1
+    assert [doc.line(i) for i in range(doc.line_count)] == model.text.split("\n")
+    assert all(isinstance(line, str) for line in doc.lines())
+
+
+def test_long_lines_are_stored_as_pieces(line_kind):
+    doc = Document(["0123456789abcdef"])
+    doc.insert(0, 4, "XY")
+    raw = next(doc.raw_lines(0, 1))
+    assert isinstance(raw, LongLine) == (line_kind == "long")
+    assert raw[3:7] == "3XY4"
+    assert len(raw) == doc.line_length(0) == 18
+
+
+def test_snapshots_keep_their_version(line_kind):
+    rng = random.Random(42)
+    doc, model = Document.from_text("one\ntwo\nthree"), Model("one\ntwo\nthree")
+    frozen = []
+    for _ in range(5):
+        random_edits(rng, doc, model, 20)
+        frozen.append((doc.snapshot(), model.text, doc.version))
+    for snap, text, version in frozen:
+        assert snap.get_text() == text
+        assert snap.version == version
+        assert snap.line_count == text.count("\n") + 1
+
+
+def test_rebase_then_keep_editing(line_kind):
+    rng = random.Random(7)
+    doc, model = Document.from_text("alpha\nbeta"), Model("alpha\nbeta")
+    random_edits(rng, doc, model, 40)
+    old, before = doc.snapshot(), model.text
+    doc.rebase(model.text.split("\n"))
+    assert doc.get_text() == before
+    random_edits(rng, doc, model, 40)
+    assert old.get_text() == before
+
+
+def test_multi_line_delete_and_insert():
+    doc = Document(["abc", "def", "ghi", "jkl"])
+    doc.delete(0, 1, 2, 2)
+    assert list(doc.lines()) == ["ai", "jkl"]
+    doc.insert(0, 1, "1\n2\n3")
+    assert list(doc.lines()) == ["a1", "2", "3i", "jkl"]
+    doc.splice(1, 0, 3, "")
+    assert list(doc.lines()) == ["a1", "i", "jkl"]
+
+
+def test_mapped_crlf_file_edits(tmp_path):
+    path = tmp_path / "crlf.txt"
+    path.write_bytes("first\r\nদ্বিতীয়\r\n\r\nlast".encode("utf-8"))
+    model = Model("first\nদ্বিতীয়\n\nlast")
+    doc = Document(open_mapped(str(path)))
+    assert doc.get_text() == model.text
+    random_edits(random.Random(3), doc, model, 60)
+    doc.original.close()
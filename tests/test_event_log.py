@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from editor.event_log import EventLog
+
+
+@pytest.fixture
+def make_log(tmp_path):
+    def make(**kwargs):
+        log = EventLog(str(tmp_path / "logs" / "editor.log"), **kwargs)
+        log.close()  # no flusher thread: the test decides when to write
+        return log
+    return make
+
+
+def logged(log):
+    """Events in all log files, oldest first."""
+    lines = []
+    for i in range(log.backups, 0, -1):
+        if os.path.exists(f"{log.path}.{i}"):
+            with open(f"{log.path}.{i}", encoding="utf-8") as f:
+                lines += f.read().splitlines()
+    with open(log.path, encoding="utf-8") as f:
+        lines += f.read().splitlines()
+    return [line.split("] ", 1)[1] for line in lines]
+
+
+def test_rotation_keeps_every_event_once(make_log):
+    log = make_log(max_bytes=200, backups=5)
+    for i in range(20):
+        log.log("EVENT", f"number {i:02}")
+    log.flush()
+    assert logged(log) == [f"EVENT: number {i:02}" for i in range(20)]
+    assert os.path.getsize(log.path) <= 200
+    assert os.path.exists(log.path + ".2")
+
+
+def test_oldest_backups_are_dropped(make_log):
+    log = make_log(max_bytes=100, backups=2)
+    for i in range(40):
+        log.log("EVENT", f"number {i:02}")
+    log.flush()
+    events = logged(log)
+    assert events == [f"EVENT: number {i:02}" for i in range(40 - len(events), 40)]
+    assert not os.path.exists(log.path + ".3")
+
+
+def test_failed_write_after_rotation_is_not_duplicated(make_log, monkeypatch):
+    log = make_log(max_bytes=200, backups=5)
+    for i in range(10):
+        log.log("EVENT", f"number {i:02}")
+    real_write = EventLog._write
+    calls = []
+
+    def failing_write(self, chunk):
+        calls.append(len(chunk))
+        if len(calls) == 2:  # the first chunk made it, then the rotation, then the disk fails
+            raise OSError("disk full")
+        real_write(self, chunk)
+
+    monkeypatch.setattr(EventLog, "_write", failing_write)
+    with pytest.raises(OSError):
+        log.flush()
+    monkeypatch.setattr(EventLog, "_write", real_write)
+    log.flush()
+    assert logged(log) == [f"EVENT: number {i:02}" for i in range(10)]
+
+
+def test_overflow_is_marked_once(make_log):
+    log = make_log()
+    log._buffer = type(log._buffer)(maxlen=5)
+    for i in range(8):
+        log.log("EVENT", str(i))
+    log.flush()
+    assert logged(log) == ["LOG_OVERFLOW: older events were dropped"] + [f"EVENT: {i}" for i in range(3, 8)]
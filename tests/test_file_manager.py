@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from editor import file_manager
+from editor.file_manager import FileManager
+
+
+@pytest.fixture
+def fm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # FileManager creates data/ and logs/ here
+    monkeypatch.setattr(file_manager, "SAVE_BATCH", 4)
+    return FileManager()
+
+
+@pytest.mark.parametrize("count", [3, 4, 8, 9])
+@pytest.mark.parametrize("mapped", [False, True])
+def test_save_document_at_batch_boundaries(fm, tmp_path, monkeypatch, count, mapped):
+    if mapped:
+        monkeypatch.setattr(file_manager, "MAP_THRESHOLD", 0)
+    lines = [f"line {i}" for i in range(count)]
+    path = str(tmp_path / "doc.txt")
+    with open(path, "wb") as f:
+        f.write(os.linesep.join(lines).encode("utf-8"))
+
+    doc = fm.open_document(path)
+    fm.save_document(path, doc)
+
+    with open(path, "rb") as f:
+        assert f.read() == os.linesep.join(lines).encode("utf-8")
+    assert doc.line_count == count
+    assert list(doc.lines()) == lines
+
+
+def test_open_file_decodes_ansi_after_long_ascii_start(fm, tmp_path):
+    path = tmp_path / "ansi.txt"
+    path.write_bytes(b"a" * 70000 + b"caf\xe9")
+    assert fm.open_file(str(path)).endswith("café")
+
+
+def test_open_file_drops_utf8_bom(fm, tmp_path):
+    path = tmp_path / "bom.txt"
+    path.write_bytes(b"\xef\xbb\xbf" + "আমার সোনার বাংলা".encode("utf-8"))
+    assert fm.open_file(str(path)) == "আমার সোনার বাংলা"
+
+
+def test_mapped_source_flags_bytes_it_cannot_decode(fm, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "MAP_THRESHOLD", 0)
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(b"a" * 70000 + b"\ncaf\xe9\n")
+    doc = fm.open_document(str(path))
+    assert not doc.original.invalid
+    assert doc.line(1) == "caf�"
+    assert doc.original.invalid
+
+
+def test_snapshot_survives_save_of_mapped_document(fm, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "MAP_THRESHOLD", 0)
+    lines = [f"line {i}" for i in range(10)]
+    path = tmp_path / "big.txt"
+    path.write_bytes("\n".join(lines).encode("utf-8"))
+    doc = fm.open_document(str(path))
+    old = doc.original
+    snap = doc.snapshot()
+
+    fm.save_document(str(path), doc, fsync="none")
+    assert doc.original is not old
+    assert old.mm is not None  # still read by snap
+    assert snap.get_text() == "\n".join(lines)
+
+    del snap
+    assert old.mm is None
+
+
+def test_closed_source_stays_mapped_for_its_snapshots(fm, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "MAP_THRESHOLD", 0)
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"a\nb\nc")
+    doc = fm.open_document(str(path))
+    snap = doc.snapshot()
+    assert not doc.original.close()
+    assert list(snap.lines()) == ["a", "b", "c"]
+    del snap
+    assert doc.original.mm is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks and mode bits")
+@pytest.mark.parametrize("mapped", [False, True])
+def test_save_through_symlink_keeps_link_and_mode(fm, tmp_path, monkeypatch, mapped):
+    if mapped:
+        monkeypatch.setattr(file_manager, "MAP_THRESHOLD", 0)
+    real = tmp_path / "real.sh"
+    real.write_bytes(b"echo old")
+    real.chmod(0o755)
+    link = tmp_path / "link.sh"
+    link.symlink_to(real)
+
+    doc = fm.open_document(str(link))
+    doc.replace_lines(0, 1, ["echo new"])
+    fm.save_document(str(link), doc)
+    fm.save_file(str(link), "echo newer")
+
+    assert link.is_symlink()
+    assert real.read_bytes() == b"echo newer"
+    assert real.stat().st_mode & 0o777 == 0o755
+    assert not (tmp_path / "link.sh.tmp").exists() and not (tmp_path / "real.sh.tmp").exists()
+
+
+def test_config_is_read_once(fm, monkeypatch):
+    reads = []
+    monkeypatch.setattr(FileManager, "load_config", lambda self: reads.append(1) or {"fsync": "full"})
+    manager = FileManager()
+    assert [manager.fsync_policy() for _ in range(3)] == ["full"] * 3
+    assert len(reads) == 1
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from editor import find_in_files
+from editor.find_in_files import TOO_LARGE, FindInFilesJob, scan_batch
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(find_in_files, "MAX_DECODE_BYTES", 20)
+    small = tmp_path / "small.txt"
+    small.write_text("Needle here\n", encoding="utf-8")
+    big = tmp_path / "big.txt"
+    big.write_text("nothing\n" * 5 + "a needle\n", encoding="utf-8")
+    return str(small), str(big)
+
+
+@pytest.mark.parametrize("query", [("needle", True, False, False), ("needle", False, True, False)])
+def test_files_too_large_to_decode_are_reported(files, query):
+    small, big = files
+    scanned, hits, too_large = scan_batch([small, big], query)
+    assert scanned == 2
+    assert too_large == [big]
+    if query[2]:
+        assert hits == [(small, [(0, 0, 6, "Needle here")])]
+
+
+def test_literal_search_reads_large_files_directly(files):
+    small, big = files
+    scanned, hits, too_large = scan_batch([small, big], ("needle", False, False, False))
+    assert too_large == []
+    assert hits == [(big, [(5, 2, 6, "a needle")])]
+
+
+def test_job_shows_skipped_files_as_rows(files, tmp_path):
+    small, big = files
+    query = ("needle", False, True, False)
+    job = FindInFilesJob(query)
+    while not job.done:
+        time.sleep(0.01)
+    fut = Future()
+    fut.set_result(scan_batch([small, big], query))
+    job._collect({fut}, str(tmp_path))
+    assert job.results == [(small, "small.txt", 0, 0, 6, "Needle here"), (big, "big.txt", None, 0, 0, TOO_LARGE)]
+    assert (job.matches, job.files_matched, job.files_skipped) == (1, 1, 1)
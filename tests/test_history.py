@@ -0,0 +1,59 @@
+from editor.document import SPLICE_MIN_CHARS, Document
+from editor.history import EditHistory
+from editor.search import apply_spans, compile_query, replace_spans
+
+
+def test_undo_and_redo_a_replace_all_batch():
+    lines = [f"fox {i} fox" if i % 3 == 0 else f"line {i}" for i in range(300)]
+    doc = Document(list(lines))
+    history = EditHistory(doc)
+    doc.insert(1, 0, "typed ")
+    typed = list(doc.lines())
+
+    with history.group():
+        apply_spans(doc, replace_spans(doc, compile_query("fox"), "a\nb"))
+    replaced = list(doc.lines())
+    assert replaced != typed
+
+    assert history.undo() == 0
+    assert list(doc.lines()) == typed
+    assert history.undo() == 1
+    assert list(doc.lines()) == lines
+    assert history.undo() is None
+
+    history.redo()
+    history.redo()
+    assert list(doc.lines()) == replaced
+
+
+def test_typing_on_one_line_is_one_step():
+    doc = Document(["abc", "def"])
+    history = EditHistory(doc)
+    for i, ch in enumerate("xyz"):
+        doc.insert(0, 3 + i, ch)
+    doc.insert(1, 0, "\n")
+    history.undo()
+    assert list(doc.lines()) == ["abcxyz", "def"]
+    history.undo()
+    assert list(doc.lines()) == ["abc", "def"]
+
+
+def test_new_edit_clears_redo():
+    doc = Document(["abc"])
+    history = EditHistory(doc)
+    doc.delete(0, 0, 0, 1)
+    history.undo()
+    doc.insert(0, 0, "z")
+    assert history.redo() is None
+    assert list(doc.lines()) == ["zabc"]
+
+
+def test_undo_puts_a_long_line_back():
+    line = "q" * (SPLICE_MIN_CHARS + 5)
+    doc = Document([line, "x"])
+    history = EditHistory(doc)
+    doc.insert(0, 7, "\n")
+    doc.delete(0, 0, 1, 0)
+    history.undo()
+    history.undo()
+    assert doc.line(0) == line and isinstance(doc.line(0), str)
@@ -0,0 +1,85 @@
+import json
+import tracemalloc
+
+from editor.document import MERGE_PART_CHARS, SPLICE_MIN_CHARS, Document, LongLine
+from editor.journal import EditJournal, _journal_path, recover
+from editor.viewport import TextViewport
+
+WIDTH = 5 * 1024 * 1024
+
+
+class InlineWriter:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_typing_into_a_long_line_does_not_copy_it():
+    line = "x" * WIDTH
+    doc = Document([line, "tail"])
+    tracemalloc.start()
+    for i in range(200):
+        doc.insert(0, 1000 + i, "a")
+    doc.delete(0, 5000, 0, 6000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 1024 * 1024
+    parts = next(doc.raw_lines(0, 1)).parts
+    assert all(text is line or len(text) <= MERGE_PART_CHARS for text, _, _ in parts)
+    assert doc.line(0) == "x" * 1000 + "a" * 200 + "x" * (WIDTH - 2000)
+    assert isinstance(doc.line(0), str)
+
+
+def test_splitting_and_joining_long_lines():
+    line = "y" * (SPLICE_MIN_CHARS + 10)
+    doc = Document([line])
+    doc.insert(0, 5, "A\nB\nC")
+    assert list(doc.lines()) == ["yyyyyA", "B", "C" + "y" * (SPLICE_MIN_CHARS + 5)]
+    assert isinstance(next(doc.raw_lines(2, 3)), LongLine)
+    doc.delete(0, 5, 2, 1)
+    assert list(doc.lines()) == [line]
+    doc.delete(0, 0, 0, 20)
+    assert isinstance(next(doc.raw_lines(0, 1)), str)  # short enough again
+
+
+def test_journal_records_column_ops_and_replays_them(tmp_path):
+    base = str(tmp_path / "doc")
+    width = 2 * SPLICE_MIN_CHARS  # small enough not to trigger a compaction
+    doc = Document()
+    journal = EditJournal(InlineWriter(), base, doc, {"base": "empty"})
+    doc.replace_lines(0, 1, ["z" * width, "second"])
+    doc.insert(0, 100, "hello")
+    doc.insert(0, width, "\nnew")
+    doc.delete(0, 50, 2, 2)
+    journal.flush()
+
+    with open(_journal_path(base, 0), encoding="utf-8") as f:
+        ops = [json.loads(raw) for raw in f][1:]
+    assert ops[1:] == [[0, 100, 0, "hello"], [0, width, 0, "\nnew"], [0, 50, width + 5 - 50 + 1 + 3 + 1 + 2, ""]]
+    assert list(recover(base, None).lines()) == list(doc.lines())
+
+
+def test_segment_lengths_follow_the_edit():
+    view = TextViewport.__new__(TextViewport)
+    view.segment, view.first, view.max_cols = 1000, 10, 9000
+    view._lengths = [9000, 40, 7000]
+    view._track_lengths(10, 12, 100, 30, "ab\ncd\ne")
+    assert view._lengths == [102, 2, 1 + 7000 - 30]
+    view._track_lengths(10, 11, 50, 2, "")
+    assert view._lengths == [50, 6971]
+
+
+class Bell:
+    rung = 0
+
+    def bell(self):
+        self.rung += 1
+
+
+def test_segment_edit_refuses_lines_shorter_than_col0():
+    view = TextViewport.__new__(TextViewport)
+    view.text = Bell()
+    view.segment, view.first, view.col0 = 1000, 0, 2000
+    view._lengths = [5000, 10, 5000]
+    assert view._segment_edit(0, 0, "a")
+    assert not view._segment_edit(1, 1, "a")
+    assert view.text.rung == 1
@@ -0,0 +1,106 @@
+import os
+import json
+
+import pytest
+
+from editor import file_manager
+from editor.file_manager import FileManager
+from editor.recent import RECENT_LIMIT, RECENT_SAVE_MS, RecentFiles
+
+
+class FakeRoot:
+    """Stands in for Tk: after() callbacks run when the test advances the clock."""
+
+    def __init__(self):
+        self.now = 0
+        self.pending = {}
+        self._next = 0
+
+    def after(self, ms, fn, *args):
+        self._next += 1
+        self.pending[self._next] = (self.now + ms, fn, args)
+        return self._next
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def advance(self, ms):
+        self.now += ms
+        for after_id, (due, fn, args) in sorted(self.pending.items(), key=lambda kv: kv[1][0]):
+            if due <= self.now and self.pending.pop(after_id, None):
+                fn(*args)
+
+
+@pytest.fixture
+def fm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return FileManager()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+def saved():
+    with open(file_manager.RECENT_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_adds_are_saved_once_they_stop(fm, root, monkeypatch):
+    writes = []
+    original = fm.save_recent_files
+    monkeypatch.setattr(fm, "save_recent_files", lambda items: (writes.append(list(items)), original(items)))
+    recent = RecentFiles(root, fm)
+    for name in ["a", "b", "c"]:
+        recent.add(name)
+        root.advance(RECENT_SAVE_MS - 1)
+    assert writes == [] and saved() == []
+    root.advance(1)
+    assert writes == [[os.path.abspath(p) for p in ["c", "b", "a"]]]
+    assert saved() == writes[0]
+    assert not os.path.exists(file_manager.RECENT_FILE + ".tmp")
+
+
+def test_flush_writes_a_pending_change_now(fm, root):
+    recent = RecentFiles(root, fm)
+    recent.add("a")
+    recent.flush()
+    assert saved() == [os.path.abspath("a")]
+    assert root.pending == {}
+
+
+def test_readding_moves_to_the_top_without_duplicates(fm, root):
+    changes = []
+    recent = RecentFiles(root, fm, on_change=lambda: changes.append(list(recent.items)))
+    for name in ["a", "b", "c", "b"]:
+        recent.add(name)
+    assert recent.items == [os.path.abspath(p) for p in ["b", "c", "a"]]
+    recent.add(os.path.abspath("b"))  # already at the top: nothing to show or save
+    assert len(changes) == 4
+    recent.remove(os.path.abspath("c"))
+    root.advance(RECENT_SAVE_MS)
+    assert saved() == [os.path.abspath(p) for p in ["b", "a"]]
+
+
+def test_list_is_capped_and_read_back(fm, root):
+    recent = RecentFiles(root, fm)
+    for i in range(RECENT_LIMIT + 3):
+        recent.add(f"f{i}")
+    recent.flush()
+    expected = [os.path.abspath(f"f{i}") for i in reversed(range(3, RECENT_LIMIT + 3))]
+    assert recent.items == expected
+    assert RecentFiles(FakeRoot(), fm).items == expected
+
+
+def test_failed_save_is_logged(fm, root, monkeypatch):
+    def fail(items):
+        raise OSError("read-only")
+
+    logged = []
+    monkeypatch.setattr(fm, "save_recent_files", fail)
+    monkeypatch.setattr(fm, "log_event", lambda event, details: logged.append(event))
+    recent = RecentFiles(root, fm)
+    recent.add("a")
+    root.advance(RECENT_SAVE_MS)
+    assert logged == ["RECENT_SAVE_ERROR"]
@@ -0,0 +1,67 @@
+import os
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from editor.recovery import RecoveryStore
+
+
+class InlineWriter:
+    """Runs writer jobs right away instead of on a thread."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecoveryStore(str(tmp_path), InlineWriter())
+
+
+def add_entry(store, key, age_days, size, gen=0):
+    """An index entry whose journal and snapshot exist on disk, last touched age_days ago."""
+    base = store.base_for(key)
+    for ext in ("journal", "snap"):
+        with open(f"{base}.{gen}.{ext}", "w", encoding="utf-8") as f:
+            f.write("x")
+    store.touch(key, SimpleNamespace(base=base, gen=gen, base_bytes=size, bytes=0))
+    store.entries[key]["updated"] = time.time() - age_days * 86400
+    return base
+
+
+def test_old_entries_are_dropped_with_their_files(store):
+    old = add_entry(store, "file:/old.txt", age_days=20, size=10)
+    new = add_entry(store, "file:/new.txt", age_days=1, size=10, gen=3)
+    store.collect(max_age_days=14)
+    assert list(store.entries) == ["file:/new.txt"]
+    assert not os.path.exists(old + ".0.journal")
+    assert not os.path.exists(old + ".0.snap")
+    assert os.path.exists(new + ".3.journal")
+
+
+def test_quota_drops_the_oldest_first(store):
+    for i, key in enumerate(["a", "b", "c", "d"]):
+        add_entry(store, key, age_days=4 - i, size=100)  # "d" is the newest
+    store.collect(quota_bytes=250)
+    assert [key for key, _ in store.recoverable()] == ["d", "c"]
+    assert not os.path.exists(store.base_for("a") + ".0.journal")
+    assert not os.path.exists(store.base_for("b") + ".0.journal")
+
+
+def test_under_quota_keeps_everything(store):
+    for key in ["a", "b"]:
+        add_entry(store, key, age_days=1, size=100)
+    store.collect(quota_bytes=200)
+    assert sorted(store.entries) == ["a", "b"]
+
+
+def test_collect_result_survives_a_restart(store, tmp_path):
+    add_entry(store, "old", age_days=30, size=1)
+    add_entry(store, "kept", age_days=0, size=1)
+    store.collect()
+    store.save()
+    with open(store.index_path, encoding="utf-8") as f:
+        assert list(json.load(f)) == ["kept"]
+    assert list(RecoveryStore(str(tmp_path), InlineWriter()).entries) == ["kept"]
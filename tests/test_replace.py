@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+from editor import search
+from editor.document import Document
+from editor.search import apply_spans, compile_query, replace_spans
+
+TEXTS = [
+    "aaaa\naaa\n\na",
+    "abab ab\nba\nab",
+    "one two\nthree\nfour five six\n\nseven",
+    "x1 y22\nz333\n\n4444 end",
+]
+
+
+@pytest.fixture(params=[2000, 2])
+def chunk_lines(request, monkeypatch):
+    """2 puts chunk boundaries between most lines, so matches across them are covered too."""
+    monkeypatch.setattr(search, "CHUNK_LINES", request.param)
+
+
+def replaced(text, pattern, repl, regex=False):
+    doc = Document.from_text(text)
+    apply_spans(doc, replace_spans(doc, pattern, repl, regex))
+    return doc.get_text()
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("needle, repl", [
+    ("aa", "b"),  # overlapping candidates: "aaa" has one match, like str.replace
+    ("ab", "ABC"),  # adjacent matches
+    ("a\na", "-"),  # a match that crosses a line boundary
+    ("b\nb", "\n\n"),
+    ("o", "\nO\n"),  # replacements that add lines
+    ("\n", ""),  # and remove them
+    (" ", "\n"),
+])
+def test_literal_replace_all_matches_str_replace(chunk_lines, text, needle, repl):
+    assert replaced(text, compile_query(needle), repl) == text.replace(needle, repl)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("regex, repl", [
+    (r"\d+", r"<\g<0>>"),
+    (r"(\w+)\n(\w+)", r"\2\n\1"),  # spans crossing line boundaries, groups swapped
+    (r"a+", "A"),
+    (r"(\w) (\w)", r"\1\n\2"),
+    (r"\n\n", "\n"),
+    (r"^\w", "#"),
+])
+def test_regex_replace_all_matches_re_sub(chunk_lines, text, regex, repl):
+    expected = re.sub(regex, repl, text, flags=re.MULTILINE)
+    assert replaced(text, compile_query(regex, regex=True), repl, regex=True) == expected
+
+
+def test_ignore_case_replacement_is_literal():
+    text = "Fox fox\nFOX"
+    assert replaced(text, compile_query("fox", ignore_case=True), r"\1") == r"\1 \1" + "\n" + r"\1"
+
+
+def test_replace_many_adjacent_and_empty_edits_notify_in_replay_order():
+    lines = ["a", "b", "c", "d", "e", "f"]
+    doc = Document(list(lines))
+    mirror = Document(list(lines))
+    doc.subscribe(lambda first, old, new, splice: mirror.replace_lines(first, first + len(old), new))
+    doc.replace_many([
+        (0, 1, ["A1", "A2"]),  # grows
+        (1, 3, []),  # adjacent to it, removes two lines
+        (3, 3, ["inserted"]),  # pure insertion
+        (4, 6, ["EF"]),
+    ])
+    expected = ["A1", "A2", "inserted", "d", "EF"]
+    assert list(doc.lines()) == expected
+    assert list(mirror.lines()) == expected
+    assert doc.version == 1
+
+
+def test_replace_many_can_remove_everything():
+    doc = Document(["a", "b"])
+    doc.replace_many([(0, 2, [])])
+    assert list(doc.lines()) == [""]
@@ -0,0 +1,127 @@
+import os
+import time
+import threading
+
+import pytest
+
+from editor.document import Document
+from editor.file_manager import FileManager
+from editor.save_service import SaveService
+
+
+class FakeRoot:
+    """Stands in for Tk: after() callbacks run when the test pumps them."""
+
+    def __init__(self):
+        self.calls = []
+
+    def after(self, ms, fn, *args):
+        self.calls.append((fn, args))
+
+    def pump_until(self, done, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not done():
+            assert time.monotonic() < deadline, "saves never finished"
+            calls, self.calls = self.calls, []
+            for fn, args in calls:
+                fn(*args)
+            time.sleep(0.005)
+
+
+@pytest.fixture
+def fm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return FileManager()
+
+
+@pytest.fixture
+def service(fm):
+    root = FakeRoot()
+    svc = SaveService(root, fm)
+    yield svc
+    svc.close()
+
+
+def gate_writes(fm, monkeypatch):
+    """Record what each write holds; the first write waits until the returned event is set."""
+    written = []
+    gate = threading.Event()
+    original = fm.write_lines
+
+    def write_lines(tmp, lines, *args):
+        lines = list(lines)
+        if not written:
+            gate.wait(5)
+        written.append(lines)
+        return original(tmp, lines, *args)
+
+    monkeypatch.setattr(fm, "write_lines", write_lines)
+    return written, gate
+
+
+def test_saves_during_a_write_coalesce_and_land_in_order(fm, service, tmp_path, monkeypatch):
+    written, gate = gate_writes(fm, monkeypatch)
+    path = str(tmp_path / "doc.txt")
+    doc = Document(["v1"])
+    finished = []
+
+    first = service.save(path, doc, finished.append)
+    while not first.started:
+        time.sleep(0.001)
+    doc.replace_lines(0, 1, ["v2"])
+    second = service.save(path, doc, finished.append)
+    doc.replace_lines(0, 1, ["v3"])
+    third = service.save(path, doc, finished.append)
+    assert third is second  # still queued: its snapshot was replaced instead
+
+    gate.set()
+    service.root.pump_until(lambda: len(finished) == 3)
+    assert written == [["v1"], ["v3"]]
+    with open(path, "rb") as f:
+        assert f.read() == b"v3"
+    # the first job was superseded: its callback ran with the newest job, once
+    assert finished == [second, second, second]
+    assert all(job.error is None for job in finished)
+
+
+def test_saves_of_different_documents_to_one_path_run_in_order(fm, service, tmp_path, monkeypatch):
+    written, gate = gate_writes(fm, monkeypatch)
+    path = str(tmp_path / "doc.txt")
+    finished = []
+    jobs = [service.save(path, Document([f"doc {i}"]), finished.append) for i in range(4)]
+    gate.set()
+    service.root.pump_until(lambda: len(finished) == 4)
+    assert written == [[f"doc {i}"] for i in range(4)]
+    with open(path, "rb") as f:
+        assert f.read() == b"doc 3"
+    assert not any(job.error for job in jobs)
+
+
+def test_failed_write_leaves_the_original_intact(fm, service, tmp_path, monkeypatch):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"original")
+
+    def broken(tmp, lines, *args):
+        with open(tmp, "wb") as f:
+            f.write(b"half")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(fm, "write_lines", broken)
+    finished = []
+    service.save(str(path), Document(["new content"]), finished.append)
+    service.root.pump_until(lambda: finished)
+    assert isinstance(finished[0].error, OSError)
+    assert path.read_bytes() == b"original"
+    assert not os.path.exists(fm.temp_path(str(path)))
+
+
+def test_unchanged_content_is_not_rewritten(fm, service, tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"same")
+    mtime = path.stat().st_mtime_ns
+    doc = Document(["same"])
+    finished = []
+    service.save(str(path), doc, finished.append, known_hash=fm.hash_lines(doc.lines()))
+    service.root.pump_until(lambda: finished)
+    assert finished[0].skipped
+    assert path.stat().st_mtime_ns == mtime
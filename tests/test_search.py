@@ -0,0 +1,90 @@
+import time
+import threading
+
+from editor.document import Document
+from editor.search import SearchJob, compile_query, iter_matches
+
+
+def run_job(doc, query, timeout=None, replace=None):
+    """Start and poll a SearchJob the way the Find dialog does."""
+    pattern = compile_query(*query)
+    job = SearchJob(doc.snapshot(), pattern, query, replace=replace) if timeout is None else \
+        SearchJob(doc.snapshot(), pattern, query, timeout=timeout, replace=replace)
+    deadline = time.monotonic() + 5
+    while not job.done:
+        assert time.monotonic() < deadline, "search never finished"
+        time.sleep(0.01)
+    return job
+
+
+def test_search_job_finds_matches_in_order():
+    doc = Document(["one fox", "no match", "fox and fox"])
+    q = ("fox", False, False, False)
+    job = run_job(doc, q)
+    assert job.matches == [(0, 4, 3), (2, 0, 3), (2, 8, 3)]
+    assert job.query == q
+    assert job.version == doc.version
+    assert not job.timed_out
+
+
+def test_search_job_regex_query():
+    doc = Document(["Fox fox FOX", "foxes"])
+    job = run_job(doc, ("fox", False, True, True))
+    assert [m[:2] for m in job.matches] == [(0, 0), (0, 4), (0, 8)]
+
+
+def test_search_job_timeout_still_finishes():
+    doc = Document(["fox"] * 10000)
+    job = run_job(doc, ("fox", False, False, False), timeout=0)
+    assert job.done
+    assert job.timed_out
+
+
+def test_runaway_regex_is_stopped_without_holding_the_gil():
+    doc = Document(["a" * 26 + "b"])
+    ticks = []
+    stop = threading.Event()
+
+    def ticker():
+        while not stop.is_set():
+            ticks.append(time.monotonic())
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=ticker)
+    thread.start()
+    t0 = time.monotonic()
+    try:
+        job = run_job(doc, ("(a+)+$", True, False, False), timeout=0.5)
+    finally:
+        stop.set()
+        thread.join()
+    assert job.timed_out
+    assert time.monotonic() - t0 < 4
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    assert max(gaps) < 0.5
+
+
+def test_regex_in_the_worker_matches_in_process_search():
+    doc = Document(["x = 1; y = 22", "", "z=333"] * 3000)
+    q = (r"(\w)\s*=\s*(\d+)", True, False, False)
+    expected = [m for found in iter_matches(doc, compile_query(*q)) for m in found]
+    assert run_job(doc, q).matches == expected
+
+
+def test_search_job_expands_replacements_in_the_worker():
+    doc = Document(["x = 1; y = 22", "z=333"])
+    job = run_job(doc, (r"(\w)\s*=\s*(\d+)", True, False, False), replace=r"\2:\1")
+    assert job.matches == [(0, 0, 5), (0, 7, 6), (1, 0, 5)]
+    assert job.replacements == ["1:x", "22:y", "333:z"]
+
+
+def test_search_job_literal_replacement_is_not_expanded():
+    doc = Document(["Fox fox"])
+    job = run_job(doc, ("fox", False, True, False), replace=r"\1")
+    assert job.replacements == [r"\1", r"\1"]
+
+
+def test_search_job_bad_template_sets_error():
+    job = run_job(Document(["fox"]), ("fox", True, False, False), replace=r"\9")
+    assert job.error is not None
+    assert job.matches == []